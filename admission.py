@@ -0,0 +1,159 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+# Hard per-request limits, answered with 413
+MAX_SLIDES = int(os.environ.get('MAX_SLIDES', '200'))
+MAX_IMAGES = int(os.environ.get('MAX_IMAGES', '200'))
+MAX_CHART_POINTS = int(os.environ.get('MAX_CHART_POINTS', '50000'))
+
+# Cost units one worker process renders at once, and how much may wait for them
+ADMISSION_BUDGET = float(os.environ.get('ADMISSION_BUDGET', '400'))
+ADMISSION_QUEUE_BUDGET = float(os.environ.get('ADMISSION_QUEUE_BUDGET', str(ADMISSION_BUDGET * 2)))
+ADMISSION_TIMEOUT = float(os.environ.get('ADMISSION_TIMEOUT', '10'))
+# After waiting this long a request reserves budget so cheaper ones stop overtaking it
+STARVATION_AGE = float(os.environ.get('ADMISSION_STARVATION_AGE', str(ADMISSION_TIMEOUT / 2)))
+
+# Relative cost weights, roughly proportional to render time
+COST_BASE = 5
+COST_SLIDE = 3
+COST_ITEM = 0.5
+COST_IMAGE = 8
+COST_CHART = 15
+COST_CHART_POINT = 0.02
+
+_LIST_FIELDS = ('items', 'paragraphs', 'milestones', 'steps', 'members', 'stats', 'contact_details')
+_IMAGE_SLIDES = ('timeline', 'contact_info', 'image_text_split')
+
+
+class TooLarge(Exception):
+    """The request is over a hard limit and will never be admitted."""
+
+    status_code = 413
+
+
+class Overloaded(Exception):
+    """Load shed: the wait queue is full or the request waited too long."""
+
+    status_code = 429
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_cost(data):
+    """Estimate render cost of a create-presentation payload from its shape."""
+    slides = data.get('slides', [])
+    slide_count = 1 + bool(data.get('sections')) + len(slides)
+    items = len(data.get('sections') or [])
+    images = 0
+    charts = 0
+    chart_points = 0
+
+    for slide_data in slides:
+        slide_type = slide_data.get('type')
+        for field in _LIST_FIELDS:
+            items += len(slide_data.get(field) or [])
+        for side in ('left_side', 'right_side', 'middle_side'):
+            items += len((slide_data.get(side) or {}).get('items', []))
+        if slide_type in _IMAGE_SLIDES and (slide_data.get('image_url') or slide_data.get('image_base64')):
+            images += 1
+        elif slide_type == 'team':
+            images += sum(1 for m in slide_data.get('members', []) if m.get('image_url') or m.get('image_base64'))
+        elif slide_type == 'chart':
+            charts += 1
+            for series in (slide_data.get('chart_data') or {}).get('series', []):
+                chart_points += len(series.get('values', []))
+
+    if slide_count > MAX_SLIDES:
+        raise TooLarge(f"Presentation has {slide_count} slides, limit is {MAX_SLIDES}")
+    if images > MAX_IMAGES:
+        raise TooLarge(f"Presentation has {images} images, limit is {MAX_IMAGES}")
+    if chart_points > MAX_CHART_POINTS:
+        raise TooLarge(f"Presentation has {chart_points} chart points, limit is {MAX_CHART_POINTS}")
+
+    return (COST_BASE + slide_count * COST_SLIDE + items * COST_ITEM + images * COST_IMAGE
+            + charts * COST_CHART + chart_points * COST_CHART_POINT)
+
+
+class AdmissionController:
+    """
+    Bounded render concurrency measured in cost units rather than requests.
+    A waiting request is admitted as soon as its cost fits the free budget, so
+    cheap decks slip past an expensive one that is still waiting for room.
+    Once a request has waited STARVATION_AGE its cost is held back from
+    newcomers so it cannot starve either.
+    """
+
+    def __init__(self, budget=ADMISSION_BUDGET, queue_budget=ADMISSION_QUEUE_BUDGET,
+                 timeout=ADMISSION_TIMEOUT, starvation_age=STARVATION_AGE):
+        self.budget = budget
+        self.queue_budget = queue_budget
+        self.timeout = timeout
+        self.starvation_age = starvation_age
+        self.in_use = 0.0
+        self.waiting = []  # [(enqueued_at, cost)], oldest first
+        self.seconds_per_unit = 0.005
+        self._cond = threading.Condition()
+
+    def _may_run(self, entry, now):
+        _, cost = entry
+        free = self.budget - self.in_use
+        if cost > free:
+            return False
+        oldest = self.waiting[0] if self.waiting else None
+        if oldest is None or oldest is entry or now - oldest[0] < self.starvation_age:
+            return True
+        return cost <= free - oldest[1]
+
+    def retry_after(self, cost=0):
+        backlog = sum(c for _, c in self.waiting) + self.in_use + cost
+        return min(max(math.ceil(backlog * self.seconds_per_unit), 1), 60)
+
+    @contextmanager
+    def admit(self, cost):
+        # A request costlier than the whole budget still runs, alone
+        cost = min(cost, self.budget)
+        entry = (time.monotonic(), cost)
+        with self._cond:
+            queued = sum(c for _, c in self.waiting)
+            if not self._may_run(entry, entry[0]):
+                if queued + cost > self.queue_budget:
+                    metrics.inc('admission_shed_total', reason='queue_full')
+                    raise Overloaded('Server busy, render queue is full', self.retry_after(cost))
+                self.waiting.append(entry)
+                metrics.set_gauge('admission_queued_cost', queued + cost)
+                deadline = entry[0] + self.timeout
+                try:
+                    while not self._may_run(entry, time.monotonic()):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            metrics.inc('admission_shed_total', reason='timeout')
+                            raise Overloaded('Server busy, timed out waiting to render', self.retry_after())
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting.remove(entry)
+                    self._cond.notify_all()  # a reservation may have been lifted
+                    metrics.set_gauge('admission_queued_cost', sum(c for _, c in self.waiting))
+                metrics.observe('admission_wait_seconds', time.monotonic() - entry[0])
+            self.in_use += cost
+            metrics.set_gauge('admission_in_use_cost', self.in_use)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            with self._cond:
+                self.in_use -= cost
+                self.seconds_per_unit = 0.8 * self.seconds_per_unit + 0.2 * (elapsed / max(cost, 1))
+                metrics.set_gauge('admission_in_use_cost', self.in_use)
+                self._cond.notify_all()
+
+
+controller = AdmissionController()
@@ -1,13 +1,62 @@
-from flask import Flask, request, send_file, jsonify
+from flask import Flask, Response, request, send_file, jsonify
 from flask_cors import CORS
-from corporate_template import CorporatePresentation
+from werkzeug.exceptions import HTTPException, RequestEntityTooLarge
+from werkzeug.wsgi import FileWrapper
+from render import render_presentation, render_to_store
+from memory_guard import MemoryLimitExceeded
+import admission
+import deck_append
+import deck_merge
+import deck_store
+import file_media
+import images
+import layout_dry_run
+import mail_merge
+import memory_guard
+import metrics
+import previews
+import profiling
+import singleflight
+import slide_library
+import themes
 import json
 import os
+import tempfile
 from datetime import datetime
 import io
 
 app = Flask(__name__)
 CORS(app)  # Allow requests from Base44
+app.config['MAX_CONTENT_LENGTH'] = int(float(os.environ.get('MAX_PAYLOAD_MB', '20')) * 1024 * 1024)
+
+def send_deck(deck_id, download_name):
+    """
+    Response streaming a stored deck from disk, so the bytes don't stay in
+    memory while a slow client downloads them. GET/HEAD get ETag (the deck
+    id), If-None-Match and Range handling; werkzeug would read a range
+    through Python, so it goes out as a DeckRange that gunicorn can
+    sendfile() like a whole file.
+    """
+    path = deck_store.stored_path(deck_id)
+    response = send_file(
+        path,
+        as_attachment=True,
+        download_name=download_name,
+        mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation',
+        etag=deck_id,
+        conditional=True,
+    )
+    if response.status_code == 206:
+        response.response.close()
+        start, stop = response.content_range.start, response.content_range.stop
+        wrapper = request.environ.get('wsgi.file_wrapper', FileWrapper)
+        response.response = wrapper(deck_store.DeckRange(path, start, stop - start))
+    return response
+
+@app.errorhandler(RequestEntityTooLarge)
+def payload_too_large(e):
+    limit_mb = app.config['MAX_CONTENT_LENGTH'] / (1024 * 1024)
+    return jsonify({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}), 413
 
 @app.route('/create-presentation', methods=['POST'])
 def create_presentation():
@@ -16,6 +65,7 @@ def create_presentation():
     {
         "title": "Q4 Review",
         "subtitle": "Business Update 2026",
+        "theme": "waldom",
         "sections": ["Revenue", "Growth", "Plans"],
         "slides": [
             {
@@ -38,140 +88,67 @@ def create_presentation():
     """
     try:
         data = request.json
+
+        # Opt-in profiling (admin only): X-Profile / ?profile= pstats|collapsed
+        try:
+            profile_mode = profiling.parse_mode(request.headers.get('X-Profile') or request.args.get('profile'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if profile_mode and not profiling.is_admin(request.headers.get('X-Admin-Token')):
+            return jsonify({'error': 'Profiling requires an admin token'}), 403
+
+        themes.get_theme(data.get('theme'))  # unknown theme ids fail fast with 400
+        slide_library.check(data)
+        file_media.check(data)
+
+        profile_id = None
+        shared = False
+        cost = admission.estimate_cost(data)
+        if profile_mode:
+            with admission.controller.admit(cost), memory_guard.RequestMemory():
+                fetched = images.fetch_images(data)
+                pptx_io, profile = profiling.profile_call(profile_mode, render_presentation, data, fetched)
+            profile_id = profiling.new_profile_id(request.headers.get('X-Request-Id'))
+            profiling.save_profile(profile_id, profile_mode, profile)
+            deck_id = deck_store.save(pptx_io.getvalue())
+        elif file_media.referenced(data):
+            # Large local media: rendered to disk, never coalesced (singleflight shares decks as bytes)
+            with admission.controller.admit(cost), memory_guard.RequestMemory():
+                deck_id = render_to_store(data, images.fetch_images(data))
+        else:
+            def render():
+                with admission.controller.admit(cost), memory_guard.RequestMemory():
+                    return render_presentation(data, images.fetch_images(data)).getvalue()
+
+            # Identical requests in flight on this host render once
+            blob, shared = singleflight.do(data, render)
+            deck_id = deck_store.save(blob)
         
-        # Create presentation
-        deck = CorporatePresentation()
-        
-        slide_counter = 1
-        
-        # Add title slide
-        deck.add_title_slide(
-            title=data.get('title', 'Presentation'),
-            subtitle=data.get('subtitle', ''),
-            slide_number=slide_counter
-        )
-        slide_counter += 1
-        
-        # Add table of contents if sections provided
-        if 'sections' in data and data['sections']:
-            deck.add_table_of_contents(
-                sections=data['sections'],
-                slide_number=slide_counter
-            )
-            slide_counter += 1
-        
-        # Add content slides
-        for slide_data in data.get('slides', []):
-            slide_type = slide_data.get('type')
-            slide_number = slide_data.get('slide_number', slide_counter)
-            
-            if slide_type == 'content_with_icons':
-                deck.add_content_with_icons_slide(
-                    title=slide_data.get('title', ''),
-                    items=slide_data.get('items', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'split':
-                deck.add_split_slide(
-                    title=slide_data.get('title', ''),
-                    paragraphs=slide_data.get('paragraphs', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'market_opportunities':
-                deck.add_market_opportunities_slide(
-                    title=slide_data.get('title', ''),
-                    items=slide_data.get('items', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'timeline':
-                deck.add_timeline_slide(
-                    title=slide_data.get('title', ''),
-                    image_url=slide_data.get('image_url', ''),
-                    milestones=slide_data.get('milestones', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'comparison':
-                deck.add_comparison_slide(
-                    title=slide_data.get('title', ''),
-                    left_side=slide_data.get('left_side', {}),
-                    right_side=slide_data.get('right_side', {}),
-                    middle_side=slide_data.get('middle_side'),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'process_steps':
-                deck.add_process_steps_slide(
-                    title=slide_data.get('title', ''),
-                    steps=slide_data.get('steps', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'team':
-                deck.add_team_slide(
-                    title=slide_data.get('title', ''),
-                    members=slide_data.get('members', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'quote':
-                deck.add_quote_slide(
-                    quote=slide_data.get('quote', ''),
-                    author=slide_data.get('author', ''),
-                    role=slide_data.get('role', ''),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'stats':
-                deck.add_stats_slide(
-                    title=slide_data.get('title', ''),
-                    stats=slide_data.get('stats', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'contact_info':
-                deck.add_contact_info_slide(
-                    title=slide_data.get('title', ''),
-                    image_url=slide_data.get('image_url', ''),
-                    contact_details=slide_data.get('contact_details', []),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'image_text_split':
-                deck.add_image_text_split_slide(
-                    title=slide_data.get('title', ''),
-                    image_url=slide_data.get('image_url', ''),
-                    content=slide_data.get('content', {}),
-                    image_position=slide_data.get('image_position', 'left'),
-                    slide_number=slide_number
-                )
-            
-            elif slide_type == 'chart':
-                deck.add_chart_slide(
-                    title=slide_data.get('title', ''),
-                    chart_type=slide_data.get('chart_type', 'line'),
-                    chart_data=slide_data.get('chart_data', {}),
-                    slide_number=slide_number
-                )
-            
-            slide_counter += 1
-        
-        # Save to memory instead of disk (better for serverless)
-        pptx_io = io.BytesIO()
-        deck.save(pptx_io)
-        pptx_io.seek(0)
-        
-        # Return the file
-        return send_file(
-            pptx_io,
-            as_attachment=True,
-            download_name=f"{data.get('title', 'presentation').replace(' ', '_')}.pptx",
-            mimetype='application/vnd.openxmlformats-officedocument.presentationml.presentation'
-        )
+        # Return the file from the deck store; saves are deterministic, so its id is a strong ETag
+        response = send_deck(deck_id, f"{data.get('title', 'presentation').replace(' ', '_')}.pptx")
+        response.headers['X-Deck-Id'] = deck_id
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+        if shared:
+            response.headers['X-Coalesced'] = '1'
+        return response
     
+    except HTTPException:
+        raise  # answered by the app's error handlers
+
+    except (themes.UnknownTheme, slide_library.UnknownSlide, file_media.MediaRefused) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except admission.TooLarge as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    except admission.Overloaded as e:
+        return jsonify({'error': str(e)}), e.status_code, {'Retry-After': str(e.retry_after)}
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return jsonify({'error': str(e)}), e.status_code
+
     except Exception as e:
         import traceback
         error_trace = traceback.format_exc()
@@ -184,6 +161,280 @@ def generate_presentation():
     """Alias for create-presentation endpoint"""
     return create_presentation()
 
+@app.route('/layout', methods=['POST'])
+def layout():
+    """
+    Dry run of create-presentation: same JSON, but returns per-slide shape
+    boxes (inches), chosen font sizes, overflow/truncation warnings and the
+    estimated render cost instead of a .pptx. Cheap enough to call per keystroke.
+    """
+    try:
+        data = request.json
+        themes.get_theme(data.get('theme'))
+        return jsonify(layout_dry_run.dry_run(data))
+
+    except HTTPException:
+        raise  # answered by the app's error handlers
+
+    except (themes.UnknownTheme, slide_library.UnknownSlide) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except admission.TooLarge as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return jsonify({'error': str(e), 'trace': error_trace}), 500
+
+@app.route('/preview', methods=['POST'])
+def preview():
+    """
+    Slide previews for a create-presentation payload, drawn from the layout
+    geometry without building a .pptx. ?format=html (default, one page),
+    json ({"slides": [svg, ...]}) or svg with ?slide=<number>.
+    """
+    try:
+        data = request.json
+        themes.get_theme(data.get('theme'))
+        body, content_type = previews.preview(data, request.args.get('format', 'html'), request.args.get('slide'))
+        return Response(body, content_type=content_type)
+
+    except HTTPException:
+        raise  # answered by the app's error handlers
+
+    except (themes.UnknownTheme, slide_library.UnknownSlide, previews.PreviewError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except admission.TooLarge as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return jsonify({'error': str(e), 'trace': error_trace}), 500
+
+@app.route('/merge-presentations', methods=['POST'])
+def merge_presentations():
+    """
+    Mail merge: one deck per row, returned as a zip. Expects JSON like:
+    {
+        "deck": {"title": "Welcome {{name}}", "slides": [...]},
+        "rows": [{"name": "Ada"}, {"name": "Grace"}],
+        "rows_format": "json"
+    }
+    rows may also be CSV or JSONL text (rows_format "csv" / "jsonl").
+    """
+    try:
+        data = request.json
+        spec = data.get('deck') or {}
+        rows = mail_merge.load_rows(data.get('rows') or [], data.get('rows_format'))
+        if not mail_merge.has_fields(spec.get('theme')):
+            themes.get_theme(spec.get('theme'))
+        slide_library.check(spec)
+        file_media.check(spec)
+
+        cost = mail_merge.estimate_cost(spec, rows)
+        out = tempfile.TemporaryFile()
+        with admission.controller.admit(cost), memory_guard.RequestMemory():
+            count = mail_merge.write_zip(spec, rows, out)
+        out.seek(0)
+
+        response = send_file(
+            out,
+            as_attachment=True,
+            download_name='presentations.zip',
+            mimetype='application/zip'
+        )
+        response.headers['X-Deck-Count'] = str(count)
+        return response
+
+    except HTTPException:
+        raise  # answered by the app's error handlers
+
+    except (mail_merge.MergeError, themes.UnknownTheme, slide_library.UnknownSlide,
+            file_media.MediaRefused) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except admission.TooLarge as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    except admission.Overloaded as e:
+        return jsonify({'error': str(e)}), e.status_code, {'Retry-After': str(e.retry_after)}
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return jsonify({'error': str(e)}), e.status_code
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return jsonify({'error': str(e), 'trace': error_trace}), 500
+
+@app.route('/append-slides', methods=['POST'])
+def append_slides():
+    """
+    Add slides to an existing deck without re-rendering it. Either multipart
+    with the .pptx as file "deck" and the JSON below as form field "data", or
+    JSON naming a deck this API returned earlier:
+    {"deck_id": "<X-Deck-Id>", "theme": "waldom", "slides": [...]}
+    The new deck's id comes back as X-Deck-Id.
+    """
+    try:
+        if request.files:
+            upload = request.files.get('deck')
+            if upload is None:
+                return jsonify({'error': 'Missing file field "deck"'}), 400
+            blob = upload.read()
+            data = json.loads(request.form.get('data') or '{}')
+        else:
+            data = request.json
+            blob = deck_store.load(data.get('deck_id'))
+
+        themes.get_theme(data.get('theme'))
+        slide_library.check(data)
+        file_media.check(data)
+
+        cost = admission.estimate_cost(data)
+        with admission.controller.admit(cost), memory_guard.RequestMemory():
+            fetched = images.fetch_images(data)
+            result = deck_append.append_slides(blob, data, fetched)
+        deck_id = deck_store.save(result)
+
+        response = send_deck(deck_id, (upload.filename if request.files else None) or 'presentation.pptx')
+        response.headers['X-Deck-Id'] = deck_id
+        return response
+
+    except HTTPException:
+        raise  # answered by the app's error handlers
+
+    except (json.JSONDecodeError, deck_append.InvalidDeck, deck_store.UnknownDeck,
+            themes.UnknownTheme, slide_library.UnknownSlide, file_media.MediaRefused) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except admission.TooLarge as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    except admission.Overloaded as e:
+        return jsonify({'error': str(e)}), e.status_code, {'Retry-After': str(e.retry_after)}
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return jsonify({'error': str(e)}), e.status_code
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return jsonify({'error': str(e), 'trace': error_trace}), 500
+
+@app.route('/merge-decks', methods=['POST'])
+def merge_decks():
+    """
+    Concatenate decks into one. Either multipart with the .pptx files as
+    repeated file field "decks", or JSON naming stored decks:
+    {"deck_ids": ["<X-Deck-Id>", ...]}
+    The merged deck's id comes back as X-Deck-Id.
+    """
+    try:
+        if request.files:
+            blobs = [upload.read() for upload in request.files.getlist('decks')]
+        else:
+            blobs = [deck_store.load(deck_id) for deck_id in request.json.get('deck_ids') or []]
+
+        packages = deck_merge.open_decks(blobs)
+        cost = deck_merge.estimate_cost(packages)
+        with admission.controller.admit(cost), memory_guard.RequestMemory():
+            result = deck_merge.merge_decks(packages)
+        deck_id = deck_store.save(result)
+
+        response = send_deck(deck_id, 'merged.pptx')
+        response.headers['X-Deck-Id'] = deck_id
+        return response
+
+    except HTTPException:
+        raise  # answered by the app's error handlers
+
+    except (deck_merge.InvalidDeck, deck_store.UnknownDeck) as e:
+        return jsonify({'error': str(e)}), 400
+
+    except admission.TooLarge as e:
+        return jsonify({'error': str(e)}), e.status_code
+
+    except admission.Overloaded as e:
+        return jsonify({'error': str(e)}), e.status_code, {'Retry-After': str(e.retry_after)}
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return jsonify({'error': str(e)}), e.status_code
+
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return jsonify({'error': str(e), 'trace': error_trace}), 500
+
+@app.route('/decks/<deck_id>', methods=['GET'])
+def get_deck(deck_id):
+    """
+    Download a stored deck by id (the X-Deck-Id of the response that made
+    it). Supports Range and If-Range for resuming, and If-None-Match.
+    """
+    try:
+        return send_deck(deck_id, request.args.get('filename') or 'presentation.pptx')
+    except deck_store.UnknownDeck as e:
+        return jsonify({'error': str(e)}), 404
+    except FileNotFoundError:  # swept since the lookup
+        return jsonify({'error': f'Unknown deck {deck_id!r}'}), 404
+
+@app.route('/slides', methods=['POST'])
+def register_slide():
+    """
+    Render a slide once and store it for reuse by id. Expects JSON like:
+    {"id": "about-us", "theme": "waldom", "slide": {"type": "team", ...}}
+    Decks then use {"type": "library", "id": "about-us"} in their slides.
+    """
+    try:
+        data = request.json
+        registered = slide_library.register(data.get('id'), data.get('slide') or {}, data.get('theme'))
+        return jsonify(registered), 201
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/slides', methods=['GET'])
+def list_slides():
+    """Registered library slides"""
+    return jsonify({'slides': slide_library.list_slides()})
+
+@app.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """Download a saved request profile (admin only). ?format=text summarizes pstats."""
+    if not profiling.is_admin(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Profiling requires an admin token'}), 403
+    mode, path = profiling.find_profile(profile_id)
+    if not path:
+        return jsonify({'error': f'Profile {profile_id} not found'}), 404
+    if mode == 'pstats' and request.args.get('format') == 'text':
+        return profiling.summarize(path), 200, {'Content-Type': 'text/plain; charset=utf-8'}
+    return send_file(path, as_attachment=True, download_name=os.path.basename(path))
+
+@app.route('/themes', methods=['GET'])
+def list_themes():
+    """Registered brand themes"""
+    return jsonify({'default': themes.DEFAULT_THEME, 'themes': [
+        {'id': theme.id, 'name': theme.name, 'font': theme.font_name, 'colors': theme.hex}
+        for theme in themes.all_themes()
+    ]})
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics for this worker process"""
+    memory_guard.over_soft_limit()  # refresh worker_rss_bytes
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4'}
+
 @app.route('/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -197,6 +448,16 @@ def home():
         'endpoints': {
             '/create-presentation': 'POST - Create presentation (original endpoint)',
             '/generate-presentation': 'POST - Create presentation (alias)',
+            '/layout': 'POST - Dry run: slide geometry, warnings and cost, no file',
+            '/preview': 'POST - SVG/HTML slide previews (?format=html|json|svg&slide=N)',
+            '/merge-presentations': 'POST - One presentation per data row, as a zip',
+            '/append-slides': 'POST - Add slides to an uploaded or stored presentation',
+            '/merge-decks': 'POST - Concatenate uploaded or stored presentations',
+            '/decks/<id>': 'GET - Download a stored presentation (Range/resume supported)',
+            '/slides': 'GET - Library slides, POST - Register a library slide',
+            '/profiles/<id>': 'GET - Download a request profile (admin)',
+            '/themes': 'GET - Available brand themes',
+            '/metrics': 'GET - Prometheus metrics',
             '/health': 'GET - Health check'
         }
     })
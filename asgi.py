@@ -0,0 +1,595 @@
+"""
+Async entry point with the same endpoints and JSON schema as api.py.
+
+    uvicorn asgi:app --host 0.0.0.0 --port $PORT
+
+Image downloads run on the event loop, so requests waiting on slow image
+hosts multiplex on one process; CPU-bound rendering goes to a process pool
+(RENDER_EXECUTOR=thread keeps it in-process on a thread pool instead).
+"""
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import traceback
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import quote
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+import admission
+import deck_append
+import deck_merge
+import deck_store
+import file_media
+import images
+import layout_dry_run
+import mail_merge
+import memory_guard
+import metrics
+import previews
+import profiling
+import singleflight
+import slide_library
+import themes
+from memory_guard import MemoryLimitExceeded
+from render import render_presentation, render_to_store
+
+RENDER_EXECUTOR = os.environ.get('RENDER_EXECUTOR', 'process')
+RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS', str(os.cpu_count() or 2)))
+MAX_PAYLOAD_BYTES = int(float(os.environ.get('MAX_PAYLOAD_MB', '20')) * 1024 * 1024)
+
+PPTX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.presentationml.presentation'
+
+
+def _render_job(data, fetched, profile_mode=None):
+    """Runs in the render pool: returns (pptx bytes, profile bytes or None)."""
+    with memory_guard.RequestMemory():
+        if profile_mode:
+            pptx_io, profile = profiling.profile_call(profile_mode, render_presentation, data, fetched)
+        else:
+            pptx_io, profile = render_presentation(data, fetched), None
+    return pptx_io.getvalue(), profile
+
+
+def _render_to_store_job(data, fetched):
+    """Runs in the render pool: render_to_store, returns the deck id."""
+    with memory_guard.RequestMemory():
+        return render_to_store(data, fetched)
+
+
+def _reporting(job, *args):
+    """
+    Runs in a render pool process: (job's result, the metrics recorded in
+    this process since its last job). A failed job carries them on its
+    exception as recorded_metrics.
+    """
+    try:
+        result = job(*args)
+    except BaseException as e:
+        e.recorded_metrics = metrics.drain()
+        raise
+    return result, metrics.drain()
+
+
+async def _in_pool(request, job, *args):
+    """
+    job(*args) on the render pool. Metrics recorded in a pool process would
+    never reach /metrics, so they come back with the result and are merged
+    into this process's.
+    """
+    loop = asyncio.get_running_loop()
+    pool = request.app.state.render_pool
+    if not isinstance(pool, ProcessPoolExecutor):
+        return await loop.run_in_executor(pool, job, *args)
+    try:
+        result, recorded = await loop.run_in_executor(pool, _reporting, job, *args)
+    except Exception as e:
+        if hasattr(e, 'recorded_metrics'):
+            metrics.merge(e.recorded_metrics)
+            del e.recorded_metrics
+        raise
+    metrics.merge(recorded)
+    return result
+
+
+def _warm_render_worker():
+    import render  # noqa: F401  (import python-pptx and friends once per pool process)
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if RENDER_EXECUTOR == 'thread':
+        app.state.render_pool = ThreadPoolExecutor(max_workers=RENDER_WORKERS)
+    else:
+        # spawn, not fork: the server process already runs an event loop and threads
+        app.state.render_pool = ProcessPoolExecutor(
+            max_workers=RENDER_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_warm_render_worker,
+        )
+    app.state.http = images.async_client()
+    try:
+        yield
+    finally:
+        await app.state.http.aclose()
+        app.state.render_pool.shutdown(wait=False, cancel_futures=True)
+
+
+@asynccontextmanager
+async def _admitted(cost):
+    """
+    admission.controller.admit for the event loop. The controller blocks on a
+    threading.Condition, so admission is waited for off the loop; if this task
+    is cancelled meanwhile, the budget is released once the wait reserves it.
+    """
+    ticket = admission.controller.admit(cost)
+    entering = asyncio.ensure_future(asyncio.to_thread(ticket.__enter__))
+    try:
+        await asyncio.shield(entering)
+    except asyncio.CancelledError:
+        def release(future):
+            if not future.cancelled() and future.exception() is None:
+                ticket.__exit__(None, None, None)
+        entering.add_done_callback(release)
+        raise
+    try:
+        yield
+    finally:
+        ticket.__exit__(None, None, None)
+
+
+def _attachment(filename):
+    try:
+        filename.encode('ascii')
+        return f'attachment; filename="{filename}"'
+    except UnicodeEncodeError:
+        return f"attachment; filename*=UTF-8''{quote(filename)}"
+
+
+async def _deck_response(request, deck_id, filename, headers=None):
+    """
+    Same as api.send_deck: a stored deck streamed from disk with Range and
+    If-Range support (FileResponse), or handed to the server to send
+    itself where it offers the pathsend extension. If-None-Match is
+    answered here, since FileResponse doesn't.
+    """
+    path = await asyncio.to_thread(deck_store.stored_path, deck_id)
+    etag = f'"{deck_id}"'
+    if request.method in ('GET', 'HEAD'):
+        if_none_match = request.headers.get('if-none-match', '')
+        if etag in [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')] or if_none_match.strip() == '*':
+            return Response(status_code=304, headers={'ETag': etag})
+    headers = {'Content-Disposition': _attachment(filename), 'ETag': etag, **(headers or {})}
+    return FileResponse(path, media_type=PPTX_MIMETYPE, headers=headers)
+
+
+async def create_presentation(request):
+    """Same contract as api.create_presentation."""
+    try:
+        body = await request.body()
+        if len(body) > MAX_PAYLOAD_BYTES:
+            limit_mb = MAX_PAYLOAD_BYTES / (1024 * 1024)
+            return JSONResponse({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}, status_code=413)
+        data = json.loads(body)
+
+        try:
+            profile_mode = profiling.parse_mode(request.headers.get('X-Profile') or request.query_params.get('profile'))
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+        if profile_mode and not profiling.is_admin(request.headers.get('X-Admin-Token')):
+            return JSONResponse({'error': 'Profiling requires an admin token'}, status_code=403)
+
+        themes.get_theme(data.get('theme'))  # unknown theme ids fail fast with 400
+        slide_library.check(data)
+        file_media.check(data)
+
+        cost = admission.estimate_cost(data)
+        profile = None
+        # Large local media: rendered to disk, never coalesced (singleflight shares decks as bytes)
+        to_store = not profile_mode and await asyncio.to_thread(file_media.referenced, data)
+
+        async def render():
+            nonlocal profile
+            # Waiting on image hosts is cheap here, so only the render counts against admission
+            fetched = await images.fetch_images_async(data, request.app.state.http)
+
+            async with _admitted(cost):
+                if to_store:
+                    return await _in_pool(request, _render_to_store_job, data, fetched)
+                result, profile = await _in_pool(request, _render_job, data, fetched, profile_mode)
+            return result
+
+        if profile_mode or to_store:
+            result, shared = await render(), False
+        else:
+            # Identical requests in flight on this host render once
+            result, shared = await singleflight.do_async(data, render)
+
+        # Served from the deck store; saves are deterministic, so its id is a strong ETag
+        deck_id = result if to_store else await asyncio.to_thread(deck_store.save, result)
+        headers = {'X-Deck-Id': deck_id}
+        if shared:
+            headers['X-Coalesced'] = '1'
+        if profile_mode:
+            profile_id = profiling.new_profile_id(request.headers.get('X-Request-Id'))
+            await asyncio.to_thread(profiling.save_profile, profile_id, profile_mode, profile)
+            headers['X-Profile-Id'] = profile_id
+        filename = f"{data.get('title', 'presentation').replace(' ', '_')}.pptx"
+        return await _deck_response(request, deck_id, filename, headers)
+
+    except (themes.UnknownTheme, slide_library.UnknownSlide, file_media.MediaRefused) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    except admission.TooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except admission.Overloaded as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code, headers={'Retry-After': str(e.retry_after)})
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return JSONResponse({'error': str(e), 'trace': error_trace}, status_code=500)
+
+
+async def layout(request):
+    """Same contract as api.layout."""
+    try:
+        body = await request.body()
+        if len(body) > MAX_PAYLOAD_BYTES:
+            limit_mb = MAX_PAYLOAD_BYTES / (1024 * 1024)
+            return JSONResponse({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}, status_code=413)
+        data = json.loads(body)
+        themes.get_theme(data.get('theme'))
+        # A few ms of pure Python: cheaper in a thread than a trip to the render pool
+        return JSONResponse(await asyncio.to_thread(layout_dry_run.dry_run, data))
+
+    except (themes.UnknownTheme, slide_library.UnknownSlide) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    except admission.TooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return JSONResponse({'error': str(e), 'trace': error_trace}, status_code=500)
+
+
+async def preview(request):
+    """Same contract as api.preview."""
+    try:
+        body = await request.body()
+        if len(body) > MAX_PAYLOAD_BYTES:
+            limit_mb = MAX_PAYLOAD_BYTES / (1024 * 1024)
+            return JSONResponse({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}, status_code=413)
+        data = json.loads(body)
+        themes.get_theme(data.get('theme'))
+        content, content_type = await asyncio.to_thread(
+            previews.preview, data, request.query_params.get('format', 'html'), request.query_params.get('slide')
+        )
+        return Response(content, media_type=content_type)
+
+    except (themes.UnknownTheme, slide_library.UnknownSlide, previews.PreviewError) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    except admission.TooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return JSONResponse({'error': str(e), 'trace': error_trace}, status_code=500)
+
+
+def _stream_file(f, chunk_size=1024 * 1024):
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+async def merge_presentations(request):
+    """Same contract as api.merge_presentations; rows render in chunks on the render pool."""
+    try:
+        body = await request.body()
+        if len(body) > MAX_PAYLOAD_BYTES:
+            limit_mb = MAX_PAYLOAD_BYTES / (1024 * 1024)
+            return JSONResponse({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}, status_code=413)
+        data = json.loads(body)
+        spec = data.get('deck') or {}
+        rows = mail_merge.load_rows(data.get('rows') or [], data.get('rows_format'))
+        if not mail_merge.has_fields(spec.get('theme')):
+            themes.get_theme(spec.get('theme'))
+        slide_library.check(spec)
+        file_media.check(spec)
+        cost = mail_merge.estimate_cost(spec, rows)
+
+        out = tempfile.TemporaryFile()
+        futures = []
+        try:
+            async with _admitted(cost):
+                static_blob = await _in_pool(request, mail_merge.static_deck, spec)
+                futures = [asyncio.ensure_future(_in_pool(request, mail_merge.render_chunk, spec, static_blob, start, chunk))
+                           for start, chunk in mail_merge.chunks(rows)]
+                width = mail_merge.filename_width(rows)
+                with zipfile.ZipFile(out, 'w', zipfile.ZIP_STORED) as z:
+                    for future in futures:
+                        for index, filled, blob in await future:
+                            z.writestr(mail_merge.deck_filename(index, filled, width), blob)
+        except BaseException:
+            out.close()
+            for future in futures:
+                future.cancel()
+            raise
+
+        out.seek(0)
+        headers = {'Content-Disposition': _attachment('presentations.zip'), 'X-Deck-Count': str(len(rows))}
+        return StreamingResponse(_stream_file(out), media_type='application/zip', headers=headers)
+
+    except (mail_merge.MergeError, themes.UnknownTheme, slide_library.UnknownSlide,
+            file_media.MediaRefused) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    except admission.TooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except admission.Overloaded as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code, headers={'Retry-After': str(e.retry_after)})
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return JSONResponse({'error': str(e), 'trace': error_trace}, status_code=500)
+
+
+def _append_job(blob, data, fetched):
+    """Runs in the render pool: (appended pptx bytes, deck id)."""
+    with memory_guard.RequestMemory():
+        result = deck_append.append_slides(blob, data, fetched)
+    return result, deck_store.save(result)
+
+
+async def append_slides(request):
+    """Same contract as api.append_slides."""
+    try:
+        if request.headers.get('content-type', '').startswith('multipart/form-data'):
+            async with request.form(max_part_size=MAX_PAYLOAD_BYTES) as form:
+                upload = form.get('deck')
+                if upload is None or isinstance(upload, str):
+                    return JSONResponse({'error': 'Missing file field "deck"'}, status_code=400)
+                if upload.size is not None and upload.size > MAX_PAYLOAD_BYTES:
+                    limit_mb = MAX_PAYLOAD_BYTES / (1024 * 1024)
+                    return JSONResponse({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}, status_code=413)
+                blob = await upload.read()
+                filename = upload.filename
+                data = json.loads(form.get('data') or '{}')
+        else:
+            data = await request.json()
+            blob = await asyncio.to_thread(deck_store.load, data.get('deck_id'))
+            filename = None
+
+        themes.get_theme(data.get('theme'))
+        slide_library.check(data)
+        file_media.check(data)
+        cost = admission.estimate_cost(data)
+        fetched = await images.fetch_images_async(data, request.app.state.http)
+
+        async with _admitted(cost):
+            result, deck_id = await _in_pool(request, _append_job, blob, data, fetched)
+
+        return await _deck_response(request, deck_id, filename or 'presentation.pptx', {'X-Deck-Id': deck_id})
+
+    except (json.JSONDecodeError, deck_append.InvalidDeck, deck_store.UnknownDeck,
+            themes.UnknownTheme, slide_library.UnknownSlide, file_media.MediaRefused) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    except admission.TooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except admission.Overloaded as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code, headers={'Retry-After': str(e.retry_after)})
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return JSONResponse({'error': str(e), 'trace': error_trace}, status_code=500)
+
+
+def _merge_decks_job(blobs):
+    """Runs in the render pool: (merged pptx bytes, deck id)."""
+    with memory_guard.RequestMemory():
+        result = deck_merge.merge_decks(deck_merge.open_decks(blobs))
+    return result, deck_store.save(result)
+
+
+def _merge_cost(blobs):
+    """Admission cost of merging blobs. Reads each deck's zip directory and presentation part only."""
+    return deck_merge.estimate_cost(deck_merge.open_decks(blobs))
+
+
+async def _merge_blobs(request):
+    """
+    The decks of a merge request, read one at a time; None as soon as they
+    pass MAX_PAYLOAD_BYTES, so an oversized upload is never read whole.
+    """
+    blobs = []
+    total = 0
+    if request.headers.get('content-type', '').startswith('multipart/form-data'):
+        if int(request.headers.get('content-length') or 0) > MAX_PAYLOAD_BYTES:
+            return None
+        async with request.form(max_part_size=MAX_PAYLOAD_BYTES) as form:
+            for upload in form.getlist('decks'):
+                if isinstance(upload, str):
+                    continue
+                if total + (upload.size or 0) > MAX_PAYLOAD_BYTES:
+                    return None
+                blobs.append(await upload.read())
+                total += len(blobs[-1])
+                if total > MAX_PAYLOAD_BYTES:
+                    return None
+    else:
+        data = await request.json()
+        for deck_id in data.get('deck_ids') or []:
+            blobs.append(await asyncio.to_thread(deck_store.load, deck_id))
+            total += len(blobs[-1])
+            if total > MAX_PAYLOAD_BYTES:
+                return None
+    return blobs
+
+
+async def merge_decks(request):
+    """Same contract as api.merge_decks."""
+    try:
+        blobs = await _merge_blobs(request)
+        if blobs is None:
+            limit_mb = MAX_PAYLOAD_BYTES / (1024 * 1024)
+            return JSONResponse({'error': f'Request body exceeds the {limit_mb:.0f} MB payload limit'}, status_code=413)
+
+        # Parsing up to MAX_PAYLOAD_MB of zips is CPU work, kept off the event loop
+        cost = await asyncio.to_thread(_merge_cost, blobs)
+        async with _admitted(cost):
+            result, deck_id = await _in_pool(request, _merge_decks_job, blobs)
+
+        return await _deck_response(request, deck_id, 'merged.pptx', {'X-Deck-Id': deck_id})
+
+    except (json.JSONDecodeError, deck_merge.InvalidDeck, deck_store.UnknownDeck) as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+    except admission.TooLarge as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except admission.Overloaded as e:
+        return JSONResponse({'error': str(e)}, status_code=e.status_code, headers={'Retry-After': str(e.retry_after)})
+
+    except MemoryLimitExceeded as e:
+        print(f"Error: {e}")
+        return JSONResponse({'error': str(e)}, status_code=e.status_code)
+
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        print(f"Error: {error_trace}")
+        return JSONResponse({'error': str(e), 'trace': error_trace}, status_code=500)
+
+
+async def get_deck(request):
+    """Same contract as api.get_deck."""
+    deck_id = request.path_params['deck_id']
+    try:
+        return await _deck_response(request, deck_id, request.query_params.get('filename') or 'presentation.pptx')
+    except deck_store.UnknownDeck as e:
+        return JSONResponse({'error': str(e)}, status_code=404)
+
+
+async def register_slide(request):
+    """Same contract as api.register_slide; the slide renders on the render pool."""
+    try:
+        data = await request.json()
+        registered = await _in_pool(request, slide_library.register, data.get('id'), data.get('slide') or {}, data.get('theme'))
+        return JSONResponse(registered, status_code=201)
+    except ValueError as e:
+        return JSONResponse({'error': str(e)}, status_code=400)
+
+
+async def list_slides(request):
+    """Registered library slides"""
+    return JSONResponse({'slides': await asyncio.to_thread(slide_library.list_slides)})
+
+
+async def get_profile(request):
+    """Download a saved request profile (admin only). ?format=text summarizes pstats."""
+    if not profiling.is_admin(request.headers.get('X-Admin-Token')):
+        return JSONResponse({'error': 'Profiling requires an admin token'}, status_code=403)
+    profile_id = request.path_params['profile_id']
+    mode, path = profiling.find_profile(profile_id)
+    if not path:
+        return JSONResponse({'error': f'Profile {profile_id} not found'}, status_code=404)
+    if mode == 'pstats' and request.query_params.get('format') == 'text':
+        return PlainTextResponse(await asyncio.to_thread(profiling.summarize, path))
+    return FileResponse(path, filename=os.path.basename(path))
+
+
+async def list_themes(request):
+    """Registered brand themes"""
+    return JSONResponse({'default': themes.DEFAULT_THEME, 'themes': [
+        {'id': theme.id, 'name': theme.name, 'font': theme.font_name, 'colors': theme.hex}
+        for theme in themes.all_themes()
+    ]})
+
+
+async def get_metrics(request):
+    """Prometheus metrics for this worker process"""
+    memory_guard.over_soft_limit()
+    return PlainTextResponse(metrics.render(), headers={'Content-Type': 'text/plain; version=0.0.4'})
+
+
+async def health(request):
+    """Health check endpoint"""
+    return JSONResponse({'status': 'ok', 'service': 'presentation-api'})
+
+
+async def home(request):
+    """Info endpoint"""
+    return JSONResponse({
+        'status': 'running',
+        'endpoints': {
+            '/create-presentation': 'POST - Create presentation (original endpoint)',
+            '/generate-presentation': 'POST - Create presentation (alias)',
+            '/layout': 'POST - Dry run: slide geometry, warnings and cost, no file',
+            '/preview': 'POST - SVG/HTML slide previews (?format=html|json|svg&slide=N)',
+            '/merge-presentations': 'POST - One presentation per data row, as a zip',
+            '/append-slides': 'POST - Add slides to an uploaded or stored presentation',
+            '/merge-decks': 'POST - Concatenate uploaded or stored presentations',
+            '/decks/<id>': 'GET - Download a stored presentation (Range/resume supported)',
+            '/slides': 'GET - Library slides, POST - Register a library slide',
+            '/profiles/<id>': 'GET - Download a request profile (admin)',
+            '/themes': 'GET - Available brand themes',
+            '/metrics': 'GET - Prometheus metrics',
+            '/health': 'GET - Health check'
+        }
+    })
+
+
+app = Starlette(
+    routes=[
+        Route('/create-presentation', create_presentation, methods=['POST']),
+        Route('/generate-presentation', create_presentation, methods=['POST']),
+        Route('/layout', layout, methods=['POST']),
+        Route('/preview', preview, methods=['POST']),
+        Route('/merge-presentations', merge_presentations, methods=['POST']),
+        Route('/append-slides', append_slides, methods=['POST']),
+        Route('/merge-decks', merge_decks, methods=['POST']),
+        Route('/decks/{deck_id}', get_deck, methods=['GET']),
+        Route('/slides', list_slides, methods=['GET']),
+        Route('/slides', register_slide, methods=['POST']),
+        Route('/profiles/{profile_id}', get_profile, methods=['GET']),
+        Route('/themes', list_themes, methods=['GET']),
+        Route('/metrics', get_metrics, methods=['GET']),
+        Route('/health', health, methods=['GET']),
+        Route('/', home, methods=['GET']),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan,
+)
@@ -0,0 +1,63 @@
+"""
+Shape id allocation on shape-heavy slides: running counter vs. python-pptx's
+default scan of every id on the slide for each added shape.
+
+    python benchmarks/shape_ids.py [repeat]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corporate_template import CorporatePresentation  # noqa: E402
+
+
+class ScanningPresentation(CorporatePresentation):
+    """CorporatePresentation with python-pptx's default id lookup."""
+
+    def _new_slide(self, layout):
+        return self.prs.slides.add_slide(layout)
+
+
+TEAM = [{'name': f'Member {i}', 'role': 'Engineer', 'image_url': ''} for i in range(10)]
+STEPS = [{'label': f'Step {i}', 'description': 'Do the thing'} for i in range(40)]
+ITEMS = [{'icon': '?', 'text': f'Item {i}'} for i in range(30)]
+
+CASES = {
+    'team, 10 members': lambda deck: deck.add_team_slide('Team', TEAM, slide_number=1),
+    'process, 40 steps': lambda deck: deck.add_process_steps_slide('Process', STEPS, slide_number=1),
+    'icon grid, 30 items': lambda deck: deck.add_content_with_icons_slide('Icons', ITEMS, slide_number=1),
+}
+
+
+def bench(cls, add, slides, repeat):
+    """Best time for building `slides` copies of one slide type, in ms per slide."""
+    best = None
+    for _ in range(repeat):
+        deck = cls()
+        started = time.perf_counter()
+        for _ in range(slides):
+            add(deck)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best / slides * 1000
+
+
+def main(repeat=5, slides=20):
+    # Team placeholders print a note per missing photo; keep the table readable
+    sys.stdout, stdout = open(os.devnull, 'w'), sys.stdout
+    try:
+        results = [(name, bench(ScanningPresentation, add, slides, repeat), bench(CorporatePresentation, add, slides, repeat))
+                   for name, add in CASES.items()]
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print(f"{'slide':<22}{'scan ms':>10}{'counter ms':>12}{'speedup':>10}")
+    for name, scan, counter in results:
+        print(f"{name:<22}{scan:>10.2f}{counter:>12.2f}{scan / counter:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
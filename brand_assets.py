@@ -0,0 +1,116 @@
+import base64
+import io
+import os
+
+from pptx.parts.image import Image
+from pptx.util import Emu, Inches
+
+
+class BrandConfigError(ValueError):
+    """A theme's brand image settings are malformed."""
+
+
+class BrandImage:
+    """
+    A brand image (logo, watermark, ...) read and validated once at startup
+    and held in memory. Every deck embeds the same bytes, so python-pptx
+    stores it as a single image part however often it is placed.
+    """
+
+    def __init__(self, blob, source='<bytes>'):
+        try:
+            image = Image.from_blob(blob)
+            self.content_type = image.content_type
+            self.size = image.size
+            self.dpi = image.dpi
+        except Exception as e:
+            raise ValueError(f"Invalid brand image {source}: {e}") from None
+        self.blob = blob
+        self.source = source
+
+    @classmethod
+    def from_path(cls, path):
+        with open(path, 'rb') as f:
+            return cls(f.read(), source=path)
+
+    @classmethod
+    def from_config(cls, config, base_dir=None):
+        """Accepts a path, or a dict with "path" or "base64"."""
+        if isinstance(config, str):
+            config = {'path': config}
+        if config.get('base64'):
+            return cls(base64.b64decode(config['base64']), source='<base64>')
+        path = config['path']
+        if base_dir and not os.path.isabs(path):
+            path = os.path.join(base_dir, path)
+        return cls.from_path(path)
+
+    def stream(self):
+        return io.BytesIO(self.blob)
+
+    def scaled_size(self, width=None, height=None):
+        """(cx, cy) in EMU, filling in a missing side from the aspect ratio."""
+        px_width, px_height = self.size
+        if width is None and height is None:
+            return Inches(px_width / self.dpi[0]), Inches(px_height / self.dpi[1])
+        if width is None:
+            return Emu(int(height * px_width / px_height)), height
+        if height is None:
+            return width, Emu(int(width * px_height / px_width))
+        return width, height
+
+
+def load_brand_image(config, base_dir=None):
+    """BrandImage for config, or None (with a note) when it can't be loaded."""
+    if not config:
+        return None
+    try:
+        return BrandImage.from_config(config, base_dir)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Note: brand image {config!r} could not be loaded ({e}). Continuing without it.")
+        return None
+
+
+class MasterImage:
+    """A brand image placed on the slide master, so it shows on every slide."""
+
+    def __init__(self, image, left, top, width=None, height=None):
+        self.image = image
+        self.left = left
+        self.top = top
+        self.width, self.height = image.scaled_size(width, height)
+
+    @classmethod
+    def from_config(cls, config, base_dir=None):
+        """A path, or {"path"|"base64": ..., "left": in, "top": in, "width": in, "height": in}"""
+        if isinstance(config, str):
+            config = {'path': config}
+        if not isinstance(config, dict):
+            raise BrandConfigError(f"Master image must be a path or an object, got {config!r}")
+        inches = {}
+        for k in ('left', 'top', 'width', 'height'):
+            value = config.get(k)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                raise BrandConfigError(f"Master image {k} must be a number of inches, got {value!r}")
+            inches[k] = Inches(value) if value is not None else None
+        image = load_brand_image(config, base_dir)
+        if image is None:
+            return None
+        return cls(image, inches['left'] or Inches(0), inches['top'] or Inches(0),
+                   inches['width'], inches['height'])
+
+
+def add_master_images(prs, master_images):
+    """Append master_images to the slide master's shape tree of prs."""
+    from pptx.oxml.shapes.picture import CT_Picture
+
+    master = prs.slide_master
+    sp_tree = master.shapes._spTree
+    next_id = max((int(i) for i in sp_tree.xpath('//@id') if i.isdigit()), default=0) + 1
+    for index, placed in enumerate(master_images):
+        _, rId = master.part.get_or_add_image_part(placed.image.stream())
+        pic = CT_Picture.new_pic(
+            next_id + index, f'Brand Image {index + 1}', '', rId,
+            placed.left, placed.top, placed.width, placed.height
+        )
+        sp_tree.insert_element_before(pic, 'p:extLst')
@@ -0,0 +1,494 @@
+"""
+Shared cache for rendered decks, slide preview fragments and fetched
+images, so instances behind a load balancer reuse each other's work.
+
+Backends (CACHE_BACKEND):
+    memory  per-process LRU (the default; nothing shared)
+    shm     this host's shared memory segment (shared_assets.py): every
+            worker reads the same copy; nothing across hosts
+    file    a directory shared by every node (CACHE_DIR, e.g. an NFS mount),
+            atomic writes, swept oldest-first to CACHE_MAX_MB
+    redis   one or more Redis-protocol servers (CACHE_REDIS_URLS, comma
+            separated); keys are spread over them on a consistent hash ring
+    none    no caching
+
+A cache is an optimization: backend errors are logged and read as misses.
+
+    python cache.py serve [--port 6390]    # Redis-protocol stand-in for local runs
+"""
+import argparse
+import bisect
+import hashlib
+import os
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+import metrics
+import shared_assets
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memory')
+CACHE_DIR = os.environ.get('CACHE_DIR', '/tmp/presentation-cache')
+CACHE_MAX_BYTES = int(float(os.environ.get('CACHE_MAX_MB', '64')) * 1024 * 1024)
+CACHE_REDIS_URLS = [url.strip() for url in os.environ.get('CACHE_REDIS_URLS', 'redis://localhost:6379/0').split(',')
+                    if url.strip()]
+CACHE_TIMEOUT = float(os.environ.get('CACHE_TIMEOUT', '0.5'))
+CACHE_PREFIX = os.environ.get('CACHE_PREFIX', 'presentation:')
+
+_SWEEP_INTERVAL = 30  # seconds between size checks of the file backend, per process
+
+
+def _name(namespace, key):
+    return f'{namespace}/{hashlib.sha256(key.encode("utf-8")).hexdigest()}'
+
+
+def _record(namespace, hit):
+    metrics.inc('cache_requests_total', namespace=namespace, result='hit' if hit else 'miss')
+
+
+class Cache:
+    """get/set of bytes by (namespace, key); values expire after ttl seconds when one is given."""
+
+    def get(self, namespace, key):
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace, keys):
+        """{key: value} for the keys that are cached."""
+        found = {}
+        for key in keys:
+            value = self._get(_name(namespace, key))
+            _record(namespace, value is not None)
+            if value is not None:
+                found[key] = value
+        return found
+
+    def set(self, namespace, key, value, ttl=None):
+        self._set(_name(namespace, key), value, ttl)
+
+    def delete(self, namespace, key):
+        self._delete(_name(namespace, key))
+
+    def _get(self, name):
+        return None
+
+    def _set(self, name, value, ttl):
+        pass
+
+    def _delete(self, name):
+        pass
+
+
+class NullCache(Cache):
+    """Caches nothing."""
+
+
+class MemoryCache(Cache):
+    """LRU in this process, bounded by the total size of the values."""
+
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # name -> (expires or None, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[0] is not None and entry[0] < time.time():
+                self._remove(name)
+                return None
+            self._entries.move_to_end(name)
+            return entry[1]
+
+    def _set(self, name, value, ttl):
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(name)
+            self._entries[name] = (time.time() + ttl if ttl else None, value)
+            self._bytes += len(value)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _delete(self, name):
+        with self._lock:
+            self._remove(name)
+
+    def _remove(self, name):
+        entry = self._entries.pop(name, None)
+        if entry is not None:
+            self._bytes -= len(entry[1])
+
+
+class SharedMemoryCache(Cache):
+    """
+    Entries in the host's shared_assets segment. Values are copied out as
+    bytes like every other backend's: callers pickle them into render pools,
+    and a memoryview into the mapping cannot be pickled.
+    """
+
+    def __init__(self):
+        self._assets = shared_assets.assets() or shared_assets.SharedAssets()
+
+    def _get(self, name):
+        value = self._assets.get(name)
+        return bytes(value) if value is not None else None
+
+    def _set(self, name, value, ttl):
+        self._assets.put(name, value, ttl)
+
+    def _delete(self, name):
+        self._assets.delete(name)
+
+
+class FileCache(Cache):
+    """
+    Files under directory, one per entry: an 8-byte expiry header then the
+    value. Writes go through a temp file and os.replace, so readers on any
+    node see whole entries; reads touch the mtime, and the sweep removes
+    expired entries, then the least recently used, down to max_bytes.
+    """
+
+    _HEADER = struct.Struct('>d')
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+    def _path(self, name):
+        namespace, digest = name.split('/')
+        return os.path.join(self.directory, namespace, digest[:2], digest)
+
+    def _get(self, name):
+        path = self._path(name)
+        try:
+            with open(path, 'rb') as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            print(f"Cache read failed for {path}: {e}")
+            return None
+        if len(blob) < self._HEADER.size:
+            return None
+        (expires,) = self._HEADER.unpack_from(blob)
+        if expires and expires < time.time():
+            return None
+        try:
+            os.utime(path)  # recently used
+        except OSError:
+            pass
+        return blob[self._HEADER.size:]
+
+    def _set(self, name, value, ttl):
+        path = self._path(name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                f.write(self._HEADER.pack(time.time() + ttl if ttl else 0))
+                f.write(value)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Cache write failed for {path}: {e}")
+            return
+        self._maybe_sweep()
+
+    def _delete(self, name):
+        try:
+            os.unlink(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    def _maybe_sweep(self):
+        with self._lock:
+            if time.time() - self._last_sweep < _SWEEP_INTERVAL:
+                return
+            self._last_sweep = time.time()
+        self.sweep()
+
+    def sweep(self):
+        """Remove expired entries, then the least recently used until under max_bytes."""
+        now = time.time()
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for filename in files:
+                path = os.path.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                    if filename.endswith('.tmp'):
+                        if now - stat.st_mtime > 60:  # left by a crashed writer
+                            os.unlink(path)
+                        continue
+                    with open(path, 'rb') as f:
+                        (expires,) = self._HEADER.unpack(f.read(self._HEADER.size))
+                    if expires and expires < now:
+                        os.unlink(path)
+                        continue
+                except (OSError, struct.error):
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        if removed:
+            metrics.inc('cache_evictions_total', removed, backend='file')
+
+
+class HashRing:
+    """Consistent hash ring: each node owns the keys nearest its virtual points."""
+
+    def __init__(self, nodes, replicas=128):
+        self._points = sorted(
+            (self._hash(f'{node}#{i}'), node) for node in nodes for i in range(replicas)
+        )
+        self._hashes = [point for point, _ in self._points]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.sha1(value.encode('utf-8')).digest()[:8], 'big')
+
+    def node(self, key):
+        index = bisect.bisect(self._hashes, self._hash(key)) % len(self._points)
+        return self._points[index][1]
+
+
+class RespError(Exception):
+    """An error reply from a Redis-protocol server."""
+
+
+class RedisConnection:
+    """Minimal RESP2 client: one socket per thread, reconnecting after errors."""
+
+    def __init__(self, url, timeout=CACHE_TIMEOUT):
+        parsed = urlparse(url)
+        self.url = url
+        self.address = (parsed.hostname or 'localhost', parsed.port or 6379)
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock, self._local.reader = sock, sock.makefile('rb')
+        if self.password:
+            self._roundtrip('AUTH', self.password)
+        if self.db:
+            self._roundtrip('SELECT', self.db)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError('Connection closed')
+        kind, rest = line[:1], line[1:-2]
+        if kind == b'+':
+            return rest
+        if kind == b'-':
+            raise RespError(rest.decode('utf-8', 'replace'))
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            length = int(rest)
+            if length < 0:
+                return None
+            value = self._local.reader.read(length + 2)
+            return value[:-2]
+        if kind == b'*':
+            count = int(rest)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise ConnectionError(f'Bad reply {line[:20]!r}')
+
+    def _roundtrip(self, *args):
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            arg = arg if isinstance(arg, (bytes, bytearray)) else str(arg).encode('utf-8')
+            parts += [f'${len(arg)}\r\n'.encode(), arg, b'\r\n']
+        self._local.sock.sendall(b''.join(parts))
+        return self._read_reply()
+
+    def command(self, *args):
+        for attempt in (0, 1):
+            try:
+                if getattr(self._local, 'sock', None) is None:
+                    self._connect()
+                return self._roundtrip(*args)
+            except (OSError, ConnectionError) as e:
+                self.close()
+                if attempt:
+                    raise ConnectionError(f'{self.url}: {e}') from None
+
+    def close(self):
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+
+class RedisCache(Cache):
+    """Entries on Redis-protocol servers, sharded by a consistent hash ring over urls."""
+
+    def __init__(self, urls=CACHE_REDIS_URLS, timeout=CACHE_TIMEOUT):
+        self._connections = {url: RedisConnection(url, timeout) for url in urls}
+        self._ring = HashRing(list(self._connections))
+
+    def _connection(self, name):
+        return self._connections[self._ring.node(name)]
+
+    def get_many(self, namespace, keys):
+        # One MGET per server instead of a round trip per key
+        by_server = {}
+        for key in keys:
+            name = _name(namespace, key)
+            by_server.setdefault(self._ring.node(name), []).append((key, CACHE_PREFIX + name))
+        found = {}
+        for url, entries in by_server.items():
+            try:
+                values = self._connections[url].command('MGET', *(name for _, name in entries))
+            except (ConnectionError, RespError) as e:
+                print(f"Cache read failed: {e}")
+                values = [None] * len(entries)
+            for (key, _), value in zip(entries, values):
+                _record(namespace, value is not None)
+                if value is not None:
+                    found[key] = value
+        return found
+
+    def _set(self, name, value, ttl):
+        args = ['SET', CACHE_PREFIX + name, value]
+        if ttl:
+            args += ['PX', int(ttl * 1000)]
+        try:
+            self._connection(name).command(*args)
+        except (ConnectionError, RespError) as e:
+            print(f"Cache write failed: {e}")
+
+    def _delete(self, name):
+        try:
+            self._connection(name).command('DEL', CACHE_PREFIX + name)
+        except (ConnectionError, RespError) as e:
+            print(f"Cache delete failed: {e}")
+
+
+BACKENDS = {
+    'none': NullCache,
+    'memory': MemoryCache,
+    'shm': SharedMemoryCache,
+    'file': FileCache,
+    'redis': RedisCache,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def backend():
+    """The configured cache, created lazily (after any fork)."""
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            if CACHE_BACKEND not in BACKENDS:
+                raise ValueError(f"Unknown CACHE_BACKEND {CACHE_BACKEND!r}, expected one of {', '.join(BACKENDS)}")
+            _backend = BACKENDS[CACHE_BACKEND]()
+        return _backend
+
+
+# ---- Redis-protocol stand-in, for local runs and tests ----
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+    def _reply(self, value):
+        if value is None:
+            self.wfile.write(b'$-1\r\n')
+        elif isinstance(value, int):
+            self.wfile.write(b':%d\r\n' % value)
+        elif isinstance(value, list):
+            self.wfile.write(b'*%d\r\n' % len(value))
+            for item in value:
+                self._reply(item)
+        elif value == 'OK':
+            self.wfile.write(b'+OK\r\n')
+        else:
+            self.wfile.write(b'$%d\r\n%s\r\n' % (len(value), value))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        store, lock = self.server.store, self.server.lock
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            command, args = args[0].upper(), args[1:]
+            now = time.time()
+            with lock:
+                for name in [name for name, (expires, _) in store.items() if expires and expires < now]:
+                    del store[name]
+                if command == b'GET':
+                    reply = store.get(args[0], (None, None))[1]
+                elif command == b'MGET':
+                    reply = [store.get(name, (None, None))[1] for name in args]
+                elif command == b'SET':
+                    expires = now + int(args[3]) / 1000 if len(args) > 3 and args[2].upper() == b'PX' else None
+                    store[args[0]] = (expires, args[1])
+                    reply = 'OK'
+                elif command == b'DEL':
+                    reply = sum(store.pop(name, None) is not None for name in args)
+                elif command in (b'PING', b'SELECT', b'AUTH'):
+                    reply = 'OK'
+                else:
+                    self.wfile.write(b'-ERR unknown command\r\n')
+                    continue
+            self._reply(reply)
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """In-memory server for the GET/MGET/SET/DEL subset RedisCache uses."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address=('127.0.0.1', 6390)):
+        super().__init__(address, _StandInHandler)
+        self.store = {}
+        self.lock = threading.Lock()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['serve'])
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args(argv)
+    server = StandInServer(('127.0.0.1', args.port))
+    print(f"Redis-protocol stand-in on 127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,136 +1,195 @@
+import datetime
+import io
+import os
+from contextlib import contextmanager
+
+import pptx
 from pptx import Presentation
-from pptx.util import Inches, Pt
+from pptx.util import Emu, Inches, Pt
 from pptx.dml.color import RGBColor
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.chart.data import CategoryChartData
-from pptx.enum.chart import XL_CHART_TYPE
+from pptx.chart.xlsx import CategoryWorkbookWriter
+from pptx.enum.chart import XL_CHART_TYPE, XL_LEGEND_POSITION
 from pptx.enum.dml import MSO_THEME_COLOR
 
+import file_media
+import icons
+import images
+import metrics
+import pptx_zip
+import slide_layouts
+import themes
+from brand_assets import add_master_images
+from text_styles import add_text, add_text_styles
+
+# Byte-identical output for identical decks: zip timestamps fixed at save
+DETERMINISTIC_SAVE = os.environ.get('DETERMINISTIC_SAVE', '1').lower() in ('1', 'true', 'yes')
+
+# Creation date written into chart workbooks (xlsxwriter would use the time of the render)
+WORKBOOK_CREATED = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+
+_TEMPLATE_PATH = os.path.join(os.path.dirname(pptx.__file__), 'templates', 'default.pptx')
+_template_blob = None
+
+
+def base_template():
+    """Bytes of the base .pptx template, read once per process and shared by every deck."""
+    global _template_blob
+    if _template_blob is None:
+        with open(_TEMPLATE_PATH, 'rb') as f:
+            _template_blob = f.read()
+    return _template_blob
+
+
+class _StableWorkbookWriter(CategoryWorkbookWriter):
+    @contextmanager
+    def _open_worksheet(self, xlsx_file):
+        with super()._open_worksheet(xlsx_file) as (workbook, worksheet):
+            workbook.set_properties({'created': WORKBOOK_CREATED})
+            yield workbook, worksheet
+
+
+class StableChartData(CategoryChartData):
+    """CategoryChartData whose embedded workbook comes out the same bytes every time."""
+
+    @property
+    def _workbook_writer(self):
+        return _StableWorkbookWriter(self)
+
+
+_theme_templates = {}
+
+
+def theme_template(theme):
+    """
+    Base template with the theme's colors, fonts, master-level brand images,
+    branded slide layouts and named text styles baked in, built once per theme.
+    """
+    blob = _theme_templates.get(theme.id)
+    if blob is None:
+        prs = Presentation(io.BytesIO(theme.bake_template(base_template())))
+        if theme.master_images:
+            add_master_images(prs, theme.master_images)
+        slide_layouts.add_branded_layouts(prs, theme)
+        add_text_styles(prs, theme)
+        out = io.BytesIO()
+        prs.save(out)
+        blob = out.getvalue()
+        _theme_templates[theme.id] = blob
+    return blob
+
+
 class CorporatePresentation:
     """
     Enhanced corporate presentation template with professional slide types.
-    Colors: Deep Teal (#2C5F7C), Bright Red (#E31E24), Light Blue (#7BA7BC)
+    Colors: Brand theme from the theme registry (default Waldom: Deep Teal, Bright Red, Light Blue)
     Style: Modern, clean, professional layouts for sales and business presentations
     Features: Slide numbers, Waldom branding, responsive layouts, multiple chart types
     """
     
-    def __init__(self):
-        self.prs = Presentation()
+    def __init__(self, images=None, theme=None):
+        self.theme = themes.get_theme(theme)
+        self.prs = Presentation(io.BytesIO(theme_template(self.theme)))
+
+        # Prefetched image bytes keyed by image_url (remote images are fetched by the API)
+        self.images = images or {}
         
         # Set slide dimensions (16:9 widescreen)
         self.prs.slide_width = Inches(10)
         self.prs.slide_height = Inches(7.5)
         
-        # Brand colors
-        self.TEAL = RGBColor(44, 95, 124)
-        self.RED = RGBColor(227, 30, 36)
-        self.LIGHT_BLUE = RGBColor(123, 167, 188)
-        self.WHITE = RGBColor(255, 255, 255)
-        self.LIGHT_GRAY = RGBColor(242, 242, 242)
-        self.DARK_GRAY = RGBColor(51, 51, 51)
-        self.DARK_TEAL = RGBColor(30, 70, 95)
+        # Brand colors (shared RGBColor objects precomputed by the theme)
+        colors = self.theme.colors
+        self.TEAL = colors['TEAL']
+        self.RED = colors['RED']
+        self.LIGHT_BLUE = colors['LIGHT_BLUE']
+        self.WHITE = colors['WHITE']
+        self.LIGHT_GRAY = colors['LIGHT_GRAY']
+        self.DARK_GRAY = colors['DARK_GRAY']
+        self.DARK_TEAL = colors['DARK_TEAL']
         
-        self.FONT_NAME = "Calibri"
+        self.FONT_NAME = self.theme.font_name
+
+        # Branded layouts carrying the shared chrome (see slide_layouts)
+        layouts = self.prs.slide_layouts
+        self.title_layout = layouts.get_by_name(slide_layouts.TITLE_LAYOUT)
+        self.content_layout = layouts.get_by_name(slide_layouts.CONTENT_LAYOUT)
+        self.quote_layout = layouts.get_by_name(slide_layouts.QUOTE_LAYOUT)
     
+    def _add_text(self, slide, text, left, top, width, height, style='body', **options):
+        """Text box in a named style (see text_styles), colored for this deck's theme."""
+        return add_text(slide, self.theme, text, left, top, width, height, style, **options)
+
+    def _new_slide(self, layout):
+        """
+        Add a slide on layout. Its shape ids come from a running counter
+        (python-pptx turbo-add) instead of a scan of every id on the slide
+        per added shape, which made shape-heavy slides quadratic.
+        """
+        slide = self.prs.slides.add_slide(layout)
+        slide.shapes.turbo_add_enabled = True
+        return slide
+
+    def _image_source(self, image_url):
+        """Prefetched bytes for image_url if we have them, else the path itself."""
+        blob = self.images.get(image_url)
+        return io.BytesIO(blob) if blob is not None else image_url
+
+    def _image_failed(self, image_url, error):
+        """An image could not be added; the caller draws a placeholder in its place."""
+        print(f"Could not load image {image_url}: {error}")
+        metrics.inc('image_placeholders_total', source=images.source_kind(image_url))
+
+    def _add_picture(self, slide, image_url, left, top, width=None, height=None):
+        """Picture from image_url; large local files are linked by path and copied in at save (file_media)."""
+        source = self._image_source(image_url)
+        if images.is_remote(source) or images.is_content_ref(source) or images.is_inline(source):
+            raise ValueError("not fetched")  # failed, skipped, evicted or undecodable; see the fetch log
+        if isinstance(source, str):
+            source = file_media.media_path(source)
+            if file_media.is_large(source):
+                return file_media.add_picture(slide.shapes, source, left, top, width, height)
+        return slide.shapes.add_picture(source, left, top, width=width, height=height)
+
+    def _add_icon(self, slide, icon, left, top, size, font_size):
+        """
+        Red icon tile at (left, top). Known icons are one picture from the
+        pre-rendered cache (one shared image part per deck); anything else is
+        drawn as text on a red square.
+        """
+        png = icons.icon_png(icon, self.theme.hex['RED'], self.theme.hex['WHITE'])
+        if png is not None:
+            return slide.shapes.add_picture(io.BytesIO(png), left, top, size, size)
+
+        icon_rect = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, size, size)
+        icon_rect.fill.solid()
+        icon_rect.fill.fore_color.rgb = self.RED
+        icon_rect.line.fill.background()
+
+        self._add_text(slide, icon, left, top, size, size, 'inverse', size=font_size, anchor=MSO_ANCHOR.MIDDLE)
+        return icon_rect
+
     def _add_footer(self, slide, slide_number):
-        """Adds the slide number to the bottom right."""
-        left = Inches(8.5)
-        top = Inches(7.0)
-        width = Inches(1.0)
-        height = Inches(0.5)
-        textbox = slide.shapes.add_textbox(left, top, width, height)
-        text_frame = textbox.text_frame
-        p = text_frame.paragraphs[0]
-        p.text = str(slide_number)
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(10)
-        p.font.color.rgb = self.DARK_GRAY
-        p.alignment = PP_ALIGN.RIGHT
+        """Adds the slide number to the bottom right (the layout's slide-number placeholder)."""
+        # Slides are numbered in order unless the request set slide_number itself
+        live = slide_number == len(self.prs.slides)
+        slide_layouts.add_slide_number(slide, slide_number, live)
 
     # ========== TITLE & TABLE OF CONTENTS SLIDES ==========
     
     def add_title_slide(self, title, subtitle, slide_number=None):
         """Create title slide with Waldom logo and red accent, matching preview."""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Background gradient effect (using shapes for similar visual)
-        bg_shape_blue = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(7.5)
-        )
-        bg_shape_blue.fill.solid()
-        bg_shape_blue.fill.fore_color.rgb = self.TEAL
-        bg_shape_blue.line.fill.background()
-
-        # Add "opacity" effect with lighter shapes
-        oval1 = slide.shapes.add_shape(
-            MSO_SHAPE.OVAL,
-            Inches(6), Inches(-0.5),
-            Inches(4), Inches(4)
-        )
-        oval1.fill.solid()
-        oval1.fill.fore_color.rgb = self.WHITE
-        oval1.fill.fore_color.alpha = 0.05
-        oval1.line.fill.background()
-
-        oval2 = slide.shapes.add_shape(
-            MSO_SHAPE.OVAL,
-            Inches(-0.5), Inches(5),
-            Inches(3.5), Inches(3.5)
-        )
-        oval2.fill.solid()
-        oval2.fill.fore_color.rgb = self.WHITE
-        oval2.fill.fore_color.alpha = 0.05
-        oval2.line.fill.background()
+        # Background, accents and logo come from the brand title layout
+        slide = self._new_slide(self.title_layout)
+        slide.shapes.title.text = title
 
-        # Waldom Logo (optional - will need actual logo path)
-        logo_path = "path/to/your/waldom_logo.png"
-        try:
-            slide.shapes.add_picture(logo_path, Inches(3.8), Inches(1.8), height=Inches(0.8))
-        except FileNotFoundError:
-            print(f"Note: Waldom logo not found at {logo_path}. Continuing without logo.")
-
-        # Title text
-        title_box = slide.shapes.add_textbox(
-            Inches(1), Inches(3),
-            Inches(8), Inches(1.5)
-        )
-        tf = title_box.text_frame
-        tf.text = title
-        tf.word_wrap = True
-        p = tf.paragraphs[0]
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(40)
-        p.font.bold = False
-        p.font.color.rgb = self.WHITE
-        p.alignment = PP_ALIGN.CENTER
-
-        # Subtitle
+        subtitle_placeholder = slide.placeholders[1]
         if subtitle:
-            subtitle_box = slide.shapes.add_textbox(
-                Inches(1), Inches(4.5),
-                Inches(8), Inches(1)
-            )
-            stf = subtitle_box.text_frame
-            stf.text = subtitle
-            stf.word_wrap = True
-            sp = stf.paragraphs[0]
-            sp.font.name = self.FONT_NAME
-            sp.font.size = Pt(16)
-            sp.font.color.rgb = self.WHITE
-            sp.alignment = PP_ALIGN.CENTER
-        
-        # Red line at bottom right
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(8.5), Inches(6.8),
-            Inches(1), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+            subtitle_placeholder.text = subtitle
+        else:
+            subtitle_placeholder._element.getparent().remove(subtitle_placeholder._element)
 
         if slide_number:
             self._add_footer(slide, slide_number)
@@ -138,40 +197,8 @@ class CorporatePresentation:
     
     def add_table_of_contents(self, sections, slide_number=None):
         """Create table of contents slide"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-        
-        # Title
-        title_box = slide.shapes.add_textbox(
-            Inches(0.5), Inches(0.8),
-            Inches(5), Inches(0.8)
-        )
-        tf = title_box.text_frame
-        tf.text = "Table Of Content"
-        
-        p = tf.paragraphs[0]
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red accent line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = "Table Of Content"
         
         # Add sections in two columns
         left_x = Inches(0.5)
@@ -188,29 +215,10 @@ class CorporatePresentation:
                 y_pos = start_y + (i // 2) * spacing
             
             # Number
-            num_box = slide.shapes.add_textbox(x_pos, y_pos, Inches(0.8), Inches(0.5))
-            ntf = num_box.text_frame
-            ntf.text = f"{i+1:02d}."
-            
-            np = ntf.paragraphs[0]
-            np.font.name = self.FONT_NAME
-            np.font.size = Pt(28)
-            np.font.bold = True
-            np.font.color.rgb = self.DARK_GRAY
-            
+            self._add_text(slide, f"{i+1:02d}.", x_pos, y_pos, Inches(0.8), Inches(0.5), size=Pt(28), bold=True)
+
             # Section title
-            text_box = slide.shapes.add_textbox(
-                x_pos, y_pos + Inches(0.5),
-                Inches(4), Inches(0.5)
-            )
-            ttf = text_box.text_frame
-            ttf.text = section
-            ttf.word_wrap = True
-            
-            tp = ttf.paragraphs[0]
-            tp.font.name = self.FONT_NAME
-            tp.font.size = Pt(14)
-            tp.font.color.rgb = self.DARK_GRAY
+            self._add_text(slide, section, x_pos, y_pos + Inches(0.5), Inches(4), Inches(0.5), size=Pt(14), wrap=True)
         
         if slide_number:
             self._add_footer(slide, slide_number)
@@ -220,36 +228,8 @@ class CorporatePresentation:
     
     def add_content_with_icons_slide(self, title, items, slide_number=None):
         """Create content slide with icon-text pairs in responsive grid layout"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         # Content area starts lower
         start_y = Inches(2.2) 
@@ -271,41 +251,16 @@ class CorporatePresentation:
             x = Inches(0.5) + col * (col_width + Inches(0.5))
             y = start_y + row * (item_height + Inches(line_spacing))
 
-            # Icon box
-            icon_box = slide.shapes.add_shape(
-                MSO_SHAPE.RECTANGLE,
-                x, y,
-                Inches(icon_size_inch), Inches(icon_size_inch)
-            )
-            icon_box.fill.solid()
-            icon_box.fill.fore_color.rgb = self.RED
-            icon_box.line.fill.background()
-
-            # Icon text (placeholder)
-            icon_text_box = slide.shapes.add_textbox(
-                x, y,
-                Inches(icon_size_inch), Inches(icon_size_inch)
-            )
-            itf = icon_text_box.text_frame
-            itf.text = item.get('icon', '★')
-            itf.paragraphs[0].font.name = self.FONT_NAME
-            itf.paragraphs[0].font.size = icon_font_size
-            itf.paragraphs[0].font.color.rgb = self.WHITE
-            itf.paragraphs[0].alignment = PP_ALIGN.CENTER
-            itf.vertical_anchor = MSO_ANCHOR.MIDDLE
+            # Icon
+            self._add_icon(slide, item.get('icon', '★'), x, y, Inches(icon_size_inch), icon_font_size)
 
             # Text
-            text_box = slide.shapes.add_textbox(
+            self._add_text(
+                slide, item['text'],
                 x + Inches(icon_size_inch + 0.2), y,
-                col_width - Inches(icon_size_inch + 0.2), Inches(icon_size_inch + 0.5)
+                col_width - Inches(icon_size_inch + 0.2), Inches(icon_size_inch + 0.5),
+                size=text_font_size
             )
-            ttf = text_box.text_frame
-            p = ttf.paragraphs[0]
-            p.text = item['text']
-            p.font.name = self.FONT_NAME
-            p.font.size = text_font_size
-            p.font.color.rgb = self.DARK_GRAY
-            p.word_wrap = True
         
         if slide_number:
             self._add_footer(slide, slide_number)
@@ -315,36 +270,8 @@ class CorporatePresentation:
     
     def add_split_slide(self, title, paragraphs, slide_number=None):
         """Create slide with title and multiple paragraphs"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         # Determine scaling based on paragraph count
         para_count = len(paragraphs)
@@ -353,15 +280,8 @@ class CorporatePresentation:
 
         current_y = Inches(2.2)
         for para in paragraphs:
-            text_box = slide.shapes.add_textbox(Inches(0.5), current_y, Inches(9), Inches(1))
-            tf = text_box.text_frame
-            p = tf.paragraphs[0]
-            p.text = para
-            p.font.name = self.FONT_NAME
-            p.font.size = font_size
-            p.font.color.rgb = self.DARK_GRAY
-            p.word_wrap = True
-            current_y += (text_box.height + Inches(line_spacing))
+            self._add_text(slide, para, Inches(0.5), current_y, Inches(9), Inches(1), size=font_size)
+            current_y += (Inches(1) + Inches(line_spacing))
         
         if slide_number:
             self._add_footer(slide, slide_number)
@@ -371,36 +291,8 @@ class CorporatePresentation:
     
     def add_market_opportunities_slide(self, title, items, slide_number=None):
         """Create market opportunities slide with responsive grid"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         item_count = len(items)
         if item_count == 0:
@@ -464,58 +356,26 @@ class CorporatePresentation:
                 item_shape.line.fill.fore_color.rgb = self.LIGHT_BLUE
                 item_shape.line.width = Pt(1.5)
 
-                # Icon box
-                icon_box_x = x + item_h_padding
-                icon_box_y = y + item_h_padding
-                icon_rect = slide.shapes.add_shape(
-                    MSO_SHAPE.RECTANGLE,
-                    icon_box_x, icon_box_y,
-                    icon_size_inch, icon_size_inch
-                )
-                icon_rect.fill.solid()
-                icon_rect.fill.fore_color.rgb = self.RED
-                icon_rect.line.fill.background()
-
-                # Icon placeholder
-                icon_text_box = slide.shapes.add_textbox(
-                    icon_box_x, icon_box_y,
-                    icon_size_inch, icon_size_inch
-                )
-                itf = icon_text_box.text_frame
-                itf.text = item.get('icon', '★')
-                itf.paragraphs[0].font.name = self.FONT_NAME
-                itf.paragraphs[0].font.size = Pt(14)
-                itf.paragraphs[0].font.color.rgb = self.WHITE
-                itf.paragraphs[0].alignment = PP_ALIGN.CENTER
-                itf.vertical_anchor = MSO_ANCHOR.MIDDLE
+                # Icon
+                self._add_icon(slide, item.get('icon', '★'), x + item_h_padding, y + item_h_padding,
+                               icon_size_inch, Pt(14))
 
                 # Text content
                 text_content_x = x + icon_size_inch + Inches(0.2) + item_h_padding
                 text_content_width = col_width - icon_size_inch - Inches(0.2) - 2 * item_h_padding
                 
-                title_text_box = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, item['title'],
                     text_content_x, y + item_h_padding,
-                    text_content_width, Inches(0.5)
+                    text_content_width, Inches(0.5),
+                    'heading', size=title_font_size
                 )
-                ttf = title_text_box.text_frame
-                p = ttf.paragraphs[0]
-                p.text = item['title']
-                p.font.name = self.FONT_NAME
-                p.font.size = title_font_size
-                p.font.color.rgb = self.DARK_TEAL
-                p.word_wrap = True
-
-                description_text_box = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, item['text'],
                     text_content_x, y + item_h_padding + Inches(0.5),
-                    text_content_width, Inches(1)
+                    text_content_width, Inches(1),
+                    size=text_font_size
                 )
-                dtf = description_text_box.text_frame
-                p = dtf.paragraphs[0]
-                p.text = item['text']
-                p.font.name = self.FONT_NAME
-                p.font.size = text_font_size
-                p.font.color.rgb = self.DARK_GRAY
-                p.word_wrap = True
 
                 current_item_idx += 1
 
@@ -527,36 +387,8 @@ class CorporatePresentation:
     
     def add_timeline_slide(self, title, image_url, milestones, slide_number=None):
         """Create timeline slide with image and milestones"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         # Image column
         img_left = Inches(0.5)
@@ -565,9 +397,9 @@ class CorporatePresentation:
         img_height = Inches(4.5)
 
         try:
-            slide.shapes.add_picture(image_url, img_left, img_top, width=img_width, height=img_height)
+            self._add_picture(slide, image_url, img_left, img_top, width=img_width, height=img_height)
         except Exception as e:
-            print(f"Could not load image {image_url}: {e}")
+            self._image_failed(image_url, e)
             placeholder = slide.shapes.add_shape(
                 MSO_SHAPE.RECTANGLE,
                 img_left, img_top,
@@ -614,31 +446,20 @@ class CorporatePresentation:
             date_rect.fill.fore_color.rgb = self.TEAL
             date_rect.line.fill.background()
 
-            date_text_box = slide.shapes.add_textbox(
+            self._add_text(
+                slide, milestone['date'],
                 milestones_left, current_y,
-                date_rect_width, date_rect_height
+                date_rect_width, date_rect_height,
+                'date-chip', anchor=MSO_ANCHOR.MIDDLE
             )
-            dtf = date_text_box.text_frame
-            p = dtf.paragraphs[0]
-            p.text = milestone['date']
-            p.font.name = self.FONT_NAME
-            p.font.size = Pt(10)
-            p.font.color.rgb = self.WHITE
-            p.alignment = PP_ALIGN.CENTER
-            dtf.vertical_anchor = MSO_ANCHOR.MIDDLE
 
             # Event text
-            event_text_box = slide.shapes.add_textbox(
+            self._add_text(
+                slide, milestone['event'],
                 milestones_left + date_rect_width + Inches(0.2), current_y,
-                milestones_width - date_rect_width - Inches(0.2), date_rect_height + Inches(0.2)
+                milestones_width - date_rect_width - Inches(0.2), date_rect_height + Inches(0.2),
+                size=event_font_size
             )
-            etf = event_text_box.text_frame
-            p = etf.paragraphs[0]
-            p.text = milestone['event']
-            p.font.name = self.FONT_NAME
-            p.font.size = event_font_size
-            p.font.color.rgb = self.DARK_GRAY
-            p.word_wrap = True
 
             current_y += (date_rect_height + spacing)
             
@@ -650,36 +471,8 @@ class CorporatePresentation:
     
     def add_comparison_slide(self, title, left_side, right_side, slide_number=None, middle_side=None):
         """Create comparison slide with 2 or 3 columns"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         has_middle = middle_side is not None and middle_side.get('items')
         num_columns = 3 if has_middle else 2
@@ -710,41 +503,21 @@ class CorporatePresentation:
             col_shape.line.width = Pt(1.5)
 
             # Column Title
-            title_box = slide.shapes.add_textbox(x + Inches(0.3), y + Inches(0.3), width - Inches(0.6), Inches(0.5))
-            ttf = title_box.text_frame
-            p = ttf.paragraphs[0]
-            p.text = data['title']
-            p.font.name = self.FONT_NAME
-            p.font.size = Pt(20)
-            p.font.color.rgb = self.DARK_TEAL
-            p.word_wrap = True
+            self._add_text(slide, data['title'], x + Inches(0.3), y + Inches(0.3), width - Inches(0.6), Inches(0.5), 'heading')
 
             # Bullet points
             list_y = y + Inches(1)
             for item_text in data['items'][:6]:
-                bullet_box = slide.shapes.add_textbox(x + Inches(0.5), list_y, width - Inches(1), Inches(0.5))
-                btf = bullet_box.text_frame
-                p = btf.paragraphs[0]
-                p.text = f"• {item_text}"
-                p.font.name = self.FONT_NAME
-                p.font.size = font_size
-                p.font.color.rgb = self.DARK_GRAY
-                p.word_wrap = True
-                list_y += (bullet_box.height + bullet_spacing)
+                self._add_text(slide, f"• {item_text}", x + Inches(0.5), list_y, width - Inches(1), Inches(0.5), size=font_size)
+                list_y += (Inches(0.5) + bullet_spacing)
             
             if is_removable:
-                delete_cue = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, "X",
                     x + width - Inches(0.5), y + Inches(0.1),
-                    Inches(0.4), Inches(0.4)
+                    Inches(0.4), Inches(0.4),
+                    'alert', anchor=MSO_ANCHOR.MIDDLE
                 )
-                dtf = delete_cue.text_frame
-                p = dtf.paragraphs[0]
-                p.text = "X"
-                p.font.name = self.FONT_NAME
-                p.font.size = Pt(12)
-                p.font.color.rgb = self.RED
-                p.alignment = PP_ALIGN.CENTER
-                dtf.vertical_anchor = MSO_ANCHOR.MIDDLE
 
         column_y_start = Inches(2.2)
         column_height = Inches(4.5)
@@ -784,36 +557,8 @@ class CorporatePresentation:
     
     def add_process_steps_slide(self, title, steps, slide_number=None):
         """Create process steps slide with responsive grid and arrows"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         step_count = len(steps)
         if step_count == 0:
@@ -874,32 +619,20 @@ class CorporatePresentation:
                 process_box.line.fill.background()
 
                 # Label
-                label_text_box = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, step['label'],
                     x, y,
-                    box_width, box_height
+                    box_width, box_height,
+                    'inverse', size=label_font_size, anchor=MSO_ANCHOR.MIDDLE
                 )
-                ltf = label_text_box.text_frame
-                p = ltf.paragraphs[0]
-                p.text = step['label']
-                p.font.name = self.FONT_NAME
-                p.font.size = label_font_size
-                p.font.color.rgb = self.WHITE
-                p.alignment = PP_ALIGN.CENTER
-                ltf.vertical_anchor = MSO_ANCHOR.MIDDLE
 
                 # Description
-                desc_text_box = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, step['description'],
                     x, y + box_height + Inches(0.1),
-                    box_width, Inches(0.7)
+                    box_width, Inches(0.7),
+                    'caption', size=desc_font_size
                 )
-                dtf = desc_text_box.text_frame
-                p = dtf.paragraphs[0]
-                p.text = step['description']
-                p.font.name = self.FONT_NAME
-                p.font.size = desc_font_size
-                p.font.color.rgb = self.DARK_GRAY
-                p.alignment = PP_ALIGN.CENTER
-                p.word_wrap = True
 
                 # Arrow
                 if c < cols - 1 and current_step_idx < step_count - 1:
@@ -933,36 +666,8 @@ class CorporatePresentation:
     
     def add_team_slide(self, title, members, slide_number=None):
         """Create team slide with member photos and info"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         member_count = len(members)
         if member_count == 0:
@@ -1015,9 +720,8 @@ class CorporatePresentation:
                 cols_in_this_row = member_count
 
             # Center items
-            total_item_width_row = cols_in_this_row * img_size_inch.val + (cols_in_this_row - 1) * gap_h.val
-            row_start_x = start_x.val + (total_content_width.val - total_item_width_row) / 2
-            row_start_x = Inches(row_start_x)
+            total_item_width_row = cols_in_this_row * img_size_inch + (cols_in_this_row - 1) * gap_h
+            row_start_x = Emu(int(start_x + (total_content_width - total_item_width_row) / 2))
             
             row_start_y = start_y + r * (img_size_inch + Inches(0.8) + gap_v)
 
@@ -1031,9 +735,9 @@ class CorporatePresentation:
 
                 # Member image
                 try:
-                    slide.shapes.add_picture(member['image_url'], x, y, width=img_size_inch, height=img_size_inch)
+                    self._add_picture(slide, member['image_url'], x, y, width=img_size_inch, height=img_size_inch)
                 except Exception as e:
-                    print(f"Could not load member image {member['image_url']}: {e}")
+                    self._image_failed(member['image_url'], e)
                     placeholder = slide.shapes.add_shape(
                         MSO_SHAPE.RECTANGLE,
                         x, y,
@@ -1046,31 +750,23 @@ class CorporatePresentation:
                     text_frame = placeholder.text_frame
                     initials = "".join([n[0] for n in member['name'].split() if n])
                     text_frame.text = initials[:2].upper()
-                    text_frame.paragraphs[0].font.size = Pt(name_font_size.val * 0.8)
+                    text_frame.paragraphs[0].font.size = Pt(name_font_size.pt * 0.8)
                     text_frame.paragraphs[0].alignment = PP_ALIGN.CENTER
                     text_frame.vertical_anchor = MSO_ANCHOR.MIDDLE
 
                 # Name
-                name_box = slide.shapes.add_textbox(x, y + img_size_inch + Inches(0.1), img_size_inch, Inches(0.4))
-                ntf = name_box.text_frame
-                p = ntf.paragraphs[0]
-                p.text = member['name']
-                p.font.name = self.FONT_NAME
-                p.font.size = name_font_size
-                p.font.color.rgb = self.DARK_TEAL
-                p.alignment = PP_ALIGN.CENTER
-                p.word_wrap = True
+                self._add_text(
+                    slide, member['name'],
+                    x, y + img_size_inch + Inches(0.1), img_size_inch, Inches(0.4),
+                    'figure', size=name_font_size
+                )
 
                 # Role
-                role_box = slide.shapes.add_textbox(x, y + img_size_inch + Inches(0.1) + Inches(0.4), img_size_inch, Inches(0.3))
-                rtf = role_box.text_frame
-                p = rtf.paragraphs[0]
-                p.text = member['role']
-                p.font.name = self.FONT_NAME
-                p.font.size = role_font_size
-                p.font.color.rgb = self.DARK_GRAY
-                p.alignment = PP_ALIGN.CENTER
-                p.word_wrap = True
+                self._add_text(
+                    slide, member['role'],
+                    x, y + img_size_inch + Inches(0.1) + Inches(0.4), img_size_inch, Inches(0.3),
+                    'caption', size=role_font_size
+                )
 
                 current_member_idx += 1
         
@@ -1082,72 +778,25 @@ class CorporatePresentation:
     
     def add_quote_slide(self, quote, author, role, slide_number=None):
         """Create inspirational quote slide"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-        
-        # Background
-        bg_shape_blue = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(7.5)
-        )
-        bg_shape_blue.fill.solid()
-        bg_shape_blue.fill.fore_color.rgb = self.TEAL
-        bg_shape_blue.line.fill.background()
-
-        # Red accent line
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        # Background and red accent line come from the brand quote layout
+        slide = self._new_slide(self.quote_layout)
 
         # Quote text
         quote_len = len(quote)
         quote_font_size = Pt(36) if quote_len <= 100 else Pt(28) if quote_len <= 200 else Pt(22)
         
-        quote_box = slide.shapes.add_textbox(
+        self._add_text(
+            slide, f'"{quote}"',
             Inches(1), Inches(2),
-            Inches(8), Inches(3)
+            Inches(8), Inches(3),
+            'inverse', size=quote_font_size, anchor=MSO_ANCHOR.MIDDLE
         )
-        qtf = quote_box.text_frame
-        p = qtf.paragraphs[0]
-        p.text = f'"{quote}"'
-        p.font.name = self.FONT_NAME
-        p.font.size = quote_font_size
-        p.font.color.rgb = self.WHITE
-        p.alignment = PP_ALIGN.CENTER
-        p.word_wrap = True
-        qtf.vertical_anchor = MSO_ANCHOR.MIDDLE
 
         # Author
-        author_box = slide.shapes.add_textbox(
-            Inches(1), Inches(5),
-            Inches(8), Inches(0.5)
-        )
-        atf = author_box.text_frame
-        p = atf.paragraphs[0]
-        p.text = author
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(16)
-        p.font.bold = True
-        p.font.color.rgb = self.WHITE
-        p.alignment = PP_ALIGN.CENTER
-        
+        self._add_text(slide, author, Inches(1), Inches(5), Inches(8), Inches(0.5), 'inverse', bold=True)
+
         # Role
-        role_box = slide.shapes.add_textbox(
-            Inches(1), Inches(5.5),
-            Inches(8), Inches(0.4)
-        )
-        rtf = role_box.text_frame
-        p = rtf.paragraphs[0]
-        p.text = role
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(14)
-        p.font.color.rgb = self.WHITE
-        p.alignment = PP_ALIGN.CENTER
+        self._add_text(slide, role, Inches(1), Inches(5.5), Inches(8), Inches(0.4), 'inverse', size=Pt(14))
         
         if slide_number:
             self._add_footer(slide, slide_number)
@@ -1157,36 +806,8 @@ class CorporatePresentation:
     
     def add_stats_slide(self, title, stats, slide_number=None):
         """Create statistics showcase slide"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         stat_count = len(stats)
         if stat_count == 0:
@@ -1249,31 +870,20 @@ class CorporatePresentation:
                 stat_shape.line.width = Pt(1.5)
 
                 # Number
-                number_text_box = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, stat['number'],
                     x + Inches(0.1), y + Inches(0.5),
-                    col_width - Inches(0.2), Inches(1)
+                    col_width - Inches(0.2), Inches(1),
+                    'figure', size=number_font_size
                 )
-                ntf = number_text_box.text_frame
-                p = ntf.paragraphs[0]
-                p.text = stat['number']
-                p.font.name = self.FONT_NAME
-                p.font.size = number_font_size
-                p.font.color.rgb = self.DARK_TEAL
-                p.alignment = PP_ALIGN.CENTER
-                
+
                 # Label
-                label_text_box = slide.shapes.add_textbox(
+                self._add_text(
+                    slide, stat['label'],
                     x + Inches(0.1), y + Inches(1.5),
-                    col_width - Inches(0.2), Inches(0.7)
+                    col_width - Inches(0.2), Inches(0.7),
+                    'caption', size=label_font_size
                 )
-                ltf = label_text_box.text_frame
-                p = ltf.paragraphs[0]
-                p.text = stat['label']
-                p.font.name = self.FONT_NAME
-                p.font.size = label_font_size
-                p.font.color.rgb = self.DARK_GRAY
-                p.alignment = PP_ALIGN.CENTER
-                p.word_wrap = True
 
                 current_stat_idx += 1
 
@@ -1285,36 +895,8 @@ class CorporatePresentation:
     
     def add_contact_info_slide(self, title, image_url, contact_details, slide_number=None):
         """Create contact information slide"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         # Image
         img_left = Inches(0.5)
@@ -1323,9 +905,9 @@ class CorporatePresentation:
         img_height = Inches(4.5)
         
         try:
-            slide.shapes.add_picture(image_url, img_left, img_top, width=img_width, height=img_height)
+            self._add_picture(slide, image_url, img_left, img_top, width=img_width, height=img_height)
         except Exception as e:
-            print(f"Could not load image {image_url}: {e}")
+            self._image_failed(image_url, e)
             placeholder = slide.shapes.add_shape(
                 MSO_SHAPE.RECTANGLE,
                 img_left, img_top,
@@ -1354,47 +936,17 @@ class CorporatePresentation:
             # Icon box
             icon_box_width = Inches(0.6)
             icon_box_height = Inches(0.6)
-            icon_rect = slide.shapes.add_shape(
-                MSO_SHAPE.RECTANGLE,
-                details_left, current_y,
-                icon_box_width, icon_box_height
-            )
-            icon_rect.fill.solid()
-            icon_rect.fill.fore_color.rgb = self.RED
-            icon_rect.line.fill.background()
-
-            icon_text_box = slide.shapes.add_textbox(
-                details_left, current_y,
-                icon_box_width, icon_box_height
-            )
-            itf = icon_text_box.text_frame
-            itf.text = detail.get('icon', '★')
-            itf.paragraphs[0].font.name = self.FONT_NAME
-            itf.paragraphs[0].font.size = Pt(14)
-            itf.paragraphs[0].font.color.rgb = self.WHITE
-            itf.paragraphs[0].alignment = PP_ALIGN.CENTER
-            itf.vertical_anchor = MSO_ANCHOR.MIDDLE
+            self._add_icon(slide, detail.get('icon', '★'), details_left, current_y, icon_box_width, Pt(14))
 
             # Label and Value
             text_x = details_left + icon_box_width + Inches(0.2)
             text_width = details_width - icon_box_width - Inches(0.2)
 
-            label_box = slide.shapes.add_textbox(text_x, current_y, text_width, Inches(0.3))
-            ltf = label_box.text_frame
-            p = ltf.paragraphs[0]
-            p.text = detail['label'].upper()
-            p.font.name = self.FONT_NAME
-            p.font.size = Pt(9)
-            p.font.color.rgb = self.DARK_GRAY
-            
-            value_box = slide.shapes.add_textbox(text_x, current_y + Inches(0.3), text_width, Inches(0.5))
-            vtf = value_box.text_frame
-            p = vtf.paragraphs[0]
-            p.text = detail['value']
-            p.font.name = self.FONT_NAME
-            p.font.size = Pt(16)
-            p.font.bold = True
-            p.font.color.rgb = self.DARK_TEAL
+            self._add_text(slide, detail['label'].upper(), text_x, current_y, text_width, Inches(0.3), size=Pt(9))
+            self._add_text(
+                slide, detail['value'], text_x, current_y + Inches(0.3), text_width, Inches(0.5),
+                'heading', size=Pt(16), bold=True
+            )
             
             current_y += (icon_box_height + detail_spacing)
             
@@ -1406,36 +958,8 @@ class CorporatePresentation:
     
     def add_image_text_split_slide(self, title, image_url, content, image_position='left', slide_number=None):
         """Create slide with image and text side by side"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         # Layout: 1/3 for image, 2/3 for text
         img_width = Inches(3)
@@ -1449,9 +973,9 @@ class CorporatePresentation:
 
         # Image
         try:
-            slide.shapes.add_picture(image_url, image_left_x, main_content_top, width=img_width, height=main_content_height)
+            self._add_picture(slide, image_url, image_left_x, main_content_top, width=img_width, height=main_content_height)
         except Exception as e:
-            print(f"Could not load image {image_url}: {e}")
+            self._image_failed(image_url, e)
             placeholder = slide.shapes.add_shape(
                 MSO_SHAPE.RECTANGLE,
                 image_left_x, main_content_top,
@@ -1478,65 +1002,35 @@ class CorporatePresentation:
         current_y = main_content_top
 
         if heading_text:
-            heading_box = slide.shapes.add_textbox(text_left_x, current_y, text_width, Inches(0.5))
-            htf = heading_box.text_frame
-            p = htf.paragraphs[0]
-            p.text = heading_text
-            p.font.name = self.FONT_NAME
-            p.font.size = Pt(22)
-            p.font.bold = True
-            p.font.color.rgb = self.DARK_TEAL
+            self._add_text(slide, heading_text, text_left_x, current_y, text_width, Inches(0.5), 'heading', size=Pt(22), bold=True)
             current_y += Inches(0.7)
 
         for para in paragraphs:
-            text_box = slide.shapes.add_textbox(text_left_x, current_y, text_width, Inches(1))
-            tf = text_box.text_frame
-            p = tf.paragraphs[0]
-            p.text = para
-            p.font.name = self.FONT_NAME
-            p.font.size = para_font_size
-            p.font.color.rgb = self.DARK_GRAY
-            p.word_wrap = True
-            current_y += (text_box.height + para_spacing)
+            self._add_text(slide, para, text_left_x, current_y, text_width, Inches(1), size=para_font_size)
+            current_y += (Inches(1) + para_spacing)
         
         if slide_number:
             self._add_footer(slide, slide_number)
         return slide
 
+    # ========== BLANK SLIDES ==========
+
+    def add_blank_slide(self, title='', slide_number=None):
+        """Create a slide with only the brand chrome and an optional title"""
+        slide = self._new_slide(self.content_layout)
+        if title:
+            slide.shapes.title.text = title
+
+        if slide_number:
+            self._add_footer(slide, slide_number)
+        return slide
+
     # ========== CHART SLIDES ==========
     
     def add_chart_slide(self, title, chart_type, chart_data, slide_number=None):
         """Create chart slide (line or bar)"""
-        slide = self.prs.slides.add_slide(self.prs.slide_layouts[6])
-
-        # Header strip
-        header_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0), Inches(0),
-            Inches(10), Inches(0.08)
-        )
-        header_line.fill.solid()
-        header_line.fill.fore_color.rgb = self.TEAL
-        header_line.line.fill.background()
-
-        # Title
-        title_box = slide.shapes.add_textbox(Inches(0.5), Inches(0.8), Inches(9), Inches(0.8))
-        tf = title_box.text_frame
-        p = tf.paragraphs[0]
-        p.text = title
-        p.font.name = self.FONT_NAME
-        p.font.size = Pt(32)
-        p.font.color.rgb = self.DARK_TEAL
-        
-        # Red line under title
-        red_line = slide.shapes.add_shape(
-            MSO_SHAPE.RECTANGLE,
-            Inches(0.5), Inches(1.6),
-            Inches(4), Inches(0.05)
-        )
-        red_line.fill.solid()
-        red_line.fill.fore_color.rgb = self.RED
-        red_line.line.fill.background()
+        slide = self._new_slide(self.content_layout)
+        slide.shapes.title.text = title
 
         # Chart area
         chart_x, chart_y, chart_width, chart_height = Inches(0.5), Inches(2.2), Inches(9), Inches(4.5)
@@ -1557,7 +1051,7 @@ class CorporatePresentation:
                 self._add_footer(slide, slide_number)
             return slide
 
-        chart_data_obj = CategoryChartData()
+        chart_data_obj = StableChartData()
         chart_data_obj.categories = category_names
         for name, values in series_data:
             chart_data_obj.add_series(name, values)
@@ -1571,7 +1065,7 @@ class CorporatePresentation:
             chart = graphic_frame.chart
             chart.has_legend = True
             chart.legend.include_in_layout = False
-            chart.legend.position = 1
+            chart.legend.position = XL_LEGEND_POSITION.BOTTOM
             
             category_axis = chart.category_axis
             category_axis.has_major_gridlines = False
@@ -1601,9 +1095,24 @@ class CorporatePresentation:
 
     # ========== SAVE METHOD ==========
     
-    def save(self, path):
-        """Save presentation to file"""
-        self.prs.save(path)
+    def save(self, path, deterministic=None):
+        """
+        Save presentation to file. Deterministic saves (DETERMINISTIC_SAVE)
+        give identical bytes for identical decks, so the output hash can key caches.
+        """
+        if deterministic is None:
+            deterministic = DETERMINISTIC_SAVE
+        media = file_media.parts(self.prs)
+        if not deterministic and not media:
+            self.prs.save(path)
+        else:
+            out = io.BytesIO()
+            self.prs.save(out)  # file-backed media are empty placeholders here
+            if isinstance(path, str):
+                with open(path, 'wb') as f:
+                    pptx_zip.normalize(out.getvalue(), media, f)
+            else:
+                pptx_zip.normalize(out.getvalue(), media, path)
         print(f"✅ Presentation saved: {path}")
 
 
@@ -0,0 +1,47 @@
+"""
+Append rendered slides to an existing deck. Only the new slides go through
+python-pptx; the existing deck is edited at zip level (pptx_zip), so its
+parts are copied through still compressed. Slides keep the brand layouts:
+decks we generated already have them, any other deck gets our master and
+layouts imported next to its own.
+"""
+import zipfile
+import zlib
+from contextlib import contextmanager
+
+from lxml import etree
+
+import pptx_zip
+import render
+from pptx_zip import InvalidDeck  # noqa: F401  (raised by pptx_zip for missing parts and relationships)
+
+# What a deck that is not a readable zip of XML raises. Anything else escaping
+# an edit is a bug here or in pptx_zip and should surface as one.
+_DECK_ERRORS = (zipfile.BadZipFile, zlib.error, EOFError, etree.XMLSyntaxError)
+
+
+@contextmanager
+def reading(what):
+    """Raise InvalidDeck("<what>: ...") when the block fails on a deck that is not a readable .pptx."""
+    try:
+        yield
+    except InvalidDeck as e:
+        raise InvalidDeck(f"{what}: {e}") from None
+    except _DECK_ERRORS as e:
+        raise InvalidDeck(f"{what}: {type(e).__name__}: {e}") from None
+
+
+def append_slides(blob, data, images=None):
+    """blob with data['slides'] rendered in data's theme added at the end."""
+    with reading("Not a .pptx file"):
+        target = pptx_zip.Package(blob)
+        count = len(target.slide_names())
+
+    # Rendered after a title slide that is left behind; numbering starts at 2
+    rendered = render.render_presentation({'theme': data.get('theme'), 'slides': data.get('slides', [])}, images)
+    source = pptx_zip.Package(rendered.getvalue())
+    with reading("Cannot append to this deck"):
+        for name in target.append_slides(source, range(1, len(source.slide_names()))):
+            count += 1
+            target.parts[name] = pptx_zip.set_slide_number(target.parts[name], count)
+        return target.save()
@@ -0,0 +1,50 @@
+"""
+Concatenate saved decks into one at zip level (pptx_zip). The first deck is
+the base; slides of the others are appended with fresh slide, layout and
+relationship ids. Identical media is stored once, layouts and masters that
+match the base by content are shared, and the rest are imported.
+"""
+import os
+
+import admission
+import pptx_zip
+from deck_append import InvalidDeck, reading
+
+MERGE_MAX_DECKS = int(os.environ.get('MERGE_MAX_DECKS', '50'))
+
+
+def open_decks(blobs):
+    if not blobs:
+        raise InvalidDeck("No decks to merge")
+    if len(blobs) > MERGE_MAX_DECKS:
+        raise admission.TooLarge(f"Merge has {len(blobs)} decks, limit is {MERGE_MAX_DECKS}")
+    packages = []
+    for number, blob in enumerate(blobs, 1):
+        with reading(f"Deck {number} is not a .pptx file"):
+            pkg = pptx_zip.Package(blob)
+            pkg.slide_names()
+        packages.append(pkg)
+    return packages
+
+
+def estimate_cost(packages):
+    """Admission cost of a merge: copying a slide is far cheaper than rendering one."""
+    slides = sum(len(pkg.slide_names()) for pkg in packages)
+    if slides > admission.MAX_SLIDES:
+        raise admission.TooLarge(f"Merged presentation has {slides} slides, limit is {admission.MAX_SLIDES}")
+    return admission.COST_BASE + slides * admission.COST_SLIDE / 3
+
+
+def merge_decks(packages):
+    """Saved .pptx of packages' slides in order, numbered by their new position."""
+    target = packages[0]
+    count = len(target.slide_names())
+    for number, source in enumerate(packages[1:], 2):
+        with reading(f"Cannot merge deck {number}"):
+            for name in target.append_slides(source):
+                count += 1
+                blob = target.parts[name]
+                if b'type="slidenum"' in blob:
+                    target.parts[name] = pptx_zip.set_slide_number(blob, count)
+    with reading("Cannot merge these decks"):
+        return target.save()
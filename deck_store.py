@@ -0,0 +1,168 @@
+"""
+Generated decks kept by content hash, so a later request can build on one
+by id instead of uploading it again, and a client can download (or resume
+downloading) one with GET /decks/<id> straight from disk. Decks not saved
+again for DECK_STORE_MAX_AGE_HOURS are removed, and once the store holds
+more than DECK_STORE_MAX_MB the least recently saved go first.
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+
+import metrics
+
+DECK_STORE_DIR = os.environ.get('DECK_STORE_DIR', '/tmp/presentation-decks')
+DECK_STORE_MAX_AGE = float(os.environ.get('DECK_STORE_MAX_AGE_HOURS', '24')) * 3600
+DECK_STORE_MAX_BYTES = int(float(os.environ.get('DECK_STORE_MAX_MB', '2048')) * 1024 * 1024)
+
+_SWEEP_INTERVAL = 600  # seconds
+# Decks saved this recently are never evicted for size: the request that saved one may still be sending it
+_MIN_EVICT_AGE = 60  # seconds
+_last_sweep = 0.0
+_written = 0  # bytes saved by this process since its last sweep
+_sweep_lock = threading.Lock()
+
+_DECK_ID = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UnknownDeck(ValueError):
+    """A request named a deck id that is not in the store."""
+
+
+def deck_path(deck_id):
+    return os.path.join(DECK_STORE_DIR, f'{deck_id}.pptx')
+
+
+def save(blob):
+    """Store blob and return its id (the sha256 of its bytes)."""
+    deck_id = hashlib.sha256(blob).hexdigest()
+    path = deck_path(deck_id)
+    try:
+        os.utime(path)  # saved again: keep it another DECK_STORE_MAX_AGE
+    except FileNotFoundError:
+        os.makedirs(DECK_STORE_DIR, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp_path, path)
+        _sweep(len(blob))
+    return deck_id
+
+
+def temp_path():
+    """A fresh path in the store directory, for a deck written to disk and then passed to save_file."""
+    os.makedirs(DECK_STORE_DIR, exist_ok=True)
+    return os.path.join(DECK_STORE_DIR, f'{os.getpid()}.{threading.get_ident()}.{time.monotonic_ns()}.tmp')
+
+
+def save_file(tmp_path):
+    """Move the deck written to tmp_path into the store, hashing it a chunk at a time; returns its id."""
+    digest = hashlib.sha256()
+    with open(tmp_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    deck_id = digest.hexdigest()
+    size = os.path.getsize(tmp_path)
+    os.replace(tmp_path, deck_path(deck_id))
+    _sweep(size)
+    return deck_id
+
+
+def _sweep(saved=0):
+    """
+    Remove decks older than DECK_STORE_MAX_AGE, then the least recently saved
+    until the store is under DECK_STORE_MAX_BYTES. Runs at most every ten
+    minutes per process, or sooner once this process has saved a tenth of
+    the size cap since its last sweep.
+    """
+    global _last_sweep, _written
+    now = time.time()
+    with _sweep_lock:
+        _written += saved
+        due = now - _last_sweep >= _SWEEP_INTERVAL
+        if DECK_STORE_MAX_BYTES and _written > DECK_STORE_MAX_BYTES // 10:
+            due = True
+        if not due or not (DECK_STORE_MAX_AGE or DECK_STORE_MAX_BYTES):
+            return
+        _last_sweep = now
+        _written = 0
+    sweep(now)
+
+
+def sweep(now=None):
+    """Apply the age limit and the size cap to the store now."""
+    now = now or time.time()
+    entries = []
+    for entry in os.scandir(DECK_STORE_DIR):
+        try:
+            stat = entry.stat()
+            if DECK_STORE_MAX_AGE and now - stat.st_mtime > DECK_STORE_MAX_AGE:
+                os.unlink(entry.path)
+                continue
+        except FileNotFoundError:
+            continue
+        if entry.name.endswith('.pptx'):
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+    if not DECK_STORE_MAX_BYTES:
+        return
+    total = sum(size for _, size, _ in entries)
+    removed = 0
+    for mtime, size, path in sorted(entries):
+        if total <= DECK_STORE_MAX_BYTES or now - mtime < _MIN_EVICT_AGE:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    if removed:
+        metrics.inc('deck_store_evictions_total', removed)
+
+
+def stored_path(deck_id):
+    """Path of a stored deck; UnknownDeck if the id is malformed or not in the store."""
+    if not _DECK_ID.match(str(deck_id)):
+        raise UnknownDeck(f"Invalid deck id {deck_id!r}")
+    path = deck_path(deck_id)
+    if not os.path.exists(path):
+        raise UnknownDeck(f"Unknown deck {deck_id!r}")
+    return path
+
+
+def load(deck_id):
+    try:
+        with open(stored_path(deck_id), 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise UnknownDeck(f"Unknown deck {deck_id!r}") from None
+
+
+class DeckRange:
+    """
+    Bytes [start, start + length) of a stored deck as a file object. read()
+    stops at the end of the range, and the file is positioned at start, so a
+    server that sendfile()s from fileno() and the current offset for
+    Content-Length bytes (gunicorn does) sends exactly the range, zero-copy.
+    """
+
+    def __init__(self, path, start, length):
+        self._file = open(path, 'rb')
+        self._file.seek(start)
+        self._left = length
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def read(self, size=-1):
+        if size < 0 or size > self._left:
+            size = self._left
+        chunk = self._file.read(size)
+        self._left -= len(chunk)
+        return chunk
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,144 @@
+"""
+Large local media linked into a deck by path instead of loaded into it.
+python-pptx keeps every picture's bytes in its image part until save; a
+FileImagePart keeps only the path (and the pixel size and dpi, read from
+the header), saves as an empty placeholder, and pptx_zip.normalize copies
+the file into the zip in chunks. Memory stays flat however big the media.
+Local images of LARGE_MEDIA_MB or more take this path.
+
+A request may only name local files under LARGE_MEDIA_ROOT (the mounted
+media volume); any other path is refused with MediaRefused before the
+render starts, so callers can neither read nor probe the rest of the
+server's filesystem. With LARGE_MEDIA_ROOT unset no local path is allowed.
+"""
+import hashlib
+import os
+
+from PIL import Image
+from pptx.opc.constants import CONTENT_TYPE as CT, RELATIONSHIP_TYPE as RT
+from pptx.parts.image import ImagePart
+
+import images
+
+LARGE_MEDIA_BYTES = int(float(os.environ.get('LARGE_MEDIA_MB', '2')) * 1024 * 1024)
+LARGE_MEDIA_ROOT = os.environ.get('LARGE_MEDIA_ROOT', '')
+
+# PIL format -> (part extension, content type)
+_FORMATS = {
+    'JPEG': ('jpg', CT.JPEG),
+    'PNG': ('png', CT.PNG),
+    'GIF': ('gif', CT.GIF),
+    'BMP': ('bmp', CT.BMP),
+    'TIFF': ('tiff', CT.TIFF),
+}
+
+
+class MediaRefused(ValueError):
+    """A request named a local file outside LARGE_MEDIA_ROOT."""
+
+
+def is_local(ref):
+    """True if ref is an image reference naming a file on this server."""
+    return (isinstance(ref, str) and bool(ref) and not images.is_remote(ref)
+            and not images.is_inline(ref) and not images.is_content_ref(ref))
+
+
+def media_path(ref):
+    """The real path of local media ref; MediaRefused unless it lies under LARGE_MEDIA_ROOT."""
+    if LARGE_MEDIA_ROOT:
+        root = os.path.realpath(LARGE_MEDIA_ROOT)
+        path = os.path.realpath(ref)
+        if path.startswith(root.rstrip(os.sep) + os.sep):
+            return path
+    raise MediaRefused(f"Image path {ref!r} is not under the media volume")
+
+
+def check(data):
+    """Fail fast with MediaRefused if a payload names local media outside LARGE_MEDIA_ROOT."""
+    for ref in images.image_refs(data):
+        if is_local(ref):
+            media_path(ref)
+
+
+def is_large(source):
+    """True if source is local media under LARGE_MEDIA_ROOT of LARGE_MEDIA_MB or more."""
+    if not is_local(source):
+        return False
+    try:
+        return os.path.getsize(media_path(source)) >= LARGE_MEDIA_BYTES
+    except (OSError, MediaRefused):
+        return False
+
+
+def referenced(data):
+    """True if a create-presentation payload links any large local media."""
+    return any(is_large(ref) for ref in images.image_refs(data))
+
+
+def _int_dpi(dpi):
+    """dpi as python-pptx reads it: a whole number, 72 when missing or implausible."""
+    try:
+        dpi = int(round(float(dpi)))
+    except (TypeError, ValueError):
+        return 72
+    return dpi if 1 <= dpi <= 2048 else 72
+
+
+class FileImagePart(ImagePart):
+    """Image part whose bytes stay in the file at path until the deck is saved."""
+
+    def __init__(self, partname, content_type, package, path, px_size, dpi):
+        super().__init__(partname, content_type, package, b'', os.path.basename(path))
+        self.path = path
+        self._file_px_size = px_size
+        self._file_dpi = dpi
+        self._file_key = _file_key(path)
+
+    @classmethod
+    def load(cls, package, path):
+        with Image.open(path) as image:  # reads the header only
+            if image.format not in _FORMATS:
+                raise ValueError(f"Unsupported image format {image.format} in {path}")
+            ext, content_type = _FORMATS[image.format]
+            dpi = image.info.get('dpi') or (72, 72)
+            return cls(package.next_image_partname(ext), content_type, package, path,
+                       image.size, (_int_dpi(dpi[0]), _int_dpi(dpi[1])))
+
+    @property
+    def sha1(self):
+        return self._file_key
+
+    @property
+    def _px_size(self):
+        return self._file_px_size
+
+    @property
+    def _dpi(self):
+        return self._file_dpi
+
+
+def _file_key(path):
+    """Identity of the file at path as it is now, so re-adding it reuses the part."""
+    stat = os.stat(path)
+    return hashlib.sha1(f'{os.path.realpath(path)}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()
+
+
+def add_picture(shapes, path, left, top, width=None, height=None):
+    """slide.shapes.add_picture for a large local file: the deck links it by path until save."""
+    part = shapes.part
+    key = _file_key(path)
+    image_part = next(
+        (p for p in part.package.iter_parts() if isinstance(p, FileImagePart) and p.sha1 == key), None
+    ) or FileImagePart.load(part.package, path)
+    r_id = part.relate_to(image_part, RT.IMAGE)
+    pic = shapes._add_pic_from_image_part(image_part, r_id, left, top, width, height)
+    shapes._recalculate_extents()
+    return shapes._shape_factory(pic)
+
+
+def parts(prs):
+    """{zip entry name: file path} of the deck's file-backed media, for pptx_zip.normalize."""
+    return {
+        part.partname.lstrip('/'): part.path
+        for part in prs.part.package.iter_parts() if isinstance(part, FileImagePart)
+    }
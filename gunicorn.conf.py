@@ -0,0 +1,32 @@
+import os
+
+# Loaded automatically by `gunicorn api:app` (see Procfile).
+# bind and workers keep gunicorn's defaults ($PORT, $WEB_CONCURRENCY).
+
+# Threads let admission control queue and shed inside each worker instead of
+# requests piling up unseen in the listen backlog
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+
+# Import and warm the app once in the master; workers fork from the warmed image
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1') != '0'
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker forks."""
+    if preload_app:
+        import warmup
+        warmup.warm()
+
+
+def post_request(worker, req, environ, resp):
+    """Recycle a worker gracefully once it passes WORKER_SOFT_LIMIT_MB."""
+    import memory_guard
+
+    if memory_guard.over_soft_limit():
+        worker.log.info(
+            "Worker %s RSS %.1f MB over soft limit, recycling",
+            worker.pid, memory_guard.current_rss() / memory_guard.MB
+        )
+        worker.alive = False
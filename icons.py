@@ -0,0 +1,306 @@
+import io
+import math
+import os
+import re
+import threading
+
+from PIL import Image, ImageDraw
+
+import shared_assets
+
+# Drop-in overrides: ICONS_DIR/<name>.png (a glyph on transparent background),
+# listed once per process
+ICONS_DIR = os.environ.get('ICONS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'icons'))
+ICON_PX = int(os.environ.get('ICON_PX', '128'))
+_SUPERSAMPLE = 4
+_ICON_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Emoji and symbols accepted in "icon" fields, mapped to bundled icon names
+EMOJI = {
+    '📈': 'chart-up', '📊': 'bar-chart', '🎯': 'target', '💡': 'bulb', '🚀': 'rocket',
+    '👥': 'people', '👤': 'people', '✓': 'check', '✔': 'check', '✅': 'check',
+    '🌍': 'globe', '🌎': 'globe', '🌏': 'globe', '🌐': 'globe', '📱': 'phone',
+    '📞': 'phone', '☎': 'phone', '⚡': 'bolt', '🛡': 'shield', '📧': 'email',
+    '✉': 'email', '📩': 'email', '★': 'star', '⭐': 'star', '☆': 'star',
+    '📍': 'pin', '🏆': 'trophy', '⚙': 'gear', '🔒': 'lock', '⏱': 'clock',
+    '⏰': 'clock', '🕒': 'clock', '❤': 'heart',
+}
+
+
+def _star(cx, cy, outer, inner, points=5):
+    coords = []
+    for i in range(points * 2):
+        radius = outer if i % 2 == 0 else inner
+        angle = math.pi / points * i - math.pi / 2
+        coords.append((cx + radius * math.cos(angle), cy + radius * math.sin(angle)))
+    return coords
+
+
+# Each icon draws on a 100x100 design grid: d is a drawer with the glyph
+# color (fg) and tile color (bg) bound, see _Pen
+def _chart_up(d):
+    d.line([(22, 24), (22, 78), (80, 78)], width=5)
+    d.line([(28, 66), (44, 50), (56, 60), (74, 38)], width=7)
+    d.polygon([(64, 34), (80, 30), (77, 46)])
+
+
+def _bar_chart(d):
+    d.line([(20, 80), (82, 80)], width=5)
+    d.rect(26, 54, 38, 78)
+    d.rect(44, 40, 56, 78)
+    d.rect(62, 24, 74, 78)
+
+
+def _target(d):
+    d.circle(50, 50, 32, width=6)
+    d.circle(50, 50, 19, width=6)
+    d.circle(50, 50, 7)
+
+
+def _bulb(d):
+    d.circle(50, 40, 21, width=6)
+    d.rect(41, 62, 59, 68)
+    d.rect(43, 72, 57, 78)
+
+
+def _rocket(d):
+    d.polygon([(50, 14), (63, 34), (63, 64), (37, 64), (37, 34)])
+    d.polygon([(37, 48), (26, 66), (37, 64)])
+    d.polygon([(63, 48), (74, 66), (63, 64)])
+    d.polygon([(43, 68), (57, 68), (50, 86)])
+    d.circle(50, 38, 6, color='bg')
+
+
+def _people(d):
+    d.circle(38, 34, 11)
+    d.circle(64, 38, 9)
+    d.pieslice(16, 50, 60, 94, 180, 360)
+    d.pieslice(48, 52, 82, 86, 180, 360)
+
+
+def _check(d):
+    d.line([(24, 52), (42, 70), (78, 32)], width=10)
+
+
+def _globe(d):
+    d.circle(50, 50, 31, width=5)
+    d.ellipse(37, 19, 63, 81, width=5)
+    d.line([(19, 50), (81, 50)], width=5)
+    d.line([(24, 35), (76, 35)], width=4)
+    d.line([(24, 65), (76, 65)], width=4)
+
+
+def _phone(d):
+    d.rounded_rect(34, 16, 66, 84, 6, width=6)
+    d.circle(50, 74, 4)
+
+
+def _bolt(d):
+    d.polygon([(58, 14), (28, 54), (47, 54), (40, 86), (72, 44), (53, 44), (62, 14)])
+
+
+def _shield(d):
+    d.polygon([(50, 16), (76, 26), (73, 56), (50, 82), (27, 56), (24, 26)])
+
+
+def _email(d):
+    d.rect(20, 30, 80, 72, width=5)
+    d.line([(22, 32), (50, 54), (78, 32)], width=5)
+
+
+def _star_icon(d):
+    d.polygon(_star(50, 52, 34, 14))
+
+
+def _pin(d):
+    d.polygon([(30, 44), (70, 44), (50, 86)])
+    d.circle(50, 38, 20)
+    d.circle(50, 38, 8, color='bg')
+
+
+def _trophy(d):
+    d.pieslice(30, 6, 70, 58, 0, 180)
+    d.rect(30, 20, 70, 32)
+    d.rect(46, 56, 54, 70)
+    d.rect(34, 70, 66, 80)
+    d.arc(18, 22, 38, 46, 90, 270, width=5)
+    d.arc(62, 22, 82, 46, 270, 90, width=5)
+
+
+def _gear(d):
+    for i in range(8):
+        angle = math.pi / 4 * i
+        x, y = 50 + 30 * math.cos(angle), 50 + 30 * math.sin(angle)
+        d.line([(50, 50), (x, y)], width=12)
+    d.circle(50, 50, 24)
+    d.circle(50, 50, 10, color='bg')
+
+
+def _lock(d):
+    d.arc(34, 16, 66, 54, 180, 360, width=7)
+    d.line([(34, 35), (34, 46)], width=7)
+    d.line([(66, 35), (66, 46)], width=7)
+    d.rect(26, 44, 74, 82)
+    d.circle(50, 60, 5, color='bg')
+
+
+def _clock(d):
+    d.circle(50, 50, 31, width=6)
+    d.line([(50, 50), (50, 30)], width=6)
+    d.line([(50, 50), (64, 58)], width=6)
+
+
+def _heart(d):
+    d.circle(37, 40, 16)
+    d.circle(63, 40, 16)
+    d.polygon([(22, 46), (78, 46), (50, 80)])
+
+
+ICONS = {
+    'chart-up': _chart_up, 'bar-chart': _bar_chart, 'target': _target, 'bulb': _bulb,
+    'rocket': _rocket, 'people': _people, 'check': _check, 'globe': _globe,
+    'phone': _phone, 'bolt': _bolt, 'shield': _shield, 'email': _email,
+    'star': _star_icon, 'pin': _pin, 'trophy': _trophy, 'gear': _gear,
+    'lock': _lock, 'clock': _clock, 'heart': _heart,
+}
+
+
+class _Pen:
+    """ImageDraw wrapper that works in 0-100 design units and knows the icon colors."""
+
+    def __init__(self, image, fg, bg):
+        self.draw = ImageDraw.Draw(image)
+        self.scale = image.size[0] / 100
+        self.colors = {'fg': fg, 'bg': bg}
+
+    def _xy(self, points):
+        return [(x * self.scale, y * self.scale) for x, y in points]
+
+    def _box(self, x0, y0, x1, y1):
+        return [x0 * self.scale, y0 * self.scale, x1 * self.scale, y1 * self.scale]
+
+    def _w(self, width):
+        return int(width * self.scale)
+
+    def line(self, points, width=4, color='fg'):
+        self.draw.line(self._xy(points), fill=self.colors[color], width=self._w(width), joint='curve')
+
+    def polygon(self, points, color='fg'):
+        self.draw.polygon(self._xy(points), fill=self.colors[color])
+
+    def rect(self, x0, y0, x1, y1, width=None, color='fg'):
+        if width:
+            self.draw.rectangle(self._box(x0, y0, x1, y1), outline=self.colors[color], width=self._w(width))
+        else:
+            self.draw.rectangle(self._box(x0, y0, x1, y1), fill=self.colors[color])
+
+    def rounded_rect(self, x0, y0, x1, y1, radius, width=None, color='fg'):
+        kwargs = {'outline': self.colors[color], 'width': self._w(width)} if width else {'fill': self.colors[color]}
+        self.draw.rounded_rectangle(self._box(x0, y0, x1, y1), radius=radius * self.scale, **kwargs)
+
+    def circle(self, cx, cy, r, width=None, color='fg'):
+        self.ellipse(cx - r, cy - r, cx + r, cy + r, width=width, color=color)
+
+    def ellipse(self, x0, y0, x1, y1, width=None, color='fg'):
+        if width:
+            self.draw.ellipse(self._box(x0, y0, x1, y1), outline=self.colors[color], width=self._w(width))
+        else:
+            self.draw.ellipse(self._box(x0, y0, x1, y1), fill=self.colors[color])
+
+    def arc(self, x0, y0, x1, y1, start, end, width=4, color='fg'):
+        self.draw.arc(self._box(x0, y0, x1, y1), start, end, fill=self.colors[color], width=self._w(width))
+
+    def pieslice(self, x0, y0, x1, y1, start, end, color='fg'):
+        self.draw.pieslice(self._box(x0, y0, x1, y1), start, end, fill=self.colors[color])
+
+
+_overrides = None
+_overrides_lock = threading.Lock()
+
+
+def overrides():
+    """{name: path} of the override PNGs in ICONS_DIR; only plain names count."""
+    global _overrides
+    if _overrides is None:
+        with _overrides_lock:
+            if _overrides is None:
+                found = {}
+                try:
+                    with os.scandir(ICONS_DIR) as entries:
+                        for entry in entries:
+                            name, ext = os.path.splitext(entry.name)
+                            if ext == '.png' and _ICON_NAME.match(name) and entry.is_file():
+                                found[name] = entry.path
+                except OSError:
+                    pass
+                _overrides = found
+    return _overrides
+
+
+def icon_name(icon):
+    """Bundled/override icon name for an emoji or name, or None if we have no asset."""
+    if not icon or not isinstance(icon, str):
+        return None
+    icon = icon.strip().replace('\ufe0f', '')
+    name = EMOJI.get(icon, icon)
+    # Looked up by name only: the request never supplies a path
+    if name in ICONS or name in overrides():
+        return name
+    return None
+
+
+def _rgb(hex_color):
+    return tuple(int(hex_color[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def _rasterize(name, bg_hex, fg_hex):
+    bg, fg = _rgb(bg_hex), _rgb(fg_hex)
+    size = ICON_PX * _SUPERSAMPLE
+    override = overrides().get(name)
+    if override is not None:
+        tile = Image.new('RGBA', (ICON_PX, ICON_PX), bg + (255,))
+        with Image.open(override) as glyph:
+            glyph = glyph.convert('RGBA').resize((ICON_PX * 3 // 4, ICON_PX * 3 // 4), Image.LANCZOS)
+        offset = (ICON_PX - glyph.size[0]) // 2
+        tile.alpha_composite(glyph, (offset, offset))
+    else:
+        tile = Image.new('RGBA', (size, size), bg + (255,))
+        ICONS[name](_Pen(tile, fg + (255,), bg + (255,)))
+        tile = tile.resize((ICON_PX, ICON_PX), Image.LANCZOS)
+
+    out = io.BytesIO()
+    tile.convert('RGB').save(out, format='PNG', optimize=True)
+    return out.getvalue()
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def icon_png(icon, bg_hex, fg_hex):
+    """
+    PNG bytes of the icon tile (glyph in fg on a bg square), rasterized once
+    per host (or per process without shared assets) and color pair. None
+    when the icon isn't in the set, so the caller can fall back to drawing
+    the emoji as text.
+    """
+    name = icon_name(icon)
+    if name is None:
+        return None
+    shared = shared_assets.assets()
+    if shared is not None:
+        # One copy per host: every worker reads the tiles any of them rasterized
+        return shared.get_or_create(f'icon:{name}:{bg_hex}:{fg_hex}', lambda: _rasterize(name, bg_hex, fg_hex))
+    key = (name, bg_hex, fg_hex)
+    png = _cache.get(key)
+    if png is None:
+        png = _rasterize(name, bg_hex, fg_hex)
+        with _cache_lock:
+            _cache[key] = png
+    return png
+
+
+def warm(bg_hex, fg_hex):
+    """Pre-render the whole bundled set for one color pair."""
+    for name in ICONS:
+        icon_png(name, bg_hex, fg_hex)
@@ -0,0 +1,491 @@
+"""
+Images a payload references: remote URLs fetched concurrently, inline
+images (data: URIs in image_url, or an image_base64 field) decoded in
+place, all kept in the shared image cache. An inline image is cached
+under "sha256:<hex>" of its bytes, which later requests may send as
+image_url instead of the data while it is cached.
+
+Failing sources cost one timeout, not one per deck: a URL that failed is
+not tried again for IMAGE_FAILURE_TTL seconds (remembered in the shared
+cache), and a host that keeps failing is skipped by a per-process circuit
+breaker until it recovers.
+
+image_url is user input, so fetches only go to public addresses: every
+hop (redirects are followed here, one at a time) is resolved, refused if
+any address is loopback, private, link-local or otherwise reserved, and
+connected to the address that was checked. Hosts in IMAGE_PRIVATE_HOSTS
+are exempt, for images served from inside the network.
+"""
+import asyncio
+import binascii
+import hashlib
+import ipaddress
+import os
+import re
+import socket
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+import cache
+import metrics
+
+IMAGE_FETCH_TIMEOUT = float(os.environ.get('IMAGE_FETCH_TIMEOUT', '10'))
+IMAGE_MAX_BYTES = int(float(os.environ.get('IMAGE_MAX_MB', '20')) * 1024 * 1024)
+IMAGE_FETCH_CONCURRENCY = int(os.environ.get('IMAGE_FETCH_CONCURRENCY', '8'))
+IMAGE_CACHE_TTL = float(os.environ.get('IMAGE_CACHE_TTL', '600'))
+IMAGE_FAILURE_TTL = float(os.environ.get('IMAGE_FAILURE_TTL', '60'))
+IMAGE_BREAKER_FAILURES = int(os.environ.get('IMAGE_BREAKER_FAILURES', '5'))
+IMAGE_BREAKER_COOLDOWN = float(os.environ.get('IMAGE_BREAKER_COOLDOWN', '30'))
+IMAGE_MAX_REDIRECTS = int(os.environ.get('IMAGE_MAX_REDIRECTS', '5'))
+# Comma-separated hosts image_url may reach even though they resolve to private addresses
+IMAGE_PRIVATE_HOSTS = frozenset(
+    host.strip().lower() for host in os.environ.get('IMAGE_PRIVATE_HOSTS', '').split(',') if host.strip()
+)
+
+CONTENT_PREFIX = 'sha256:'
+_DECODE_CHUNK = 64 * 1024  # base64 characters per step, a multiple of 4
+_WHITESPACE = re.compile(r'\s')
+_WHITESPACE_CHARS = '\n\r \t'
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class ImageTooLarge(Exception):
+    """A remote image is bigger than IMAGE_MAX_MB."""
+
+
+class ImageBlocked(Exception):
+    """A remote image URL points somewhere fetches may not go."""
+
+
+class HostBreaker:
+    """
+    Per-host circuit breaker for image fetches. IMAGE_BREAKER_FAILURES host
+    failures in a row (connection errors, timeouts, 5xx, 429) open a host's
+    circuit: its fetches are skipped for IMAGE_BREAKER_COOLDOWN seconds,
+    then one trial fetch goes through. Success closes the circuit, failure
+    opens it for another cooldown.
+    """
+
+    _MAX_HOSTS = 4096
+
+    def __init__(self, failures=IMAGE_BREAKER_FAILURES, cooldown=IMAGE_BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._hosts = {}  # host -> [failures in a row, skipped until (monotonic)]
+
+    def allow(self, host):
+        """True if a fetch from host should be tried now."""
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None or state[0] < self.failures:
+                return True
+            now = time.monotonic()
+            if now < state[1]:
+                return False
+            state[1] = now + self.cooldown  # this fetch is the trial; the rest wait for its outcome
+            return True
+
+    def success(self, host):
+        with self._lock:
+            self._hosts.pop(host, None)
+
+    def failure(self, host):
+        with self._lock:
+            if host not in self._hosts and len(self._hosts) >= self._MAX_HOSTS:
+                self._hosts = {h: state for h, state in self._hosts.items() if state[0] >= self.failures}
+            state = self._hosts.setdefault(host, [0, 0.0])
+            state[0] += 1
+            if state[0] >= self.failures:
+                state[1] = time.monotonic() + self.cooldown
+            if state[0] == self.failures:
+                print(f"Image host {host} failing, skipping it for {self.cooldown:.0f}s at a time")
+                metrics.inc('image_circuit_opened_total')
+
+
+breaker = HostBreaker()
+
+
+def is_remote(ref):
+    return isinstance(ref, str) and ref.startswith(('http://', 'https://'))
+
+
+def is_inline(ref):
+    return isinstance(ref, str) and ref.startswith('data:')
+
+
+def is_content_ref(ref):
+    return isinstance(ref, str) and ref.startswith(CONTENT_PREFIX)
+
+
+def source_kind(ref):
+    """Where an image reference points: 'remote', 'inline', 'local' or 'none'."""
+    if not ref:
+        return 'none'
+    if is_remote(ref):
+        return 'remote'
+    if is_inline(ref) or is_content_ref(ref):
+        return 'inline'
+    return 'local'
+
+
+def _image_holders(data):
+    """The dicts in a payload that carry an image: slides and team members."""
+    for slide_data in data.get('slides', []):
+        yield slide_data
+        yield from slide_data.get('members') or []
+
+
+def image_refs(data):
+    """Every image reference in a create-presentation payload."""
+    for holder in _image_holders(data):
+        if holder.get('image_url'):
+            yield holder['image_url']
+
+
+def remote_refs(data):
+    """Distinct remote image URLs in a payload, in first-seen order."""
+    return list(dict.fromkeys(ref for ref in image_refs(data) if is_remote(ref)))
+
+
+def content_refs(data):
+    """Distinct "sha256:<hex>" image references in a payload."""
+    return list(dict.fromkeys(ref for ref in image_refs(data) if is_content_ref(ref)))
+
+
+def _decode_base64(text, start=0):
+    """
+    (bytearray, sha256 hex) of the base64 in text from start on, decoded
+    and hashed _DECODE_CHUNK characters at a time into one growing buffer,
+    which is returned as is: the only full-size copy is the decoded image.
+    """
+    if any(text.find(char, start) >= 0 for char in _WHITESPACE_CHARS):  # line-wrapped base64
+        text, start = _WHITESPACE.sub('', text[start:]), 0
+    if (len(text) - start) // 4 * 3 > IMAGE_MAX_BYTES:
+        raise ImageTooLarge(f"Inline image is larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB")
+    digest = hashlib.sha256()
+    body = bytearray()
+    for offset in range(start, len(text), _DECODE_CHUNK):
+        chunk = binascii.a2b_base64(text[offset:offset + _DECODE_CHUNK])
+        digest.update(chunk)
+        body += chunk
+    if not body:
+        raise ValueError("Inline image is empty")
+    return body, digest.hexdigest()
+
+
+def _text_key(text):
+    """sha256 of text, hashed a chunk at a time."""
+    digest = hashlib.sha256()
+    for offset in range(0, len(text), _DECODE_CHUNK):
+        digest.update(text[offset:offset + _DECODE_CHUNK].encode('utf-8'))
+    return digest.digest()
+
+
+def _decode_inline(text, is_base64_field):
+    """(image bytes or bytearray, sha256 hex) of an image_base64 value or a data: URI."""
+    if is_base64_field:
+        return _decode_base64(text)
+    comma = text.find(',')
+    if comma < 0:
+        raise ValueError("Malformed data URI")
+    if text[:comma].endswith(';base64'):
+        return _decode_base64(text, comma + 1)
+    body = urllib.parse.unquote_to_bytes(text[comma + 1:])
+    if len(body) > IMAGE_MAX_BYTES:
+        raise ImageTooLarge(f"Inline image is larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB")
+    return body, hashlib.sha256(body).hexdigest()
+
+
+def decode_inline_images(data):
+    """
+    Decode a payload's inline images in place: each image_url data: URI or
+    image_base64 field becomes image_url "sha256:<hex>", and the text is
+    dropped from the payload as soon as it is decoded. Returns {ref: bytes}
+    with one entry per distinct image, however many slides repeat it.
+    """
+    refs = {}  # text hash -> ref, so a repeated image is decoded once (without keeping its text)
+    found = {}
+    for holder in _image_holders(data):
+        text = holder.pop('image_base64', None)
+        is_base64_field = text is not None
+        if not is_base64_field:
+            if not is_inline(holder.get('image_url')):
+                continue
+            text = holder['image_url']
+        text_key = _text_key(text)
+        ref = refs.get(text_key)
+        if ref is None:
+            try:
+                blob, digest = _decode_inline(text, is_base64_field)
+                ref = f'{CONTENT_PREFIX}{digest}'
+                found[ref] = blob
+            except (ValueError, ImageTooLarge) as e:  # binascii.Error is a ValueError
+                _record_failure(f'{text[:32]}...', e)
+                ref = ''  # rendered as a placeholder
+            refs[text_key] = ref
+        holder['image_url'] = ref
+    return found
+
+
+def _read_limited(chunks, url):
+    body = bytearray()
+    for chunk in chunks:
+        body += chunk
+        if len(body) > IMAGE_MAX_BYTES:
+            raise ImageTooLarge(f"Image {url} is larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB")
+    return bytes(body)
+
+
+def _client_options():
+    return {
+        'timeout': IMAGE_FETCH_TIMEOUT,
+        # Redirects are followed in fetch_image, so each hop's address is checked
+        'follow_redirects': False,
+        'limits': httpx.Limits(max_connections=IMAGE_FETCH_CONCURRENCY * 4),
+    }
+
+
+def sync_client():
+    """Process wide connection-pooling client, created lazily (after any fork)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = httpx.Client(**_client_options())
+        return _client
+
+
+def async_client():
+    """New pooled client for an event loop; the caller owns and closes it."""
+    return httpx.AsyncClient(**_client_options())
+
+
+def _is_public(address):
+    address = ipaddress.ip_address(address.split('%', 1)[0])  # drop an IPv6 zone
+    if getattr(address, 'ipv4_mapped', None):
+        address = address.ipv4_mapped
+    return address.is_global and not address.is_multicast
+
+
+def _target(url):
+    """(httpx.URL, host, port) of a URL fetches may be made to, or ImageBlocked."""
+    target = httpx.URL(url)
+    if target.scheme not in ('http', 'https') or not target.raw_host:
+        raise ImageBlocked(f"Image URL {url} is not an http(s) URL")
+    host = target.raw_host.decode('ascii').lower()
+    return target, host, target.port or (443 if target.scheme == 'https' else 80)
+
+
+def _pinned(target, host, addresses):
+    """
+    (url, request options) that connect to the first of addresses while
+    still naming host in the Host header and TLS server name, or
+    ImageBlocked if any address is not public.
+    """
+    if host in IMAGE_PRIVATE_HOSTS:
+        return target, {}
+    addresses = [info[4][0] for info in addresses]
+    blocked = [address for address in addresses if not _is_public(address)]
+    if blocked or not addresses:
+        raise ImageBlocked(f"Image host {host} resolves to a non-public address {blocked[0] if blocked else ''}")
+    options = {'headers': {'Host': target.netloc.decode('ascii')}}
+    if target.scheme == 'https':
+        try:
+            ipaddress.ip_address(host.strip('[]'))
+        except ValueError:
+            options['extensions'] = {'sni_hostname': host}
+    return target.copy_with(host=addresses[0].split('%', 1)[0]), options
+
+
+def _redirect(target, response):
+    """The next URL of a redirect response."""
+    return str(target.join(response.headers['location']))
+
+
+def _resolve(host, port):
+    return socket.getaddrinfo(host.strip('[]'), port, type=socket.SOCK_STREAM)
+
+
+def fetch_image(url, client=None):
+    client = client or sync_client()
+    for _ in range(IMAGE_MAX_REDIRECTS + 1):
+        target, host, port = _target(url)
+        pinned, options = _pinned(target, host, _resolve(host, port))
+        with client.stream('GET', pinned, **options) as response:
+            if response.is_redirect:
+                url = _redirect(target, response)
+                continue
+            response.raise_for_status()
+            return _read_limited(response.iter_bytes(), url)
+    raise ImageBlocked(f"Image {url} redirected more than {IMAGE_MAX_REDIRECTS} times")
+
+
+async def fetch_image_async(url, client):
+    loop = asyncio.get_running_loop()
+    for _ in range(IMAGE_MAX_REDIRECTS + 1):
+        target, host, port = _target(url)
+        addresses = await loop.getaddrinfo(host.strip('[]'), port, type=socket.SOCK_STREAM)
+        pinned, options = _pinned(target, host, addresses)
+        async with client.stream('GET', pinned, **options) as response:
+            if response.is_redirect:
+                url = _redirect(target, response)
+                continue
+            response.raise_for_status()
+            body = bytearray()
+            async for chunk in response.aiter_bytes():
+                body += chunk
+                if len(body) > IMAGE_MAX_BYTES:
+                    raise ImageTooLarge(f"Image {url} is larger than {IMAGE_MAX_BYTES // (1024 * 1024)} MB")
+            return bytes(body)
+    raise ImageBlocked(f"Image {url} redirected more than {IMAGE_MAX_REDIRECTS} times")
+
+
+def _record_failure(url, error):
+    print(f"Could not fetch image {url}: {error}")
+    metrics.inc('image_fetch_errors_total')
+
+
+def _host(url):
+    return urllib.parse.urlsplit(url).hostname or ''
+
+
+def _host_fault(error):
+    """True if error says the host is unwell, not just that this URL is bad."""
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500 or error.response.status_code == 429
+    return isinstance(error, httpx.TransportError)
+
+
+def _fetch_failed(url, error):
+    _record_failure(url, error)
+    if _host_fault(error):
+        breaker.failure(_host(url))
+    else:
+        breaker.success(_host(url))  # it answered
+
+
+def _skipped(url, reason):
+    print(f"Skipped image {url}: {reason.replace('_', ' ')}")
+    metrics.inc('image_fetch_skipped_total', reason=reason)
+
+
+def _without_recent_failures(shared, urls):
+    """urls minus those that failed within IMAGE_FAILURE_TTL, on any worker sharing the cache."""
+    if not IMAGE_FAILURE_TTL:
+        return urls
+    failed = shared.get_many('image-failure', urls)
+    for url in failed:
+        _skipped(url, 'recent_failure')
+    return [url for url in urls if url not in failed]
+
+
+def _remember_failures(shared, failures):
+    if IMAGE_FAILURE_TTL:
+        for url, error in failures.items():
+            shared.set('image-failure', url, str(error).encode('utf-8'), IMAGE_FAILURE_TTL)
+
+
+def _cached(shared, data, inline):
+    """Cached bytes of the payload's remote URLs and of content refs it did not send inline."""
+    refs = [ref for ref in content_refs(data) if ref not in inline]
+    cached = shared.get_many('image', remote_refs(data) + refs)
+    for ref in refs:
+        if ref not in cached:
+            _record_failure(ref, 'not in the image cache')
+    return cached
+
+
+def _store_inline(shared, inline):
+    for ref, blob in inline.items():
+        shared.set('image', ref, blob, IMAGE_CACHE_TTL)
+
+
+def fetch_images(data):
+    """
+    Fetch a payload's remote images concurrently on a thread pool, and
+    decode its inline ones (decode_inline_images). Returns {ref: bytes}
+    for the images that loaded; the rest fall back to placeholders when
+    the deck is rendered.
+    """
+    inline = decode_inline_images(data)
+    if not inline and not remote_refs(data) and not content_refs(data):
+        return {}
+    shared = cache.backend()
+    cached = _cached(shared, data, inline)
+    _store_inline(shared, inline)
+    cached.update(inline)
+    urls = [url for url in remote_refs(data) if url not in cached]
+    if urls:
+        urls = _without_recent_failures(shared, urls)
+    if not urls:
+        return cached
+
+    def _fetch(url):
+        """(url, bytes or None, error or None)"""
+        if not breaker.allow(_host(url)):
+            _skipped(url, 'circuit_open')
+            return url, None, None
+        try:
+            blob = fetch_image(url)
+        except Exception as e:
+            _fetch_failed(url, e)
+            return url, None, e
+        breaker.success(_host(url))
+        return url, blob, None
+
+    with ThreadPoolExecutor(max_workers=min(len(urls), IMAGE_FETCH_CONCURRENCY)) as pool:
+        results = list(pool.map(_fetch, urls))
+    fetched = {url: blob for url, blob, _ in results if blob is not None}
+    for url, blob in fetched.items():
+        shared.set('image', url, blob, IMAGE_CACHE_TTL)
+    _remember_failures(shared, {url: error for url, _, error in results if error is not None})
+    return {**cached, **fetched}
+
+
+async def fetch_images_async(data, client):
+    """Event loop version of fetch_images: all downloads multiplex on one loop."""
+    # Decoding is CPU work, and file and Redis backends block, so both run off the loop
+    inline = await asyncio.to_thread(decode_inline_images, data)
+    if not inline and not remote_refs(data) and not content_refs(data):
+        return {}
+    shared = cache.backend()
+    cached = await asyncio.to_thread(_cached, shared, data, inline)
+    if inline:
+        await asyncio.to_thread(_store_inline, shared, inline)
+    cached.update(inline)
+    urls = [url for url in remote_refs(data) if url not in cached]
+    if urls:
+        urls = await asyncio.to_thread(_without_recent_failures, shared, urls)
+    semaphore = asyncio.Semaphore(IMAGE_FETCH_CONCURRENCY)
+
+    async def _fetch(url):
+        async with semaphore:
+            if not breaker.allow(_host(url)):
+                _skipped(url, 'circuit_open')
+                return url, None, None
+            try:
+                blob = await fetch_image_async(url, client)
+            except Exception as e:
+                _fetch_failed(url, e)
+                return url, None, e
+            breaker.success(_host(url))
+            return url, blob, None
+
+    results = await asyncio.gather(*(_fetch(url) for url in urls))
+    fetched = {url: blob for url, blob, _ in results if blob is not None}
+    failures = {url: error for url, _, error in results if error is not None}
+
+    def _store():
+        for url, blob in fetched.items():
+            shared.set('image', url, blob, IMAGE_CACHE_TTL)
+        _remember_failures(shared, failures)
+
+    if fetched or failures:
+        await asyncio.to_thread(_store)
+    return {**cached, **fetched}
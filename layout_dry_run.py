@@ -0,0 +1,314 @@
+"""
+Layout dry run: the create-presentation payload goes through the slide
+methods of CorporatePresentation against a geometry recorder instead of
+python-pptx, so grid selection, font buckets and truncation run exactly as
+in a render, with no XML, images or zip. Used by POST /layout.
+"""
+import math
+
+from pptx.enum.text import MSO_ANCHOR
+from pptx.util import Emu
+
+import admission
+import images
+import render
+import slide_layouts
+import slide_library
+import themes
+from corporate_template import CorporatePresentation
+from text_styles import SIZES
+
+SLIDE_WIDTH = 10.0
+SLIDE_HEIGHT = 7.5
+
+# Average glyph width of the brand sans fonts, in ems; good enough to flag
+# text that clearly will not fit, not to lay it out
+CHAR_WIDTH_EM = 0.52
+LINE_HEIGHT_EM = 1.2
+INSET_X = 0.1  # python-pptx/PowerPoint default text insets, inches
+INSET_Y = 0.05
+
+# Lists the slide methods cut short: (slide type, path to the list, shown)
+TRUNCATED_LISTS = (
+    ('timeline', ('milestones',), 6),
+    ('comparison', ('left_side', 'items'), 6),
+    ('comparison', ('right_side', 'items'), 6),
+    ('comparison', ('middle_side', 'items'), 6),
+)
+
+
+def _inches(length):
+    return round(Emu(int(length)).inches, 3)
+
+
+class _Stub:
+    """Takes any attribute, item, call or assignment the styling code makes."""
+
+    def __init__(self):
+        object.__setattr__(self, '_items', {})
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        stub = _Stub()
+        object.__setattr__(self, name, stub)
+        return stub
+
+    def __getitem__(self, key):
+        return self._items.setdefault(key, _Stub())
+
+    def __call__(self, *args, **kwargs):
+        return _Stub()
+
+    def __iter__(self):
+        return iter(())
+
+
+class _RecordedShape(_Stub):
+    """A shape on a recorded slide; text set on its text frame is read back at the end."""
+
+    def __init__(self, record):
+        super().__init__()
+        object.__setattr__(self, 'record', record)
+
+    def finish(self):
+        fill = _recorded(self, 'fill', 'fore_color', 'rgb')
+        line = _recorded(self, 'line', 'fill', 'fore_color', 'rgb')
+        if fill is not None:
+            self.record['fill'] = str(fill)
+        if line is not None:
+            self.record['line'] = str(line)
+        text = _recorded(self, 'text_frame', 'text')
+        if isinstance(text, str):
+            self.record['text'] = text
+            size = _recorded(self, 'text_frame', 'paragraphs', 0, 'font', 'size')
+            if size is not None:
+                self.record['size'] = size.pt
+
+
+def _recorded(stub, *path):
+    """The value assigned at stub.<path> (ints index items), or None if it never was."""
+    for key in path:
+        stub = stub._items.get(key) if isinstance(key, int) else stub.__dict__.get(key)
+        if stub is None:
+            return None
+    return None if isinstance(stub, _Stub) else stub
+
+
+class _Placeholder:
+    """Title and subtitle placeholders: their boxes come from the layout."""
+
+    def __init__(self, slide, name, box, size):
+        self._slide, self._name, self._box, self._size = slide, name, box, size
+        self._element = _Stub()
+
+    @property
+    def text(self):
+        return ''
+
+    @text.setter
+    def text(self, value):
+        self._slide.record('placeholder', [float(v) for v in self._box], name=self._name, text=value, size=self._size)
+
+
+class _RecordingShapes:
+    def __init__(self, slide):
+        self._slide = slide
+        self.turbo_add_enabled = True
+
+    @property
+    def title(self):
+        if self._slide.layout == slide_layouts.TITLE_LAYOUT:
+            return _Placeholder(self._slide, 'Title', slide_layouts.TITLE_BOX, slide_layouts.TITLE_SIZE)
+        return _Placeholder(self._slide, 'Title', slide_layouts.CONTENT_TITLE_BOX, slide_layouts.CONTENT_TITLE_SIZE)
+
+    def _add(self, kind, left, top, width, height, **fields):
+        record = self._slide.record(kind, [_inches(left), _inches(top), _inches(width), _inches(height)], **fields)
+        shape = _RecordedShape(record)
+        self._slide.shapes_added.append(shape)
+        return shape
+
+    def add_shape(self, shape_type, left, top, width, height):
+        return self._add('shape', left, top, width, height, geometry=str(shape_type).split(' ')[0])
+
+    def add_picture(self, image_file, left, top, width=None, height=None):
+        if not image_file:
+            raise ValueError('No image')  # the real render falls back to a placeholder box
+        if isinstance(image_file, str):
+            return self._add('picture', left, top, width, height, src=image_file)
+        shape = self._add('picture', left, top, width, height)
+        self._slide.images[len(self._slide.boxes) - 1] = image_file.getvalue()  # icon tiles
+        return shape
+
+    def add_chart(self, chart_type, x, y, cx, cy, chart_data):
+        points = sum(len(series.values) for series in chart_data)
+        return self._add('chart', x, y, cx, cy, chart_points=points)
+
+
+class _RecordingSlide:
+    def __init__(self, layout):
+        self.layout = layout
+        self.boxes = []
+        self.shapes_added = []
+        self.images = {}  # index in boxes -> image bytes, for previews
+        self.shapes = _RecordingShapes(self)
+        self.placeholders = {1: _Placeholder(self, 'Subtitle', slide_layouts.SUBTITLE_BOX, slide_layouts.SUBTITLE_SIZE)}
+
+    def record(self, kind, box, **fields):
+        record = {'kind': kind, 'box': box, **fields}
+        self.boxes.append(record)
+        return record
+
+
+class LayoutRecorder(CorporatePresentation):
+    """CorporatePresentation that records slide geometry instead of building a deck."""
+
+    def __init__(self, theme=None):
+        self.theme = themes.get_theme(theme)
+        self.images = {}
+        for name, color in self.theme.colors.items():
+            setattr(self, name, color)
+        self.FONT_NAME = self.theme.font_name
+        self.title_layout = slide_layouts.TITLE_LAYOUT
+        self.content_layout = slide_layouts.CONTENT_LAYOUT
+        self.quote_layout = slide_layouts.QUOTE_LAYOUT
+        self.slides = []
+
+    def _new_slide(self, layout):
+        slide = _RecordingSlide(layout)
+        self.slides.append(slide)
+        return slide
+
+    def _add_picture(self, slide, image_url, left, top, width=None, height=None):
+        return slide.shapes.add_picture(image_url, left, top, width, height)
+
+    def _image_failed(self, image_url, error):
+        pass  # nothing was loaded, so nothing failed
+
+    def _add_text(self, slide, text, left, top, width, height, style='body', size=None, bold=False, anchor=None, wrap=False):
+        slide.record(
+            'text', [_inches(left), _inches(top), _inches(width), _inches(height)], text=str(text), style=style,
+            size=size.pt if size is not None else SIZES[style] / 100, bold=bool(bold), wrap=bool(wrap),
+            anchor=MSO_ANCHOR.to_xml(anchor) if anchor is not None else 't',
+        )
+
+    def _add_footer(self, slide, slide_number):
+        slide.record('slide_number', [float(v) for v in slide_layouts.SLIDE_NUMBER_BOX], text=str(slide_number),
+                     size=slide_layouts.SLIDE_NUMBER_SIZE)
+
+
+def _text_warnings(record):
+    """Estimated overflow of a text box, as warning dicts."""
+    left, top, width, height = record['box']
+    size_in = record['size'] / 72
+    lines = str(record['text']).replace('\v', '\n').split('\n')
+    widths = [len(line) * CHAR_WIDTH_EM * size_in for line in lines]
+    inner = max(width - 2 * INSET_X, 0.01)
+    wraps = record.get('wrap') or record['kind'] == 'placeholder'
+
+    warnings = []
+    if wraps:
+        line_count = sum(max(math.ceil(w / inner), 1) for w in widths)
+        needed = line_count * size_in * LINE_HEIGHT_EM + 2 * INSET_Y
+        if needed > height + 0.01:
+            warnings.append({'type': 'overflow', 'text': record['text'][:60],
+                             'message': f"Text needs about {needed:.2f}in of height, box has {height:.2f}in"})
+    elif max(widths) > inner + 0.01:
+        needed = max(widths) + 2 * INSET_X
+        warnings.append({'type': 'overflow', 'text': record['text'][:60],
+                         'message': f"Text is about {needed:.2f}in wide, box is {width:.2f}in"})
+        if left + (width + needed) / 2 > SLIDE_WIDTH:
+            warnings.append({'type': 'off_slide', 'text': record['text'][:60],
+                             'message': "Text runs past the right edge of the slide"})
+    return warnings
+
+
+def _slide_warnings(slide):
+    warnings = []
+    for record in slide.boxes:
+        left, top, width, height = record['box']
+        if left < -0.01 or top < -0.01 or left + width > SLIDE_WIDTH + 0.01 or top + height > SLIDE_HEIGHT + 0.01:
+            warnings.append({'type': 'off_slide', 'text': str(record.get('text', record['kind']))[:60],
+                             'message': f"{record['kind'].capitalize()} box {record['box']} extends past the slide"})
+        if record.get('text') and record['kind'] in ('text', 'placeholder'):
+            warnings.extend(_text_warnings(record))
+    return warnings
+
+
+def _truncation_warnings(slide_data):
+    warnings = []
+    for slide_type, path, shown in TRUNCATED_LISTS:
+        if slide_data.get('type') != slide_type:
+            continue
+        value = slide_data
+        for key in path:
+            value = (value or {}).get(key)
+        if value and len(value) > shown:
+            warnings.append({'type': 'truncated', 'field': '.'.join(path),
+                             'message': f"{len(value) - shown} of {len(value)} {path[-1]} are not shown (limit {shown})"})
+    return warnings
+
+
+def _resolved(data):
+    """
+    data with each library slide replaced by its registered spec (tagged
+    with library_id), which is what the render splices in; UnknownSlide for
+    an id that is not registered.
+    """
+    if not slide_library.referenced(data):
+        return data
+    slides = []
+    for slide_data in data.get('slides', []):
+        if slide_data.get('type') == slide_library.LIBRARY_TYPE:
+            spec = dict(slide_library.spec(slide_data.get('id')), library_id=slide_data.get('id'))
+            if 'slide_number' in slide_data:
+                spec['slide_number'] = slide_data['slide_number']
+            slide_data = spec
+        slides.append(slide_data)
+    return dict(data, slides=slides)
+
+
+def record(data):
+    """[(recorded slide, slide spec)] for a create-presentation payload, in deck order."""
+    data = _resolved(data)
+    deck = render.build_presentation(data, deck=LayoutRecorder(data.get('theme')))
+    specs = [{'type': 'title'}]
+    if data.get('sections'):
+        specs.append({'type': 'table_of_contents'})
+    specs += [s for s in data.get('slides', []) if s.get('type') in render.SLIDE_TYPES]
+    for slide in deck.slides:
+        for shape in slide.shapes_added:
+            shape.finish()
+    return list(zip(deck.slides, specs))
+
+
+def dry_run(data):
+    """Per-slide geometry, font sizes and warnings for a create-presentation payload, plus its cost."""
+    cost = admission.estimate_cost(data)  # TooLarge for payloads a render would refuse
+
+    slides = []
+    shape_count = picture_count = chart_points = 0
+    for index, (slide, slide_data) in enumerate(record(data)):
+        warnings = _truncation_warnings(slide_data) + _slide_warnings(slide)
+        shape_count += len(slide.boxes)
+        picture_count += sum(1 for record in slide.boxes if record['kind'] == 'picture')
+        chart_points += sum(record.get('chart_points', 0) for record in slide.boxes)
+        entry = {'index': index, 'type': slide_data.get('type'), 'layout': slide.layout,
+                 'shapes': slide.boxes, 'warnings': warnings}
+        if slide_data.get('library_id'):
+            entry['library_id'] = slide_data['library_id']
+        slides.append(entry)
+
+    return {
+        'slide_size': [SLIDE_WIDTH, SLIDE_HEIGHT],
+        'slides': slides,
+        'cost': {
+            'slides': len(slides),
+            'shapes': shape_count,
+            'pictures': picture_count,
+            'remote_images': len(images.remote_refs(data)),
+            'chart_points': chart_points,
+            'admission_units': round(cost, 2),
+            'estimated_ms': round(cost * admission.controller.seconds_per_unit * 1000, 1),
+        },
+    }
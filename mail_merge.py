@@ -0,0 +1,306 @@
+"""
+Mail merge: one deck spec with {{placeholders}} rendered once per data row.
+
+Slides without placeholders are rendered a single time into a static deck
+and spliced into every row's deck at zip level (pptx_zip); only the slides
+that bind row data go through python-pptx per row.
+
+    python mail_merge.py deck.json rows.csv -o out/ [--workers 8]
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import admission
+import file_media
+import images
+import pptx_zip
+import render
+import slide_library
+
+MERGE_WORKERS = int(os.environ.get('MERGE_WORKERS', '1'))
+MERGE_MAX_ROWS = int(os.environ.get('MERGE_MAX_ROWS', '1000'))
+MERGE_CHUNK_ROWS = int(os.environ.get('MERGE_CHUNK_ROWS', '16'))
+
+ROW_FORMATS = ('json', 'jsonl', 'csv')
+
+_FIELD = re.compile(r'\{\{\s*([^{}]+?)\s*\}\}')
+
+
+class MergeError(ValueError):
+    """Bad merge input: unreadable rows or a placeholder a row has no value for."""
+
+
+def load_rows(source, fmt=None):
+    """
+    Rows from a list of dicts, or from JSON / JSONL / CSV text. fmt is one of
+    ROW_FORMATS; None guesses from the text.
+    """
+    if isinstance(source, list):
+        rows = source
+    elif not isinstance(source, (str, bytes)):
+        raise MergeError("Rows must be a list of objects, or JSON, JSONL or CSV text")
+    else:
+        try:
+            text = source.decode('utf-8-sig') if isinstance(source, bytes) else source
+        except UnicodeDecodeError as e:
+            raise MergeError(f"Rows are not UTF-8 text: {e}") from None
+        if fmt is None:
+            stripped = text.lstrip()
+            fmt = 'json' if stripped.startswith('[') else 'jsonl' if stripped.startswith('{') else 'csv'
+        try:
+            if fmt == 'json':
+                rows = json.loads(text)
+            elif fmt == 'jsonl':
+                rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+            elif fmt == 'csv':
+                rows = list(csv.DictReader(io.StringIO(text)))
+            else:
+                raise MergeError(f"Unknown rows format {fmt!r}, expected one of {', '.join(ROW_FORMATS)}")
+        except (json.JSONDecodeError, csv.Error) as e:
+            raise MergeError(f"Could not read {fmt} rows: {e}") from None
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise MergeError("Rows must be a list of objects")
+    return rows
+
+
+def estimate_cost(spec, rows):
+    """Admission cost of a merge: the static deck once, plus one deck per row."""
+    if len(rows) > MERGE_MAX_ROWS:
+        raise admission.TooLarge(f"Merge has {len(rows)} rows, limit is {MERGE_MAX_ROWS}")
+    return admission.estimate_cost(spec) * (1 + len(rows))
+
+
+def has_fields(value):
+    """True if value (any JSON structure) contains a {{placeholder}}."""
+    if isinstance(value, str):
+        return _FIELD.search(value) is not None
+    if isinstance(value, dict):
+        return any(has_fields(v) for v in value.values())
+    if isinstance(value, list):
+        return any(has_fields(v) for v in value)
+    return False
+
+
+def _lookup(row, name):
+    if name in row:
+        return row[name]
+    value = row
+    for key in name.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            raise MergeError(f"Row has no value for {{{{{name}}}}}")
+        value = value[key]
+    return value
+
+
+def fill(value, row):
+    """
+    Copy of value with placeholders replaced from row. A string that is
+    exactly one placeholder takes the row value as is (numbers, lists).
+    """
+    if isinstance(value, str):
+        whole = _FIELD.fullmatch(value)
+        if whole:
+            return _lookup(row, whole.group(1))
+        return _FIELD.sub(lambda m: str(_lookup(row, m.group(1))), value)
+    if isinstance(value, dict):
+        return {k: fill(v, row) for k, v in value.items()}
+    if isinstance(value, list):
+        return [fill(v, row) for v in value]
+    return value
+
+
+def _number(value, series):
+    try:
+        return float(value)
+    except ValueError:
+        raise MergeError(f"Chart series {series!r} has a non-numeric value {value!r}") from None
+
+
+def _numeric_chart_values(data):
+    # CSV cells are strings; charts need numbers
+    for slide_data in data.get('slides', []):
+        if slide_data.get('type') == 'chart':
+            for series in (slide_data.get('chart_data') or {}).get('series', []):
+                values = series.get('values', [])
+                if not isinstance(values, list):
+                    raise MergeError(f"Chart series {series.get('name')!r} values must be a list")
+                series['values'] = [_number(v, series.get('name')) if isinstance(v, str) else v for v in values]
+
+
+def _blanked(data, indexes):
+    """data with the slides at indexes replaced by blank slides (to be spliced over)."""
+    data = dict(data)
+    data['slides'] = [{'type': 'blank'} if i in indexes else s for i, s in enumerate(data.get('slides', []))]
+    return data
+
+
+def _offset(data):
+    # Title slide, then the table of contents when there are sections
+    return 1 + bool(data.get('sections'))
+
+
+class MergeTemplate:
+    """A deck spec prepared for merging: static slides rendered once."""
+
+    def __init__(self, spec, static_blob=None):
+        self.spec = spec
+        slides = spec.get('slides', [])
+        if any(has_fields(s.get('type')) for s in slides):
+            raise MergeError("Slide types cannot be placeholders")
+        # Unknown types render nothing in either deck and are left alone;
+        # a bound theme changes every slide, so then nothing is shared
+        known = [i for i, s in enumerate(slides) if s.get('type') in render.SLIDE_TYPES]
+        themed = has_fields(spec.get('theme'))
+        self.static = [] if themed else [i for i in known if not has_fields(slides[i])]
+        self.bound = set(known) - set(self.static)
+        # Deck position of each known slide, past the title and contents slides
+        self.positions = {i: _offset(spec) + n for n, i in enumerate(known)}
+
+        if self.static and static_blob is None:
+            static_blob = self._render_static()
+        self.static_blob = static_blob
+        self._static_pkg = pptx_zip.Package(static_blob) if static_blob else None
+
+    def _render_static(self):
+        data = _blanked({
+            'theme': self.spec.get('theme'),
+            'sections': self.spec.get('sections'),
+            'slides': self.spec.get('slides', []),
+        }, self.bound)
+        return render.render_presentation(data, images.fetch_images(data)).getvalue()
+
+    def render(self, row):
+        """(filled deck spec, pptx bytes) for one row."""
+        data = fill(self.spec, row)
+        file_media.check(data)  # a row may fill in an image path
+        _numeric_chart_values(data)
+        rendered = _blanked(data, set(self.static))
+        blob = render.render_presentation(rendered, images.fetch_images(rendered)).getvalue()
+        if not self.static:
+            return data, blob
+
+        pkg = pptx_zip.Package(blob)
+        # A bound sections list may come out empty for some rows
+        shift = _offset(data) - _offset(self.spec)
+        for i in self.static:
+            pkg.replace_slide(self.positions[i] + shift, self._static_pkg, self.positions[i])
+        return data, pkg.save()
+
+
+def filename_width(rows):
+    return max(len(str(len(rows))), 3)
+
+
+def deck_filename(index, data, width=5):
+    title = re.sub(r'[^\w.-]+', '_', str(data.get('title') or 'presentation')).strip('_')[:80]
+    return f"{index + 1:0{width}d}_{title or 'presentation'}.pptx"
+
+
+_templates = {}
+
+
+def _template(spec, static_blob):
+    """MergeTemplate for spec, kept per process so pool workers prepare it once."""
+    key = hashlib.sha1(json.dumps([spec, slide_library.versions(spec)], sort_keys=True).encode()).hexdigest()
+    template = _templates.get(key)
+    if template is None:
+        _templates.clear()
+        template = _templates[key] = MergeTemplate(spec, static_blob)
+    return template
+
+
+def static_deck(spec):
+    """Render the static slides of spec once; None when every slide is bound."""
+    return _template(spec, None).static_blob
+
+
+def render_chunk(spec, static_blob, start, rows):
+    """Render rows (numbered from start) into [(row index, filled spec, pptx bytes)]."""
+    template = _template(spec, static_blob)
+    return [(start + offset, *template.render(row)) for offset, row in enumerate(rows)]
+
+
+def chunks(rows):
+    return [(start, rows[start:start + MERGE_CHUNK_ROWS]) for start in range(0, len(rows), MERGE_CHUNK_ROWS)]
+
+
+def _warm_worker():
+    import render  # noqa: F401  (import python-pptx and friends once per pool process)
+
+
+def merge(spec, rows, workers=MERGE_WORKERS):
+    """
+    Yield (row index, filled spec, pptx bytes) for every row, in row order.
+    With workers > 1, chunks of rows are rendered on a process pool.
+    """
+    static_blob = static_deck(spec)
+    if workers <= 1 or len(rows) <= MERGE_CHUNK_ROWS:
+        yield from render_chunk(spec, static_blob, 0, rows)
+        return
+
+    # spawn, not fork: web workers run threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_warm_worker,
+    ) as pool:
+        futures = [pool.submit(render_chunk, spec, static_blob, start, chunk) for start, chunk in chunks(rows)]
+        for future in futures:
+            yield from future.result()
+
+
+def write_zip(spec, rows, fileobj, workers=MERGE_WORKERS):
+    """Merge rows into a zip of decks written to fileobj; returns the deck count."""
+    width = filename_width(rows)
+    count = 0
+    # Decks are already deflated; storing them keeps this I/O bound
+    with zipfile.ZipFile(fileobj, 'w', zipfile.ZIP_STORED) as z:
+        for index, data, blob in merge(spec, rows, workers):
+            z.writestr(deck_filename(index, data, width), blob)
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('deck', help='deck spec (create-presentation JSON with {{placeholders}})')
+    parser.add_argument('rows', help='rows file (.json, .jsonl or .csv)')
+    parser.add_argument('-o', '--output', default='merged', help='output directory, or a .zip file')
+    parser.add_argument('--format', choices=ROW_FORMATS, help='rows format (default: from the file extension)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    with open(args.deck) as f:
+        spec = json.load(f)
+    with open(args.rows, 'rb') as f:
+        fmt = args.format or os.path.splitext(args.rows)[1].lstrip('.').lower()
+        rows = load_rows(f.read(), fmt if fmt in ROW_FORMATS else None)
+
+    started = time.perf_counter()
+    if args.output.endswith('.zip'):
+        with open(args.output, 'wb') as f:
+            count = write_zip(spec, rows, f, args.workers)
+    else:
+        os.makedirs(args.output, exist_ok=True)
+        width = filename_width(rows)
+        count = 0
+        for index, data, blob in merge(spec, rows, args.workers):
+            with open(os.path.join(args.output, deck_filename(index, data, width)), 'wb') as f:
+                f.write(blob)
+            count += 1
+    elapsed = time.perf_counter() - started
+    print(f"Merged {count} decks into {args.output} in {elapsed:.2f}s ({elapsed / max(count, 1) * 1000:.1f} ms/deck)")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import os
+import threading
+import tracemalloc
+
+import metrics
+
+MB = 1024 * 1024
+
+# Hard per-request ceiling on traced Python allocations (0 disables it)
+REQUEST_MEMORY_LIMIT = int(float(os.environ.get('REQUEST_MEMORY_LIMIT_MB', '0')) * MB)
+# Worker RSS above which gunicorn recycles the worker after the current request
+WORKER_SOFT_LIMIT = int(float(os.environ.get('WORKER_SOFT_LIMIT_MB', '0')) * MB)
+# tracemalloc slows allocation down, so accounting is only on when asked for or a ceiling is set
+TRACK_MEMORY = os.environ.get('TRACK_REQUEST_MEMORY', '').lower() in ('1', 'true', 'yes') or REQUEST_MEMORY_LIMIT > 0
+
+_local = threading.local()
+# Requests being tracked in this process; the peak is reset only under the lock
+_tracked = set()
+_tracked_lock = threading.Lock()
+
+
+class MemoryLimitExceeded(Exception):
+    """Raised at a render checkpoint once a request passes REQUEST_MEMORY_LIMIT."""
+
+    status_code = 507
+
+    def __init__(self, used, limit):
+        # Keep (used, limit) as args so the exception pickles back from a render pool
+        super().__init__(used, limit)
+        self.used = used
+        self.limit = limit
+
+    def __str__(self):
+        return (
+            f"Presentation exceeded the per-request memory limit "
+            f"({self.used / MB:.1f} MB used, limit {self.limit / MB:.1f} MB)"
+        )
+
+
+class RequestMemory:
+    """
+    Tracks Python allocations made while rendering one request with tracemalloc.
+    tracemalloc is process wide, so a request's figure is the process's traced
+    peak over the request's lifetime, less what was traced when it started.
+    With one request per worker (sync workers, render pool processes) that is
+    exact. With threaded workers it includes whatever the overlapping requests
+    allocated too, so it errs high, and the ceiling applies to them together.
+    """
+
+    def __init__(self, limit=REQUEST_MEMORY_LIMIT, enabled=TRACK_MEMORY):
+        self.limit = limit
+        self.enabled = enabled
+        self.baseline = 0
+        self.peak = 0
+
+    def __enter__(self):
+        if self.enabled:
+            with _tracked_lock:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start()
+                # Fold the peak so far into the requests in flight before resetting
+                # it, so starting this request never hides their peaks
+                current, peak = tracemalloc.get_traced_memory()
+                for guard in _tracked:
+                    guard.peak = max(guard.peak, peak - guard.baseline)
+                tracemalloc.reset_peak()
+                self.baseline = current
+                _tracked.add(self)
+            _local.guard = self
+        return self
+
+    def used(self):
+        return max(tracemalloc.get_traced_memory()[1] - self.baseline, 0)
+
+    def check(self):
+        self.peak = max(self.peak, self.used())
+        if self.limit and self.peak > self.limit:
+            raise MemoryLimitExceeded(self.peak, self.limit)
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self.enabled:
+            return False
+        _local.guard = None
+        with _tracked_lock:
+            _tracked.discard(self)
+            self.peak = max(self.peak, self.used())
+        metrics.observe('request_peak_memory_bytes', self.peak)
+        if isinstance(exc, MemoryLimitExceeded):
+            metrics.inc('request_memory_limit_exceeded_total')
+        return False
+
+
+def checkpoint():
+    """Abort the current render if it is over its memory ceiling. No-op when untracked."""
+    guard = getattr(_local, 'guard', None)
+    if guard is not None:
+        guard.check()
+
+
+def current_rss():
+    """Resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        # Peak rather than current RSS, but still a usable recycle signal
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def over_soft_limit():
+    """True once this worker's RSS passes WORKER_SOFT_LIMIT."""
+    rss = current_rss()
+    metrics.set_gauge('worker_rss_bytes', rss)
+    return bool(WORKER_SOFT_LIMIT) and rss > WORKER_SOFT_LIMIT
@@ -0,0 +1,97 @@
+import threading
+
+# In-process metrics, exposed at /metrics in Prometheus text format.
+# Each gunicorn worker keeps its own registry; scrape every worker or sum them.
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_summaries = {}
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def inc(name, value=1, **labels):
+    """Increase a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def set_gauge(name, value, **labels):
+    """Set a gauge to its current value."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    """Record one observation in a summary (count, sum and max)."""
+    key = _key(name, labels)
+    with _lock:
+        count, total, peak = _summaries.get(key, (0, 0, 0))
+        _summaries[key] = (count + 1, total + value, max(peak, value))
+
+
+def get(name, **labels):
+    """Current value of a counter or gauge (0 if never set)."""
+    key = _key(name, labels)
+    with _lock:
+        return _counters.get(key, _gauges.get(key, 0))
+
+
+def drain():
+    """Take every metric recorded in this process so far, leaving the registry empty."""
+    with _lock:
+        recorded = (dict(_counters), dict(_gauges), dict(_summaries))
+        _counters.clear()
+        _gauges.clear()
+        _summaries.clear()
+    return recorded
+
+
+def merge(recorded):
+    """Add metrics drain()ed in another process (a render pool worker) to this one's."""
+    counters, gauges, summaries = recorded
+    with _lock:
+        for key, value in counters.items():
+            _counters[key] = _counters.get(key, 0) + value
+        _gauges.update(gauges)
+        for key, (count, total, peak) in summaries.items():
+            seen, seen_total, seen_peak = _summaries.get(key, (0, 0, 0))
+            _summaries[key] = (seen + count, seen_total + total, max(seen_peak, peak))
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{v}"' for k, v in labels) + '}'
+
+
+def render():
+    """Prometheus text exposition of every metric in this process."""
+    lines = []
+    with _lock:
+        counters = sorted(_counters.items())
+        gauges = sorted(_gauges.items())
+        summaries = sorted(_summaries.items())
+
+    for kind, items in (('counter', counters), ('gauge', gauges)):
+        seen = set()
+        for (name, labels), value in items:
+            if name not in seen:
+                lines.append(f"# TYPE {name} {kind}")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    seen = set()
+    for (name, labels), (count, total, peak) in summaries:
+        if name not in seen:
+            lines.append(f"# TYPE {name} summary")
+            seen.add(name)
+        lines.append(f"{name}_count{_format_labels(labels)} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {total}")
+        lines.append(f"{name}_max{_format_labels(labels)} {peak}")
+
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,542 @@
+"""
+Zip-level .pptx surgery: move slides between already-saved decks without
+loading them into python-pptx. Parts a slide points at (images, charts and
+their embedded workbooks) are copied along under fresh names; layouts and
+masters are shared with the target, or imported when it has no match.
+Parts nobody touched are copied into the saved zip still compressed.
+"""
+import copy
+import hashlib
+import io
+import os
+import posixpath
+import re
+import shutil
+import struct
+import zipfile
+import zlib
+from collections.abc import MutableMapping
+
+from lxml import etree
+
+_CT = 'http://schemas.openxmlformats.org/package/2006/content-types'
+_R = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_P = 'http://schemas.openxmlformats.org/presentationml/2006/main'
+_PR = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+RT_SLIDE = f'{_R}/slide'
+RT_SLIDE_LAYOUT = f'{_R}/slideLayout'
+RT_SLIDE_MASTER = f'{_R}/slideMaster'
+RT_THEME = f'{_R}/theme'
+RT_NOTES_MASTER = f'{_R}/notesMaster'
+
+# Relationship types a slide shares with the rest of the deck instead of owning
+_SHARED = {RT_SLIDE_LAYOUT, RT_SLIDE_MASTER, RT_NOTES_MASTER, RT_THEME}
+
+# Parts shared by content when identical; anything else a slide owns stays its own
+_MEDIA_PREFIX = 'ppt/media/'
+
+# Timestamp of every saved entry (the zip epoch), so equal parts give equal bytes
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+_NUMBERED = re.compile(r'^(.*?)(\d*)(\.[^./]+)$')
+_LAYOUT_IDS = re.compile(rb'<p:sldLayoutIdLst>.*?</p:sldLayoutIdLst>', re.S)
+_APP_SLIDES = re.compile(rb'<Slides>\d+</Slides>')
+
+# Ids of slide masters and layouts share one range, slide ids another
+_FIRST_MASTER_ID = 2147483648
+_FIRST_SLIDE_ID = 256
+
+
+class InvalidDeck(ValueError):
+    """A deck we were given is not a .pptx we can edit."""
+
+
+def rels_name(name):
+    """Name of the relationships part that belongs to part name."""
+    directory, filename = posixpath.split(name)
+    return posixpath.join(directory, '_rels', f'{filename}.rels')
+
+
+def resolve(source, target):
+    """Part name a relationship target of part source points at."""
+    if target.startswith('/'):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
+
+
+def relative(source, name):
+    return posixpath.relpath(name, posixpath.dirname(source))
+
+
+def _xml(root):
+    return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def set_slide_number(blob, number, live=True):
+    """
+    Slide XML blob with its slide-number field showing number. live=False
+    swaps the field for plain text, for numbers that do not follow the
+    slide's position.
+    """
+    root = etree.fromstring(blob)
+    for field in root.iter(f'{{{_A}}}fld'):
+        if field.get('type') != 'slidenum':
+            continue
+        if live:
+            field.find(f'{{{_A}}}t').text = str(number)
+        else:
+            run = etree.Element(f'{{{_A}}}r')
+            etree.SubElement(run, f'{{{_A}}}t').text = str(number)
+            field.addnext(run)
+            field.getparent().remove(field)
+    return _xml(root)
+
+
+class _Parts(MutableMapping):
+    """
+    Part blobs by name, decompressed on first read. Parts that are unchanged
+    copies of a zip entry (of this deck or another) remember it, so saving
+    can copy them compressed.
+    """
+
+    def __init__(self, zip_file):
+        self._entries = {info.filename: (zip_file, info) for info in zip_file.infolist()}
+        self._blobs = {}
+        self._names = dict.fromkeys(self._entries)  # insertion-ordered set
+
+    def __getitem__(self, name):
+        blob = self._blobs.get(name)
+        if blob is None:
+            zip_file, info = self._entries[name]
+            blob = self._blobs[name] = zip_file.read(info)
+        return blob
+
+    def __setitem__(self, name, blob):
+        self._entries.pop(name, None)
+        self._blobs[name] = blob
+        self._names[name] = None
+
+    def __delitem__(self, name):
+        del self._names[name]
+        self._entries.pop(name, None)
+        self._blobs.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self._names
+
+    def __iter__(self):
+        return iter(list(self._names))
+
+    def __len__(self):
+        return len(self._names)
+
+    def link(self, name, source, source_name):
+        """Make name a copy of part source_name of source (another _Parts)."""
+        entry = source._entries.get(source_name)
+        if entry is None:
+            self[name] = source[source_name]
+            return
+        self._blobs.pop(name, None)
+        self._entries[name] = entry
+        self._names[name] = None
+
+    def entry(self, name):
+        """(zip file, ZipInfo) name can be copied from compressed, or None."""
+        return self._entries.get(name)
+
+    def fingerprint(self, name):
+        """(CRC-32, size) of a part, from the zip directory when possible."""
+        entry = self._entries.get(name)
+        if entry:
+            return entry[1].CRC, entry[1].file_size
+        blob = self[name]
+        return zlib.crc32(blob), len(blob)
+
+
+def _new_entry(name):
+    entry = zipfile.ZipInfo(name, ZIP_DATE_TIME)
+    entry.compress_type = zipfile.ZIP_DEFLATED
+    entry.create_system = 3
+    entry.external_attr = 0o600 << 16
+    return entry
+
+
+def _copy_raw(out, name, source, info):
+    """Write entry info of zip source to zip out as name, without recompressing it."""
+    with source._lock:  # the source may be shared, e.g. a cached library deck
+        source.fp.seek(info.header_offset)
+        header = struct.unpack(zipfile.structFileHeader, source.fp.read(zipfile.sizeFileHeader))
+        source.fp.seek(header[zipfile._FH_FILENAME_LENGTH] + header[zipfile._FH_EXTRA_FIELD_LENGTH], 1)
+        data = source.fp.read(info.compress_size)
+
+    entry = copy.copy(info)
+    entry.filename = entry.orig_filename = name
+    entry.date_time = ZIP_DATE_TIME
+    entry.create_system = 3
+    entry.flag_bits &= ~0x08  # sizes and CRC go in the header, no data descriptor
+    entry.extra = b''
+    entry.header_offset = out.fp.tell()
+    out.fp.write(entry.FileHeader(zip64=False))
+    out.fp.write(data)
+    out.filelist.append(entry)
+    out.NameToInfo[name] = entry
+    out.start_dir = out.fp.tell()
+    out._didModify = True
+
+
+class Package:
+    """The parts of a saved .pptx, by zip entry name, editable in place."""
+
+    def __init__(self, blob):
+        self.parts = _Parts(zipfile.ZipFile(io.BytesIO(blob)))
+        self._content_types = etree.fromstring(self._part('[Content_Types].xml'))
+        self._presentation = None
+        self._copied = {}
+        self._next_number = {}
+        self._slide_names = None
+        self._layouts = None
+        self._media = None
+
+    # ---- reading ----
+
+    def _part(self, name, owner=None):
+        """Blob of part name; InvalidDeck if the deck has no such part."""
+        if name not in self.parts:
+            raise InvalidDeck(f"Deck has no {name}" + (f", which {owner} points at" if owner else ""))
+        return self.parts[name]
+
+    def rels(self, name):
+        """{rId: (type, target part name or external URL, is_external)} of part name."""
+        blob = self.parts.get(rels_name(name))
+        if blob is None:
+            return {}
+        rels = {}
+        for rel in etree.fromstring(blob):
+            if rel.get('Target') is None:
+                raise InvalidDeck(f"Relationship {rel.get('Id')} of {name} has no target")
+            external = rel.get('TargetMode') == 'External'
+            target = rel.get('Target') if external else resolve(name, rel.get('Target'))
+            rels[rel.get('Id')] = (rel.get('Type'), target, external)
+        return rels
+
+    def _targets(self, name, rel_type):
+        return [target for type_, target, external in self.rels(name).values() if type_ == rel_type and not external]
+
+    def _target(self, name, rel_type):
+        """The part name points at with rel_type; InvalidDeck if it has none."""
+        targets = self._targets(name, rel_type)
+        if not targets:
+            raise InvalidDeck(f"{name} has no {rel_type.rsplit('/', 1)[-1]} relationship")
+        return targets[0]
+
+    @property
+    def presentation(self):
+        """Parsed ppt/presentation.xml, written back on save."""
+        if self._presentation is None:
+            self._presentation = etree.fromstring(self._part('ppt/presentation.xml'))
+        return self._presentation
+
+    def slide_names(self):
+        """Slide part names in presentation order."""
+        if self._slide_names is None:
+            rels = self.rels('ppt/presentation.xml')
+            names = []
+            for sld_id in self.presentation.iter(f'{{{_P}}}sldId'):
+                r_id = sld_id.get(f'{{{_R}}}id')
+                if r_id not in rels:
+                    raise InvalidDeck(f"Slide {sld_id.get('id')} has no relationship {r_id!r}")
+                names.append(rels[r_id][1])
+            self._slide_names = names
+        return self._slide_names
+
+    def content_type(self, name):
+        for override in self._content_types.iter(f'{{{_CT}}}Override'):
+            if override.get('PartName') == f'/{name}':
+                return override.get('ContentType'), True
+        extension = name.rsplit('.', 1)[-1].lower()
+        for default in self._content_types.iter(f'{{{_CT}}}Default'):
+            if default.get('Extension').lower() == extension:
+                return default.get('ContentType'), False
+        return None, False
+
+    def _layout_key(self, layout):
+        """
+        Identity of a layout by content: its XML, its master's (less the
+        layout ids, renumbered on import) and whatever the master points at.
+        """
+        master = self._target(layout, RT_SLIDE_MASTER)
+        digest = hashlib.sha1(self._part(layout))
+        digest.update(_LAYOUT_IDS.sub(b'', self._part(master, layout)))
+        for type_, target, external in sorted(self.rels(master).values()):
+            if type_ != RT_SLIDE_LAYOUT and not external:
+                digest.update(self._part(target, master))
+        return digest.hexdigest()
+
+    def layouts_by_key(self):
+        if self._layouts is None:
+            self._layouts = {}
+            for master in self._targets('ppt/presentation.xml', RT_SLIDE_MASTER):
+                for layout in self._targets(master, RT_SLIDE_LAYOUT):
+                    self._layouts.setdefault(self._layout_key(layout), layout)
+        return self._layouts
+
+    # ---- writing ----
+
+    def _free_name(self, name):
+        """An unused part name shaped like name (ppt/media/image3.png -> ppt/media/image12.png)."""
+        prefix, _, extension = _NUMBERED.match(name).groups()
+        number = self._next_number.get((prefix, extension), 1)
+        while f'{prefix}{number}{extension}' in self.parts:
+            number += 1
+        self._next_number[(prefix, extension)] = number + 1
+        return f'{prefix}{number}{extension}'
+
+    def _add_content_type(self, name, content_type, override):
+        if override:
+            etree.SubElement(self._content_types, f'{{{_CT}}}Override',
+                             PartName=f'/{name}', ContentType=content_type)
+            return
+        extension = name.rsplit('.', 1)[-1]
+        if self.content_type(name)[0] is None:
+            default = etree.Element(f'{{{_CT}}}Default', Extension=extension, ContentType=content_type)
+            self._content_types.insert(0, default)
+
+    def _add_rel(self, name, rel_type, target):
+        """Add a relationship from part name to part target; returns its rId."""
+        blob = self.parts.get(rels_name(name))
+        root = etree.fromstring(blob) if blob else etree.Element(f'{{{_PR}}}Relationships', nsmap={None: _PR})
+        used = {rel.get('Id') for rel in root}
+        number = len(used) + 1
+        while f'rId{number}' in used:
+            number += 1
+        etree.SubElement(root, f'{{{_PR}}}Relationship', Id=f'rId{number}', Type=rel_type,
+                         Target=relative(name, target))
+        self.parts[rels_name(name)] = _xml(root)
+        return f'rId{number}'
+
+    def _write_rels(self, name, source_pkg, source_name):
+        """Copy the relationships of source_name to name, bringing owned parts along."""
+        blob = source_pkg.parts.get(rels_name(source_name))
+        if blob is None:
+            self.parts.pop(rels_name(name), None)
+            return
+        root = etree.fromstring(blob)
+        for rel in root:
+            if rel.get('TargetMode') == 'External':
+                continue
+            if rel.get('Target') is None:
+                raise InvalidDeck(f"Relationship {rel.get('Id')} of {source_name} has no target")
+            target = resolve(source_name, rel.get('Target'))
+            if (source_pkg, target) in self._copied:
+                new_target = self._copied[(source_pkg, target)]
+            elif rel.get('Type') == RT_NOTES_MASTER:
+                new_target = self._notes_master_for(source_pkg, target)
+            elif rel.get('Type') in _SHARED:
+                if target not in self.parts:
+                    raise InvalidDeck(f"Target deck has no {target} for {source_name}")
+                new_target = target
+            else:
+                new_target = self.copy_part(source_pkg, target)
+            rel.set('Target', relative(name, new_target))
+        self.parts[rels_name(name)] = _xml(root)
+
+    def _copy_as(self, name, source_pkg, source_name):
+        if source_name not in source_pkg.parts:
+            raise InvalidDeck(f"Deck has no {source_name}")
+        self.parts.link(name, source_pkg.parts, source_name)
+        self._add_content_type(name, *source_pkg.content_type(source_name))
+        self._write_rels(name, source_pkg, source_name)
+
+    def _media_index(self):
+        if self._media is None:
+            self._media = {}
+            for name in self.parts:
+                if name.startswith(_MEDIA_PREFIX):
+                    self._media.setdefault(self.parts.fingerprint(name), []).append(name)
+        return self._media
+
+    def _same_media(self, source_pkg, source_name):
+        """A media part here with the same bytes as source_name, or None."""
+        fingerprint = source_pkg.parts.fingerprint(source_name)
+        for name in self._media_index().get(fingerprint, ()):
+            if self.parts[name] == source_pkg.parts[source_name]:
+                return name
+        return None
+
+    def copy_part(self, source_pkg, source_name):
+        """
+        Copy a part (and whatever it owns) from source_pkg once; returns its
+        name here. Media identical to a part already here is shared instead.
+        """
+        key = (source_pkg, source_name)
+        name = self._copied.get(key)
+        if name is None:
+            if source_name not in source_pkg.parts:
+                raise InvalidDeck(f"Deck has no {source_name}")
+            is_media = source_name.startswith(_MEDIA_PREFIX)
+            name = self._same_media(source_pkg, source_name) if is_media else None
+            if name is not None:
+                self._copied[key] = name
+                return name
+            name = self._free_name(source_name)
+            self._copied[key] = name
+            self._copy_as(name, source_pkg, source_name)
+            if is_media:
+                self._media_index().setdefault(self.parts.fingerprint(name), []).append(name)
+        return name
+
+    def _next_id(self, tag, first):
+        ids = [int(el.get('id')) for el in self.presentation.iter(tag)]
+        if tag == f'{{{_P}}}sldMasterId':
+            for master in self._targets('ppt/presentation.xml', RT_SLIDE_MASTER):
+                ids += [int(el.get('id')) for el in etree.fromstring(self._part(master)).iter(f'{{{_P}}}sldLayoutId')]
+        return max(ids + [first - 1]) + 1
+
+    def import_master(self, source_pkg, source_master):
+        """Copy a slide master with its layouts and theme from source_pkg and register it."""
+        if (source_pkg, source_master) in self._copied:
+            return self._copied[(source_pkg, source_master)]
+        owned = ([source_master] + source_pkg._targets(source_master, RT_SLIDE_LAYOUT)
+                 + source_pkg._targets(source_master, RT_THEME))
+        for part in owned:  # names first, so layouts and master can point at each other
+            self._copied[(source_pkg, part)] = self._free_name(part)
+
+        # Master and layout ids must be unique across the whole presentation
+        next_id = self._next_id(f'{{{_P}}}sldMasterId', _FIRST_MASTER_ID)
+        master_root = etree.fromstring(source_pkg._part(source_master))
+        for layout_id in master_root.iter(f'{{{_P}}}sldLayoutId'):
+            layout_id.set('id', str(next_id + 1))
+            next_id += 1
+        for part in owned:
+            self._copy_as(self._copied[(source_pkg, part)], source_pkg, part)
+        master = self._copied[(source_pkg, source_master)]
+        self.parts[master] = _xml(master_root)
+
+        r_id = self._add_rel('ppt/presentation.xml', RT_SLIDE_MASTER, master)
+        master_ids = self.presentation.find(f'{{{_P}}}sldMasterIdLst')
+        etree.SubElement(master_ids, f'{{{_P}}}sldMasterId', {'id': str(next_id + 1), f'{{{_R}}}id': r_id})
+        self._layouts = None
+        return master
+
+    def _notes_master_for(self, source_pkg, source_notes_master):
+        """This deck's notes master (there is at most one), imported from source_pkg if it has none."""
+        key = (source_pkg, source_notes_master)
+        if key not in self._copied:
+            existing = self._targets('ppt/presentation.xml', RT_NOTES_MASTER)
+            if existing:
+                self._copied[key] = existing[0]
+                return existing[0]
+            owned = [source_notes_master] + source_pkg._targets(source_notes_master, RT_THEME)
+            for part in owned:
+                self._copied[(source_pkg, part)] = self._free_name(part)
+            for part in owned:
+                self._copy_as(self._copied[(source_pkg, part)], source_pkg, part)
+
+            r_id = self._add_rel('ppt/presentation.xml', RT_NOTES_MASTER, self._copied[key])
+            notes_master_ids = etree.Element(f'{{{_P}}}notesMasterIdLst')
+            etree.SubElement(notes_master_ids, f'{{{_P}}}notesMasterId', {f'{{{_R}}}id': r_id})
+            self.presentation.find(f'{{{_P}}}sldMasterIdLst').addnext(notes_master_ids)
+        return self._copied[key]
+
+    def _layout_for(self, source_pkg, source_layout):
+        """This deck's layout matching source_layout, importing its master when there is none."""
+        key = (source_pkg, source_layout)
+        if key not in self._copied:
+            match = self.layouts_by_key().get(source_pkg._layout_key(source_layout))
+            if match:
+                self._copied[key] = match
+            else:
+                self.import_master(source_pkg, source_pkg._target(source_layout, RT_SLIDE_MASTER))
+        return self._copied[key]
+
+    def replace_slide(self, index, source_pkg, source_index):
+        """Make slide index (0-based) a copy of slide source_index of source_pkg."""
+        name = self.slide_names()[index]
+        source_name = source_pkg.slide_names()[source_index]
+        self.parts[name] = source_pkg._part(source_name)
+        self._write_rels(name, source_pkg, source_name)
+
+    def append_slides(self, source_pkg, indexes=None):
+        """
+        Add copies of slides of source_pkg (all, or the 0-based indexes given)
+        at the end, in order; returns their part names here.
+        """
+        source_names = source_pkg.slide_names()
+        if indexes is not None:
+            source_names = [source_names[index] for index in indexes]
+        # Names first, so links between the slides (and notes back to them) resolve
+        names = []
+        for source_name in source_names:
+            for layout in source_pkg._targets(source_name, RT_SLIDE_LAYOUT):
+                self._layout_for(source_pkg, layout)
+            name = self._free_name('ppt/slides/slide1.xml')
+            self._copied[(source_pkg, source_name)] = name
+            names.append(name)
+
+        slide_ids = self.presentation.find(f'{{{_P}}}sldIdLst')
+        if slide_ids is None:
+            slide_ids = etree.Element(f'{{{_P}}}sldIdLst')
+            anchor = [self.presentation.find(f'{{{_P}}}{tag}')
+                      for tag in ('sldMasterIdLst', 'notesMasterIdLst', 'handoutMasterIdLst')]
+            [el for el in anchor if el is not None][-1].addnext(slide_ids)
+        slide_id = self._next_id(f'{{{_P}}}sldId', _FIRST_SLIDE_ID)
+        for name, source_name in zip(names, source_names):
+            self._copy_as(name, source_pkg, source_name)
+            r_id = self._add_rel('ppt/presentation.xml', RT_SLIDE, name)
+            etree.SubElement(slide_ids, f'{{{_P}}}sldId', {'id': str(slide_id), f'{{{_R}}}id': r_id})
+            slide_id += 1
+            self.slide_names().append(name)
+        return names
+
+    def save(self):
+        if self._presentation is not None:
+            self.parts['ppt/presentation.xml'] = _xml(self._presentation)
+            app = self.parts.get('docProps/app.xml')
+            if app is not None:
+                self.parts['docProps/app.xml'] = _APP_SLIDES.sub(
+                    f'<Slides>{len(self.slide_names())}</Slides>'.encode(), app, count=1
+                )
+        self.parts['[Content_Types].xml'] = _xml(self._content_types)
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as z:
+            z.writestr(_new_entry('[Content_Types].xml'), self.parts['[Content_Types].xml'])
+            for name in self.parts:
+                if name == '[Content_Types].xml':
+                    continue
+                entry = self.parts.entry(name)
+                if entry:
+                    _copy_raw(z, name, *entry)
+                else:
+                    z.writestr(_new_entry(name), self.parts[name])
+        return out.getvalue()
+
+
+def _copy_file(out, name, path, chunk_size=1024 * 1024):
+    """Write the file at path to zip out as entry name, stored (media is already compressed), a chunk at a time."""
+    entry = _new_entry(name)
+    entry.compress_type = zipfile.ZIP_STORED
+    entry.file_size = os.path.getsize(path)
+    with open(path, 'rb') as source, out.open(entry, 'w', force_zip64=entry.file_size > zipfile.ZIP64_LIMIT) as target:
+        shutil.copyfileobj(source, target, chunk_size)
+
+
+def normalize(blob, media=None, out=None):
+    """
+    blob (a saved zip) with every entry stamped ZIP_DATE_TIME, in the same
+    order and without recompressing, so identical content gives identical bytes.
+    media maps entry names to files copied in place of those entries (see
+    file_media). Written to out, a binary file, when given; else returned.
+    """
+    media = media or {}
+    source = zipfile.ZipFile(io.BytesIO(blob))
+    target = io.BytesIO() if out is None else out
+    with zipfile.ZipFile(target, 'w') as z:
+        for info in source.infolist():
+            if info.filename in media:
+                _copy_file(z, info.filename, media[info.filename])
+            else:
+                _copy_raw(z, info.filename, source, info)
+    if out is None:
+        return target.getvalue()
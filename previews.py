@@ -0,0 +1,271 @@
+"""
+Slide previews: SVG per slide, or one HTML page, drawn from the geometry
+the add_*_slide methods compute (layout_dry_run's recorder). Rectangles,
+text boxes, images, chart placeholders and the layout decorations are
+drawn in the theme's colors; text is laid out with the dry run's width
+heuristic, so previews are thumbnails, not a pixel-exact render.
+
+Each slide's SVG is cached (cache.py, shared across nodes when configured)
+by its theme, spec and number, so editing one slide of a deck re-draws only
+that slide. Used by POST /preview.
+"""
+import base64
+import hashlib
+import json
+import os
+from xml.sax.saxutils import escape, quoteattr
+
+import admission
+import cache
+import layout_dry_run
+import render
+import slide_layouts
+import slide_library
+import themes
+from text_styles import STYLES
+
+PREVIEW_CACHE_TTL = float(os.environ.get('PREVIEW_CACHE_TTL', '3600'))
+
+PX_PER_INCH = 96
+
+_STYLES = {name: (color, align) for name, color, align, _ in STYLES}
+_ANCHORS = {'l': 'start', 'ctr': 'middle', 'r': 'end'}
+
+
+def _px(inches):
+    return round(inches * PX_PER_INCH, 1)
+
+
+def _wrap(text, width, size_pt):
+    """Lines of text broken to fit width inches at size_pt, by the dry run's glyph width."""
+    per_line = max(int(width / (layout_dry_run.CHAR_WIDTH_EM * size_pt / 72)), 1)
+    lines = []
+    for paragraph in text.split('\n'):
+        line = ''
+        for word in paragraph.split(' '):
+            if line and len(line) + 1 + len(word) > per_line:
+                lines.append(line)
+                line = word
+            else:
+                line = f'{line} {word}' if line else word
+        lines.append(line)
+    return lines
+
+
+def _text(record, color, align, anchor='t', wrap=False):
+    left, top, width, height = record['box']
+    size = record['size']
+    text = str(record['text']).replace('\v', '\n')
+    inner = width - 2 * layout_dry_run.INSET_X
+    lines = _wrap(text, inner, size) if wrap else text.split('\n')
+
+    line_height = size / 72 * layout_dry_run.LINE_HEIGHT_EM
+    block = line_height * len(lines)
+    if anchor == 'ctr':
+        y = top + (height - block) / 2
+    elif anchor == 'b':
+        y = top + height - layout_dry_run.INSET_Y - block
+    else:
+        y = top + layout_dry_run.INSET_Y
+    if align == 'ctr':
+        x = left + width / 2
+    elif align == 'r':
+        x = left + width - layout_dry_run.INSET_X
+    else:
+        x = left + layout_dry_run.INSET_X
+
+    weight = ' font-weight="bold"' if record.get('bold') else ''
+    spans = ''.join(
+        f'<tspan x="{_px(x)}" y="{_px(y + line_height * (i + 0.8))}">{escape(line)}</tspan>'
+        for i, line in enumerate(lines)
+    )
+    return (f'<text font-size="{round(size * PX_PER_INCH / 72, 1)}" fill="#{color}" '
+            f'text-anchor="{_ANCHORS[align]}"{weight}>{spans}</text>')
+
+
+def _rect(box, fill=None, line=None, geometry='rect', alpha=None):
+    left, top, width, height = (_px(v) for v in box)
+    paint = f'fill="#{fill}"' if fill else 'fill="none"'
+    if alpha is not None:
+        paint += f' fill-opacity="{alpha}"'
+    if line:
+        paint += f' stroke="#{line}" stroke-width="2"'
+    if geometry == 'ellipse':
+        return f'<ellipse cx="{left + width / 2}" cy="{top + height / 2}" rx="{width / 2}" ry="{height / 2}" {paint}/>'
+    if geometry in ('RIGHT_ARROW', 'DOWN_ARROW'):
+        # Preset arrows: half-height shaft, head half the length
+        if geometry == 'RIGHT_ARROW':
+            mid, shaft, head = top + height / 2, height / 4, left + width / 2
+            points = [(left, mid - shaft), (head, mid - shaft), (head, top), (left + width, mid),
+                      (head, top + height), (head, mid + shaft), (left, mid + shaft)]
+        else:
+            mid, shaft, head = left + width / 2, width / 4, top + height / 2
+            points = [(mid - shaft, top), (mid + shaft, top), (mid + shaft, head), (left + width, head),
+                      (mid, top + height), (left, head), (mid - shaft, head)]
+        return f'<polygon points="{" ".join(f"{x:.1f},{y:.1f}" for x, y in points)}" {paint}/>'
+    return f'<rect x="{left}" y="{top}" width="{width}" height="{height}" {paint}/>'
+
+
+def _image(box, href):
+    left, top, width, height = (_px(v) for v in box)
+    return (f'<image x="{left}" y="{top}" width="{width}" height="{height}" '
+            f'preserveAspectRatio="none" href={quoteattr(href)}/>')
+
+
+def _data_uri(blob, content_type='image/png'):
+    return f'data:{content_type};base64,{base64.b64encode(blob).decode("ascii")}'
+
+
+def slide_svg(slide, theme):
+    """SVG document for one recorded slide (layout_dry_run.LayoutRecorder) in theme."""
+    hex_colors = theme.hex
+    width, height = layout_dry_run.SLIDE_WIDTH, layout_dry_run.SLIDE_HEIGHT
+    background = slide_layouts.BACKGROUNDS.get(slide.layout)
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 {_px(width)} {_px(height)}" '
+        f'font-family={quoteattr(f"{theme.font_name}, Arial, sans-serif")}>',
+        _rect((0, 0, width, height), hex_colors[background or 'WHITE']),
+    ]
+    for _, geometry, color, alpha, box in slide_layouts.DECORATIONS.get(slide.layout, ()):
+        parts.append(_rect(box, hex_colors[color], geometry=geometry, alpha=alpha))
+    if slide.layout == slide_layouts.TITLE_LAYOUT and theme.logo:
+        logo_width, logo_height = theme.logo.size
+        box = (slide_layouts.LOGO_LEFT, slide_layouts.LOGO_TOP,
+               slide_layouts.LOGO_HEIGHT * logo_width / logo_height, slide_layouts.LOGO_HEIGHT)
+        parts.append(_image(box, _data_uri(theme.logo.blob, theme.logo.content_type)))
+
+    for index, record in enumerate(slide.boxes):
+        kind = record['kind']
+        if kind == 'shape':
+            parts.append(_rect(record['box'], record.get('fill'), record.get('line'), record.get('geometry')))
+            if record.get('text'):
+                color = hex_colors['WHITE'] if record.get('fill') else hex_colors['DARK_GRAY']
+                parts.append(_text(dict(record, size=record.get('size', 18)), color, 'ctr', 'ctr', wrap=True))
+        elif kind == 'picture':
+            blob = slide.images.get(index)
+            href = _data_uri(blob) if blob is not None else record.get('src')
+            parts.append(_rect(record['box'], hex_colors['LIGHT_GRAY']))
+            if href:
+                parts.append(_image(record['box'], href))
+        elif kind == 'chart':
+            parts.append(_rect(record['box'], hex_colors['LIGHT_GRAY'], hex_colors['LIGHT_BLUE']))
+            label = dict(record, text=f"Chart ({record.get('chart_points', 0)} points)", size=14)
+            parts.append(_text(label, hex_colors['DARK_GRAY'], 'ctr', 'ctr'))
+        elif kind == 'text':
+            color, align = _STYLES[record['style']]
+            parts.append(_text(record, hex_colors[color], align, record.get('anchor', 't'), record.get('wrap')))
+        elif kind == 'placeholder':
+            if record['name'] == 'Subtitle':
+                color, align = slide_layouts.SUBTITLE_STYLE
+            elif slide.layout == slide_layouts.TITLE_LAYOUT:
+                color, align = slide_layouts.TITLE_STYLE
+            else:
+                color, align = slide_layouts.CONTENT_TITLE_STYLE
+            parts.append(_text(record, hex_colors[color], align, wrap=True))
+        elif kind == 'slide_number':
+            color, align = slide_layouts.SLIDE_NUMBER_STYLE
+            parts.append(_text(record, hex_colors[color], align))
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def _units(data):
+    """(spec, slide number) of every slide in deck order; library slides as their registered spec."""
+    units = [({'type': 'title', 'title': data.get('title', 'Presentation'), 'subtitle': data.get('subtitle', '')}, 1)]
+    if data.get('sections'):
+        units.append(({'type': 'table_of_contents', 'sections': data['sections']}, 2))
+    counter = len(units) + 1
+    for slide_data in data.get('slides', []):
+        if slide_data.get('type') == slide_library.LIBRARY_TYPE:
+            units.append((slide_library.spec(slide_data.get('id')), slide_data.get('slide_number', counter)))
+        elif slide_data.get('type') in render.SLIDE_TYPES:
+            spec = {k: v for k, v in slide_data.items() if k != 'slide_number'}
+            units.append((spec, slide_data.get('slide_number', counter)))
+        counter += 1
+    return units
+
+
+def _key(theme, spec, number):
+    raw = json.dumps([theme.id, theme.hex, theme.font_name, spec, number], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _draw(data, theme, units, missing):
+    """SVGs for the units at indexes missing, recorded in one pass."""
+    payload = {'theme': theme.id, 'title': units[0][0]['title'], 'subtitle': units[0][0]['subtitle']}
+    content = [i for i in missing if units[i][0]['type'] not in ('title', 'table_of_contents')]
+    if any(units[i][0]['type'] == 'table_of_contents' for i in missing):
+        payload['sections'] = data['sections']
+    payload['slides'] = [dict(units[i][0], slide_number=units[i][1]) for i in content]
+
+    recorded = [slide for slide, _ in layout_dry_run.record(payload)]
+    drawn = {0: recorded[0]}
+    if payload.get('sections'):
+        drawn[1] = recorded[1]
+    drawn.update(zip(content, recorded[1 + bool(payload.get('sections')):]))
+    return {i: slide_svg(drawn[i], theme) for i in missing}
+
+
+def slide_svgs(data):
+    """SVG per slide of a create-presentation payload, drawing only slides not in the cache."""
+    admission.estimate_cost(data)  # TooLarge for payloads a render would refuse
+    theme = themes.get_theme(data.get('theme'))
+    units = _units(data)
+    keys = [_key(theme, spec, number) for spec, number in units]
+
+    shared = cache.backend()
+    cached = shared.get_many('slide', keys)
+    svgs = [str(cached[key], 'utf-8') if key in cached else None for key in keys]
+    missing = [i for i, svg in enumerate(svgs) if svg is None]
+    if missing:
+        for i, svg in _draw(data, theme, units, missing).items():
+            svgs[i] = svg
+            shared.set('slide', keys[i], svg.encode('utf-8'), PREVIEW_CACHE_TTL)
+    return svgs
+
+
+def html_page(data, svgs=None):
+    """One HTML page with every slide preview, in deck order."""
+    svgs = slide_svgs(data) if svgs is None else svgs
+    figures = ''.join(
+        f'<figure><div class="slide">{svg}</div><figcaption>{i + 1}</figcaption></figure>'
+        for i, svg in enumerate(svgs)
+    )
+    return (
+        '<!DOCTYPE html><html><head><meta charset="utf-8">'
+        f'<title>{escape(str(data.get("title", "Presentation")))}</title>'
+        '<style>body{margin:0;padding:24px;background:#eee;font-family:sans-serif}'
+        'main{display:grid;grid-template-columns:repeat(auto-fill,minmax(320px,1fr));gap:24px}'
+        'figure{margin:0}.slide{background:#fff;box-shadow:0 1px 4px rgba(0,0,0,.3);aspect-ratio:4/3}'
+        '.slide svg{display:block;width:100%;height:100%}figcaption{text-align:center;color:#666;'
+        'font-size:12px;margin-top:6px}</style></head>'
+        f'<body><main>{figures}</main></body></html>'
+    )
+
+
+FORMATS = ('html', 'svg', 'json')
+
+
+class PreviewError(ValueError):
+    """A preview request for an unknown format or a slide the deck does not have."""
+
+
+def preview(data, fmt='html', slide=None):
+    """
+    (body, content type) of the previews of data: the HTML page, one slide's
+    SVG (slide is 1-based) or JSON {"slides": [svg, ...]}.
+    """
+    if fmt not in FORMATS:
+        raise PreviewError(f"Unknown preview format {fmt!r}, expected one of {', '.join(FORMATS)}")
+    svgs = slide_svgs(data)
+    if fmt == 'html':
+        return html_page(data, svgs), 'text/html; charset=utf-8'
+    if fmt == 'json':
+        return json.dumps({'slides': svgs}), 'application/json'
+    try:
+        index = int(slide) - 1
+    except (TypeError, ValueError):
+        raise PreviewError("SVG previews need ?slide=<number>") from None
+    if not 0 <= index < len(svgs):
+        raise PreviewError(f"Slide {slide} is out of range, the deck has {len(svgs)} slides")
+    return svgs[index], 'image/svg+xml'
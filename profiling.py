@@ -0,0 +1,134 @@
+import cProfile
+import hmac
+import io
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', '/tmp/presentation-profiles')
+PROFILE_ADMIN_TOKENS = [t.strip() for t in os.environ.get('PROFILE_ADMIN_TOKENS', '').split(',') if t.strip()]
+SAMPLE_INTERVAL = float(os.environ.get('PROFILE_SAMPLE_INTERVAL', '0.001'))
+
+# pstats: deterministic cProfile dump, loadable with pstats/snakeviz
+# collapsed: sampled stacks, one "frame;frame;frame count" line each (flamegraph.pl, speedscope)
+MODES = {'pstats': '.prof', 'collapsed': '.collapsed'}
+
+_PROFILE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def is_admin(token):
+    """Check a request token against PROFILE_ADMIN_TOKENS."""
+    if not token:
+        return False
+    return any(hmac.compare_digest(token, admin) for admin in PROFILE_ADMIN_TOKENS)
+
+
+def parse_mode(value):
+    """Map a header/query flag to a profiler mode, or None when profiling is off."""
+    if not value:
+        return None
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes'):
+        return 'pstats'
+    if value not in MODES:
+        raise ValueError(f"Unknown profile mode {value!r}, expected one of: {', '.join(MODES)}")
+    return value
+
+
+def new_profile_id(requested=None):
+    """Use the caller's request id when it is safe as a filename, else generate one."""
+    if requested and _PROFILE_ID.match(requested):
+        return requested
+    return uuid.uuid4().hex
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed interval from a background thread.
+    Stacks are aggregated as collapsed lines, ready for flame graph tools.
+    """
+
+    def __init__(self, thread_id=None, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def collapsed(self):
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def profile_call(mode, func, *args, **kwargs):
+    """Run func under the requested profiler. Returns (result, profile_bytes)."""
+    if mode == 'pstats':
+        profiler = cProfile.Profile()
+        result = profiler.runcall(func, *args, **kwargs)
+        profiler.create_stats()
+        return result, marshal.dumps(profiler.stats)
+
+    sampler = SamplingProfiler()
+    sampler.start()
+    try:
+        result = func(*args, **kwargs)
+    finally:
+        sampler.stop()
+    return result, sampler.collapsed().encode('utf-8')
+
+
+def summarize(path, limit=40):
+    """Human readable top-N cumulative report for a saved pstats profile."""
+    out = io.StringIO()
+    pstats.Stats(path, stream=out).sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+def profile_path(profile_id, mode):
+    return os.path.join(PROFILE_DIR, profile_id + MODES[mode])
+
+
+def save_profile(profile_id, mode, profile_bytes):
+    """Write the profile under PROFILE_DIR and return its path."""
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = profile_path(profile_id, mode)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(profile_bytes)
+    os.replace(tmp_path, path)
+    print(f"Profile ({mode}) saved: {path}")
+    return path
+
+
+def find_profile(profile_id):
+    """Return (mode, path) for a saved profile, or (None, None)."""
+    if not _PROFILE_ID.match(profile_id):
+        return None, None
+    for mode in MODES:
+        path = profile_path(profile_id, mode)
+        if os.path.exists(path):
+            return mode, path
+    return None, None
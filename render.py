@@ -0,0 +1,195 @@
+"""
+Deck rendering shared by both apps (api.py, asgi.py), the render pool
+processes and the helper modules: request JSON in, saved .pptx out.
+Kept apart from the web apps so importing it pulls in neither.
+"""
+import io
+import os
+
+import deck_store
+import memory_guard
+import slide_library
+from corporate_template import CorporatePresentation
+
+
+# Slide types build_presentation renders; any other type adds no slide
+SLIDE_TYPES = (
+    'content_with_icons', 'split', 'market_opportunities', 'timeline', 'comparison', 'process_steps',
+    'team', 'quote', 'stats', 'contact_info', 'image_text_split', 'blank', 'chart', 'library',
+)
+
+
+def build_presentation(data, images=None, deck=None):
+    """
+    Build a CorporatePresentation from the request JSON and prefetched images.
+    deck replaces the CorporatePresentation (layout_dry_run passes a recorder).
+    """
+    # Create presentation
+    if deck is None:
+        deck = CorporatePresentation(images=images, theme=data.get('theme'))
+    
+    slide_counter = 1
+    
+    # Add title slide
+    deck.add_title_slide(
+        title=data.get('title', 'Presentation'),
+        subtitle=data.get('subtitle', ''),
+        slide_number=slide_counter
+    )
+    slide_counter += 1
+    
+    # Add table of contents if sections provided
+    if 'sections' in data and data['sections']:
+        deck.add_table_of_contents(
+            sections=data['sections'],
+            slide_number=slide_counter
+        )
+        slide_counter += 1
+    
+    # Add content slides
+    for slide_data in data.get('slides', []):
+        slide_type = slide_data.get('type')
+        slide_number = slide_data.get('slide_number', slide_counter)
+        
+        if slide_type == 'content_with_icons':
+            deck.add_content_with_icons_slide(
+                title=slide_data.get('title', ''),
+                items=slide_data.get('items', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'split':
+            deck.add_split_slide(
+                title=slide_data.get('title', ''),
+                paragraphs=slide_data.get('paragraphs', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'market_opportunities':
+            deck.add_market_opportunities_slide(
+                title=slide_data.get('title', ''),
+                items=slide_data.get('items', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'timeline':
+            deck.add_timeline_slide(
+                title=slide_data.get('title', ''),
+                image_url=slide_data.get('image_url', ''),
+                milestones=slide_data.get('milestones', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'comparison':
+            deck.add_comparison_slide(
+                title=slide_data.get('title', ''),
+                left_side=slide_data.get('left_side', {}),
+                right_side=slide_data.get('right_side', {}),
+                middle_side=slide_data.get('middle_side'),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'process_steps':
+            deck.add_process_steps_slide(
+                title=slide_data.get('title', ''),
+                steps=slide_data.get('steps', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'team':
+            deck.add_team_slide(
+                title=slide_data.get('title', ''),
+                members=slide_data.get('members', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'quote':
+            deck.add_quote_slide(
+                quote=slide_data.get('quote', ''),
+                author=slide_data.get('author', ''),
+                role=slide_data.get('role', ''),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'stats':
+            deck.add_stats_slide(
+                title=slide_data.get('title', ''),
+                stats=slide_data.get('stats', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'contact_info':
+            deck.add_contact_info_slide(
+                title=slide_data.get('title', ''),
+                image_url=slide_data.get('image_url', ''),
+                contact_details=slide_data.get('contact_details', []),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'image_text_split':
+            deck.add_image_text_split_slide(
+                title=slide_data.get('title', ''),
+                image_url=slide_data.get('image_url', ''),
+                content=slide_data.get('content', {}),
+                image_position=slide_data.get('image_position', 'left'),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'blank':
+            deck.add_blank_slide(
+                title=slide_data.get('title', ''),
+                slide_number=slide_number
+            )
+        
+        elif slide_type == 'library':
+            # Stand-in, replaced by the stored slide in render_presentation
+            deck.add_blank_slide(slide_number=slide_number)
+        
+        elif slide_type == 'chart':
+            deck.add_chart_slide(
+                title=slide_data.get('title', ''),
+                chart_type=slide_data.get('chart_type', 'line'),
+                chart_data=slide_data.get('chart_data', {}),
+                slide_number=slide_number
+            )
+        
+        slide_counter += 1
+        memory_guard.checkpoint()
+
+    return deck
+
+
+def render_presentation(data, images=None):
+    """Build the deck and save it to memory (better for serverless)."""
+    deck = build_presentation(data, images)
+    pptx_io = io.BytesIO()
+    deck.save(pptx_io)
+    memory_guard.checkpoint()
+    if slide_library.referenced(data):
+        pptx_io = io.BytesIO(slide_library.splice(data, pptx_io.getvalue()))
+    pptx_io.seek(0)
+    return pptx_io
+
+
+def render_to_store(data, images=None):
+    """
+    render_presentation for decks that link large local media (file_media):
+    saved straight to a file in the deck store, so neither the media nor the
+    deck is held in memory. Returns the deck id.
+    """
+    deck = build_presentation(data, images)
+    tmp_path = deck_store.temp_path()
+    try:
+        deck.save(tmp_path)
+        memory_guard.checkpoint()
+        if slide_library.referenced(data):
+            # Splicing works on bytes, so library slides bring the deck into memory
+            with open(tmp_path, 'rb') as f:
+                blob = slide_library.splice(data, f.read())
+            with open(tmp_path, 'wb') as f:
+                f.write(blob)
+        return deck_store.save_file(tmp_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
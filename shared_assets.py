@@ -0,0 +1,248 @@
+"""
+Host-wide shared memory for immutable assets (fetched photos, icon tiles,
+theme templates): one mmap'd segment in /dev/shm that every gunicorn worker
+maps, indexed by the hash of the asset's key. Reads are lock-free and
+zero-copy (a memoryview into the mapping), so an asset put by one worker is
+a hit for all of them and per-worker memory stays flat as the cache grows.
+
+Layout: a header, an open-addressing index of fixed slots, then an
+append-only data area. Writers serialize on an flock. A slot is written
+data first and key digest last, so readers never see a half-written asset;
+an expired asset stored again gets a new slot and the old one is marked
+replaced. When the data area or the index fills up, the writer starts a new
+generation in a fresh file and marks the old one retired; processes switch
+on their next access, and views into the old segment stay valid until they
+are dropped (its file is unlinked, the mapping lives on).
+"""
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import threading
+import time
+
+import metrics
+
+SHARED_ASSETS_ENABLED = os.environ.get('SHARED_ASSETS', '1').lower() in ('1', 'true', 'yes')
+SHARED_ASSETS_PATH = os.environ.get('SHARED_ASSETS_PATH', '/dev/shm/presentation-assets')
+# Fits Docker's default 64 MB /dev/shm
+SHARED_ASSETS_BYTES = int(float(os.environ.get('SHARED_ASSETS_MB', '48')) * 1024 * 1024)
+SHARED_ASSETS_SLOTS = int(os.environ.get('SHARED_ASSETS_SLOTS', '65536'))
+
+_MAGIC = b'PPTXSHM1'
+_HEADER = struct.Struct('<8sQQQQB')  # magic, generation, slots, bytes used, entries, retired
+_HEADER_SIZE = 64
+_RETIRED = _HEADER.size - 1
+_SLOT = struct.Struct('<QQd16s')  # data offset, length, expires (0 = never), key digest
+_EMPTY = bytes(16)
+_REPLACED = b'\xff' * 16  # digest of a slot whose asset expired and was stored again
+_MAX_LOAD = 0.75
+
+
+def _digest(key):
+    return hashlib.sha256(key.encode('utf-8')).digest()[:16]
+
+
+class SharedAssets:
+    """The segment for path, mapped lazily in each process."""
+
+    def __init__(self, path=SHARED_ASSETS_PATH, size=SHARED_ASSETS_BYTES, slots=SHARED_ASSETS_SLOTS):
+        self.path = path
+        self.size = size
+        self.slots = slots
+        self._data_start = _HEADER_SIZE + slots * _SLOT.size
+        self._mm = None
+        self._pid = None
+        self._lock_fd = None
+        self._thread_lock = threading.Lock()
+
+    # ---- locking and mapping ----
+
+    def _locked(self):
+        """Exclusive flock on <path>.lock, opened once per process (a forked fd would be shared)."""
+        if self._pid != os.getpid():
+            self._lock_fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o600)
+            self._pid = os.getpid()
+            self._mm = None
+        fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+        return self._lock_fd
+
+    def _unlock(self):
+        fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _segment_path(self, generation):
+        return f'{self.path}.{generation}'
+
+    def _create(self, generation):
+        fd = os.open(self._segment_path(generation), os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            # Allocated up front: a sparse file on a full tmpfs would SIGBUS on first write
+            os.posix_fallocate(fd, 0, self.size)
+            mm = mmap.mmap(fd, self.size)
+        finally:
+            os.close(fd)
+        _HEADER.pack_into(mm, 0, _MAGIC, generation, self.slots, 0, 0, 0)
+        # The generation is published last, once the segment is ready
+        os.pwrite(self._lock_fd, str(generation).encode().ljust(20), 0)
+        return mm
+
+    def _map_current(self):
+        """Map the current generation, creating the first one. Caller holds the lock."""
+        raw = os.pread(self._lock_fd, 20, 0).strip()
+        if raw:
+            try:
+                fd = os.open(self._segment_path(int(raw)), os.O_RDWR)
+            except FileNotFoundError:
+                return self._create(int(raw) + 1)
+            try:
+                mm = mmap.mmap(fd, 0)
+            finally:
+                os.close(fd)
+            if mm[:8] == _MAGIC and _HEADER.unpack_from(mm)[2] == self.slots and len(mm) == self.size:
+                return mm
+            return self._create(int(raw) + 1)  # left by a different configuration
+        return self._create(1)
+
+    def _segment(self):
+        """The current segment, remapping if this process's is retired; None if shared memory is unusable."""
+        mm = self._mm
+        if mm is not None and self._pid == os.getpid() and not mm[_RETIRED]:
+            return mm
+        with self._thread_lock:
+            try:
+                self._locked()
+                try:
+                    self._mm = self._map_current()
+                finally:
+                    self._unlock()
+            except OSError as e:
+                print(f"Shared assets unavailable at {self.path}: {e}")
+                return None
+            return self._mm
+
+    # ---- index ----
+
+    def _find(self, mm, digest):
+        """(slot position, data offset, length, expires) of digest, or None."""
+        slots = self.slots
+        index = int.from_bytes(digest[:8], 'little') % slots
+        for _ in range(slots):
+            position = _HEADER_SIZE + index * _SLOT.size
+            offset, length, expires, slot_digest = _SLOT.unpack_from(mm, position)
+            if slot_digest == _EMPTY:
+                return None
+            if slot_digest == digest:
+                return position, offset, length, expires
+            index = (index + 1) % slots
+        return None
+
+    def _insert(self, mm, digest, value, ttl):
+        _, generation, slots, used, entries, _ = _HEADER.unpack_from(mm)
+        offset = used
+        mm[self._data_start + offset:self._data_start + offset + len(value)] = value
+        index = int.from_bytes(digest[:8], 'little') % slots
+        while _SLOT.unpack_from(mm, _HEADER_SIZE + index * _SLOT.size)[3] != _EMPTY:
+            index = (index + 1) % slots
+        expires = time.time() + ttl if ttl else 0.0
+        position = _HEADER_SIZE + index * _SLOT.size
+        _SLOT.pack_into(mm, position, offset, len(value), expires, _EMPTY)
+        mm[position + _SLOT.size - 16:position + _SLOT.size] = digest  # commit
+        _HEADER.pack_into(mm, 0, _MAGIC, generation, slots, used + len(value), entries + 1, 0)
+
+    # ---- public ----
+
+    def get(self, key):
+        """A read-only memoryview of the asset stored under key, or None."""
+        mm = self._segment()
+        if mm is None:
+            return None
+        found = self._find(mm, _digest(key))
+        if found is None:
+            return None
+        _, offset, length, expires = found
+        if expires and expires < time.time():
+            return None
+        start = self._data_start + offset
+        return memoryview(mm).toreadonly()[start:start + length]
+
+    def put(self, key, value, ttl=None):
+        """Store value under key for every process on the host; values over 1/4 of the segment are skipped."""
+        capacity = self.size - self._data_start
+        if len(value) > capacity // 4 or self._segment() is None:
+            return
+        digest = _digest(key)
+        with self._thread_lock:
+            self._locked()
+            try:
+                mm = self._mm
+                if mm is None or mm[_RETIRED]:
+                    mm = self._mm = self._map_current()
+                found = self._find(mm, digest)
+                if found is not None:
+                    if not (found[3] and found[3] < time.time()):
+                        return
+                    position = found[0]
+                    mm[position + _SLOT.size - 16:position + _SLOT.size] = _REPLACED
+                _, generation, _, used, entries, _ = _HEADER.unpack_from(mm)
+                if used + len(value) > capacity or entries + 1 > self.slots * _MAX_LOAD:
+                    # Full: start a new generation
+                    new = self._create(generation + 1)
+                    mm[_RETIRED] = 1
+                    try:
+                        os.unlink(self._segment_path(generation))
+                    except FileNotFoundError:
+                        pass
+                    mm = self._mm = new
+                    metrics.inc('shared_assets_rotations_total')
+                self._insert(mm, digest, value, ttl)
+            finally:
+                self._unlock()
+
+    def delete(self, key):
+        """Mark the asset under key replaced; its bytes are reclaimed at the next rotation."""
+        mm = self._segment()
+        if mm is None:
+            return
+        with self._thread_lock:
+            self._locked()
+            try:
+                found = self._find(self._mm, _digest(key))
+                if found is not None:
+                    self._mm[found[0] + _SLOT.size - 16:found[0] + _SLOT.size] = _REPLACED
+            finally:
+                self._unlock()
+
+    def get_or_create(self, key, build):
+        """The asset under key, built with build() and stored by the first process that needs it."""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.put(key, value)
+            stored = self.get(key)
+            if stored is not None:
+                return stored
+        return value
+
+    def stats(self):
+        mm = self._segment()
+        if mm is None:
+            return {}
+        _, generation, slots, used, entries, _ = _HEADER.unpack_from(mm)
+        return {'generation': generation, 'entries': entries, 'slots': slots,
+                'bytes_used': used, 'bytes_capacity': self.size - self._data_start}
+
+
+_assets = None
+_assets_lock = threading.Lock()
+
+
+def assets():
+    """The host's shared asset segment, or None when SHARED_ASSETS is off."""
+    global _assets
+    if not SHARED_ASSETS_ENABLED:
+        return None
+    with _assets_lock:
+        if _assets is None:
+            _assets = SharedAssets()
+        return _assets
@@ -0,0 +1,183 @@
+"""
+Single-flight rendering: concurrent identical create-presentation requests
+on one host render once. Requests are keyed by the sha256 of the canonical
+payload (with the versions of any library slides it references); the
+first takes an flock on <key>.lock in SINGLEFLIGHT_DIR and
+renders, the rest wait on the same lock and then read the result it left
+in <key>.pptx. flock works across gunicorn workers as well as threads.
+
+Saves are deterministic, so a result written up to SINGLEFLIGHT_TTL
+seconds before a request arrived is the same deck and is served as well.
+If the leader fails, the next waiter renders instead. Rendered decks also
+go to the shared cache (cache.py) for DECK_CACHE_TTL seconds, so other
+nodes reuse them.
+"""
+import asyncio
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+
+import cache
+import metrics
+import slide_library
+
+SINGLEFLIGHT_DIR = os.environ.get('SINGLEFLIGHT_DIR', '/tmp/presentation-singleflight')
+SINGLEFLIGHT_ENABLED = os.environ.get('SINGLEFLIGHT_ENABLED', '1').lower() in ('1', 'true', 'yes')
+SINGLEFLIGHT_TTL = float(os.environ.get('SINGLEFLIGHT_TTL', '5'))
+SINGLEFLIGHT_WAIT = float(os.environ.get('SINGLEFLIGHT_WAIT', '120'))
+DECK_CACHE_TTL = float(os.environ.get('DECK_CACHE_TTL', '300'))
+
+_POLL_MIN, _POLL_MAX = 0.005, 0.1
+_SWEEP_AGE = 60  # seconds; lock and result files untouched this long are removed
+
+_last_sweep = 0.0
+
+
+def key(data):
+    """
+    sha256 of the canonical JSON of data, and of the versions of the library
+    slides it references, so a slide registered again is not served stale.
+    """
+    library = slide_library.versions(data)
+    canonical = json.dumps([data, library] if library else data,
+                           sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def _paths(flight_key):
+    base = os.path.join(SINGLEFLIGHT_DIR, flight_key)
+    return f'{base}.lock', f'{base}.pptx'
+
+
+def _open_lock(lock_path):
+    os.makedirs(SINGLEFLIGHT_DIR, exist_ok=True)
+    return os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+
+
+def _try_lock(fd):
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except BlockingIOError:
+        return False
+
+
+def _result(result_path, started):
+    """The result another request left, if it finished within SINGLEFLIGHT_TTL of started or later."""
+    try:
+        with open(result_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_mtime < started - SINGLEFLIGHT_TTL:
+                return None
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _publish(result_path, blob):
+    tmp_path = f"{result_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp_path, result_path)
+    _sweep()
+
+
+def _sweep():
+    """Remove old lock and result files, at most once a minute per process."""
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep < _SWEEP_AGE:
+        return
+    _last_sweep = now
+    for entry in os.scandir(SINGLEFLIGHT_DIR):
+        try:
+            if now - entry.stat().st_mtime <= _SWEEP_AGE:
+                continue
+            if not entry.name.endswith('.lock'):
+                os.unlink(entry.path)
+                continue
+            fd = os.open(entry.path, os.O_RDWR)
+            try:
+                if _try_lock(fd):  # never remove a lock a render holds
+                    os.unlink(entry.path)
+            finally:
+                os.close(fd)
+        except FileNotFoundError:
+            pass
+
+
+def _shared(blob, result='shared'):
+    metrics.inc('singleflight_requests_total', result=result)
+    return blob, True
+
+
+def _rendered(flight_key, result_path, blob):
+    _publish(result_path, blob)
+    cache.backend().set('deck', flight_key, blob, DECK_CACHE_TTL)
+    metrics.inc('singleflight_requests_total', result='rendered')
+    return blob, False
+
+
+def do(data, render):
+    """
+    (pptx bytes, shared) for data: render() runs here unless an identical
+    request on this host is already rendering it, in which case this waits
+    for that result. shared is True when the bytes came from another request.
+    """
+    if not SINGLEFLIGHT_ENABLED:
+        return render(), False
+    started = time.time()
+    flight_key = key(data)
+    blob = cache.backend().get('deck', flight_key)
+    if blob is not None:
+        return _shared(blob, 'cached')
+    lock_path, result_path = _paths(flight_key)
+    fd = _open_lock(lock_path)
+    try:
+        deadline, delay = time.monotonic() + SINGLEFLIGHT_WAIT, _POLL_MIN
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                print(f"Single-flight wait timed out after {SINGLEFLIGHT_WAIT:.0f}s, rendering")
+                metrics.inc('singleflight_requests_total', result='timeout')
+                return render(), False
+            time.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX)
+
+        blob = _result(result_path, started)
+        if blob is not None:
+            return _shared(blob)
+        return _rendered(flight_key, result_path, render())
+    finally:
+        os.close(fd)  # releases the lock
+
+
+async def do_async(data, render):
+    """do() for the event loop: render is a coroutine function, waiting polls with asyncio.sleep."""
+    if not SINGLEFLIGHT_ENABLED:
+        return await render(), False
+    started = time.time()
+    flight_key = key(data)
+    blob = await asyncio.to_thread(cache.backend().get, 'deck', flight_key)
+    if blob is not None:
+        return _shared(blob, 'cached')
+    lock_path, result_path = _paths(flight_key)
+    fd = _open_lock(lock_path)
+    try:
+        deadline, delay = time.monotonic() + SINGLEFLIGHT_WAIT, _POLL_MIN
+        while not _try_lock(fd):
+            if time.monotonic() > deadline:
+                print(f"Single-flight wait timed out after {SINGLEFLIGHT_WAIT:.0f}s, rendering")
+                metrics.inc('singleflight_requests_total', result='timeout')
+                return await render(), False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, _POLL_MAX)
+
+        blob = await asyncio.to_thread(_result, result_path, started)
+        if blob is not None:
+            return _shared(blob)
+        blob = await render()
+        return await asyncio.to_thread(_rendered, flight_key, result_path, blob)
+    finally:
+        os.close(fd)
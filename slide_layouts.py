@@ -0,0 +1,193 @@
+from xml.sax.saxutils import escape
+
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from pptx.oxml.shapes.picture import CT_Picture
+from pptx.util import Inches
+
+# Branded layouts, built once per theme into the theme template (see
+# corporate_template.theme_template). Each one takes over a stock layout of
+# the base template, so the master and its relationships stay untouched.
+TITLE_LAYOUT = 'Brand Title'
+CONTENT_LAYOUT = 'Brand Content'
+QUOTE_LAYOUT = 'Brand Quote'
+
+_REPLACES = {
+    TITLE_LAYOUT: 'Title Slide',
+    CONTENT_LAYOUT: 'Title Only',
+    QUOTE_LAYOUT: 'Section Header',
+}
+
+# Placeholder boxes (left, top, width, height in inches), font sizes in pt,
+# brand colors and alignment
+TITLE_BOX, TITLE_SIZE, TITLE_STYLE = (1, 3, 8, 1.5), 40, ('WHITE', 'ctr')
+SUBTITLE_BOX, SUBTITLE_SIZE, SUBTITLE_STYLE = (1, 4.5, 8, 1), 16, ('WHITE', 'ctr')
+CONTENT_TITLE_BOX, CONTENT_TITLE_SIZE, CONTENT_TITLE_STYLE = (0.5, 0.8, 9, 0.8), 32, ('DARK_TEAL', 'l')
+SLIDE_NUMBER_BOX, SLIDE_NUMBER_SIZE, SLIDE_NUMBER_STYLE = (8.5, 7.0, 1.0, 0.5), 10, ('DARK_GRAY', 'r')
+
+# Layout decorations (name, preset geometry, brand color, alpha, box) and
+# background colors; None shows the master
+DECORATIONS = {
+    TITLE_LAYOUT: (
+        ('Glow 1', 'ellipse', 'WHITE', 0.05, (6, -0.5, 4, 4)),
+        ('Glow 2', 'ellipse', 'WHITE', 0.05, (-0.5, 5, 3.5, 3.5)),
+        ('Accent Line', 'rect', 'RED', None, (8.5, 6.8, 1, 0.05)),
+    ),
+    CONTENT_LAYOUT: (
+        ('Header Strip', 'rect', 'TEAL', None, (0, 0, 10, 0.08)),
+        ('Title Underline', 'rect', 'RED', None, (0.5, 1.6, 4, 0.05)),
+    ),
+    QUOTE_LAYOUT: (
+        ('Accent Strip', 'rect', 'RED', None, (0, 0, 10, 0.08)),
+    ),
+}
+BACKGROUNDS = {TITLE_LAYOUT: 'TEAL', CONTENT_LAYOUT: None, QUOTE_LAYOUT: 'TEAL'}
+
+# Logo on the title layout: left, top and height in inches
+LOGO_LEFT, LOGO_TOP, LOGO_HEIGHT = 3.8, 1.8, 0.8
+
+SLIDE_NUMBER_IDX = 12
+SLIDE_NUMBER_FIELD_ID = '{B6F15528-21DE-4FAA-801E-634DDDAF4B2B}'
+
+_NS = nsdecls('a', 'p')
+
+
+def _emu(*inches):
+    return [int(Inches(value)) for value in inches]
+
+
+def _xfrm(left, top, width, height):
+    x, y, cx, cy = _emu(left, top, width, height)
+    return f'<a:xfrm><a:off x="{x}" y="{y}"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+
+
+def _shape(shape_id, name, geometry, fill, left, top, width, height):
+    """Decoration drawn on the layout: solid fill, no outline."""
+    return (
+        f'<p:sp {_NS}><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/><p:cNvSpPr/><p:nvPr userDrawn="1"/></p:nvSpPr>'
+        f'<p:spPr>{_xfrm(left, top, width, height)}<a:prstGeom prst="{geometry}"><a:avLst/></a:prstGeom>'
+        f'<a:solidFill>{fill}</a:solidFill><a:ln><a:noFill/></a:ln></p:spPr></p:sp>'
+    )
+
+
+def _placeholder(shape_id, name, ph, box, size, color, theme, align='l', prompt='', field=''):
+    """Placeholder with its position and text style fixed on the layout, so slides only carry the text."""
+    run = field or f'<a:r><a:rPr lang="en-US"/><a:t>{prompt}</a:t></a:r>'
+    return (
+        f'<p:sp {_NS}><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr><p:nvPr>{ph}</p:nvPr></p:nvSpPr>'
+        f'<p:spPr>{_xfrm(*box)}</p:spPr>'
+        f'<p:txBody><a:bodyPr wrap="square" anchor="t"><a:noAutofit/></a:bodyPr><a:lstStyle>'
+        f'<a:lvl1pPr marL="0" indent="0" algn="{align}"><a:buNone/>'
+        f'<a:defRPr sz="{int(size * 100)}" b="0"><a:solidFill><a:srgbClr val="{theme.hex[color]}"/></a:solidFill>'
+        f'<a:latin typeface="{theme.font_name}"/></a:defRPr></a:lvl1pPr></a:lstStyle>'
+        f'<a:p>{run}</a:p></p:txBody></p:sp>'
+    )
+
+
+def _slide_number(shape_id, theme):
+    color, align = SLIDE_NUMBER_STYLE
+    return _placeholder(
+        shape_id, 'Slide Number', f'<p:ph type="sldNum" sz="quarter" idx="{SLIDE_NUMBER_IDX}"/>',
+        SLIDE_NUMBER_BOX, SLIDE_NUMBER_SIZE, color, theme, align=align,
+        field=f'<a:fld id="{SLIDE_NUMBER_FIELD_ID}" type="slidenum"><a:rPr lang="en-US"/><a:t>‹#›</a:t></a:fld>',
+    )
+
+
+def _solid(theme, color, alpha=None):
+    if alpha is None:
+        return f'<a:srgbClr val="{theme.hex[color]}"/>'
+    return f'<a:srgbClr val="{theme.hex[color]}"><a:alpha val="{int(alpha * 100000)}"/></a:srgbClr>'
+
+
+def _decorations(layout, theme):
+    return [
+        _shape(shape_id, name, geometry, _solid(theme, color, alpha), *box)
+        for shape_id, (name, geometry, color, alpha, box) in enumerate(DECORATIONS[layout], start=2)
+    ]
+
+
+def _title_shapes(theme):
+    shapes = _decorations(TITLE_LAYOUT, theme)
+    return shapes + [
+        _placeholder(5, 'Title', '<p:ph type="ctrTitle"/>', TITLE_BOX, TITLE_SIZE, TITLE_STYLE[0], theme,
+                     align=TITLE_STYLE[1], prompt='Click to edit title'),
+        _placeholder(6, 'Subtitle', '<p:ph type="subTitle" idx="1"/>', SUBTITLE_BOX, SUBTITLE_SIZE,
+                     SUBTITLE_STYLE[0], theme, align=SUBTITLE_STYLE[1], prompt='Click to edit subtitle'),
+        _slide_number(7, theme),
+    ]
+
+
+def _content_shapes(theme):
+    shapes = _decorations(CONTENT_LAYOUT, theme)
+    return shapes + [
+        _placeholder(4, 'Title', '<p:ph type="title"/>', CONTENT_TITLE_BOX, CONTENT_TITLE_SIZE,
+                     CONTENT_TITLE_STYLE[0], theme, align=CONTENT_TITLE_STYLE[1], prompt='Click to edit title'),
+        _slide_number(5, theme),
+    ]
+
+
+def _quote_shapes(theme):
+    return _decorations(QUOTE_LAYOUT, theme) + [_slide_number(3, theme)]
+
+
+_BUILDERS = {
+    TITLE_LAYOUT: _title_shapes,
+    CONTENT_LAYOUT: _content_shapes,
+    QUOTE_LAYOUT: _quote_shapes,
+}
+
+
+def add_branded_layouts(prs, theme):
+    """
+    Turn three stock layouts of prs into the brand's title, content and quote
+    layouts: background, header strip and underline, title placeholder and a
+    slide-number field, all in theme's colors and font.
+    """
+    layouts = prs.slide_layouts
+    for name, build in _BUILDERS.items():
+        background = BACKGROUNDS[name]
+        layout = layouts.get_by_name(_REPLACES[name])
+        c_sld = layout._element.cSld
+        c_sld.set('name', name)
+
+        sp_tree = c_sld.spTree
+        for child in list(sp_tree)[2:]:  # keep nvGrpSpPr and grpSpPr
+            sp_tree.remove(child)
+        for xml in build(theme):
+            sp_tree.append(parse_xml(xml))
+
+        if background:
+            # Full-bleed slides cover the master, as the old slide-sized rectangle did
+            layout._element.set('showMasterSp', '0')
+            layout.background.fill.solid()
+            layout.background.fill.fore_color.rgb = theme.colors[background]
+
+    logo = theme.logo
+    if logo:
+        layout = layouts.get_by_name(TITLE_LAYOUT)
+        _, rId = layout.part.get_or_add_image_part(logo.stream())
+        width, height = logo.scaled_size(height=Inches(LOGO_HEIGHT))
+        sp_tree = layout.shapes._spTree
+        sp_tree.append(CT_Picture.new_pic(
+            layout.shapes._next_shape_id, 'Logo', '', rId, Inches(LOGO_LEFT), Inches(LOGO_TOP), width, height
+        ))
+
+
+def add_slide_number(slide, number, live=True):
+    """
+    Give slide the layout's slide-number placeholder. Position and style are
+    inherited; live numbers are a slidenum field that follows reordering,
+    otherwise number is shown as given.
+    """
+    if live:
+        text = f'<a:fld id="{SLIDE_NUMBER_FIELD_ID}" type="slidenum"><a:t>{number}</a:t></a:fld>'
+    else:
+        text = f'<a:r><a:t>{escape(str(number))}</a:t></a:r>'
+    shape_id = slide.shapes._next_shape_id
+    slide.shapes._spTree.insert_element_before(parse_xml(
+        f'<p:sp {_NS}><p:nvSpPr><p:cNvPr id="{shape_id}" name="Slide Number {shape_id}"/>'
+        f'<p:cNvSpPr><a:spLocks noGrp="1"/></p:cNvSpPr>'
+        f'<p:nvPr><p:ph type="sldNum" sz="quarter" idx="{SLIDE_NUMBER_IDX}"/></p:nvPr></p:nvSpPr>'
+        f'<p:spPr/><p:txBody><a:bodyPr/><a:lstStyle/><a:p>{text}</a:p></p:txBody></p:sp>'
+    ), 'p:extLst')
@@ -0,0 +1,166 @@
+"""
+Slide library: slides registered once under an id and stored rendered, one
+small deck per theme with its media. A deck spec references one with
+{"type": "library", "id": "about-us"}; render_presentation splices the
+stored slide in with pptx_zip, so it costs no rendering or image fetching.
+"""
+import json
+import os
+import re
+import shutil
+import threading
+
+import file_media
+import images
+import pptx_zip
+import render
+import themes
+
+SLIDE_LIBRARY_DIR = os.environ.get('SLIDE_LIBRARY_DIR', '/tmp/presentation-slide-library')
+
+LIBRARY_TYPE = 'library'
+
+_SLIDE_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+_cache = {}  # (slide id, theme id) -> (mtime_ns, Package)
+_lock = threading.Lock()
+
+
+class UnknownSlide(ValueError):
+    """A deck referenced a library slide id that is not registered."""
+
+
+def _spec_path(slide_id):
+    return os.path.join(SLIDE_LIBRARY_DIR, f'{slide_id}.json')
+
+
+def _deck_path(slide_id, theme_id):
+    return os.path.join(SLIDE_LIBRARY_DIR, slide_id, f'{theme_id}.pptx')
+
+
+def _write(path, blob):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(blob)
+    os.replace(tmp_path, path)
+
+
+def _load_spec(slide_id):
+    if not _SLIDE_ID.match(str(slide_id)):
+        raise UnknownSlide(f"Invalid library slide id {slide_id!r}")
+    try:
+        with open(_spec_path(slide_id)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise UnknownSlide(f"Unknown library slide {slide_id!r}") from None
+
+
+def _render(slide, theme_id):
+    """A two-slide deck (title, then slide) in theme; slide sits at index 1."""
+    data = {'theme': theme_id, 'slides': [slide]}
+    return render.render_presentation(data, images.fetch_images(data)).getvalue()
+
+
+def register(slide_id, slide, theme_id=None):
+    """Render slide in theme and store it under slide_id, replacing any previous version."""
+    if not _SLIDE_ID.match(str(slide_id)):
+        raise ValueError("Slide id must be 1-64 letters, digits, '-' or '_'")
+    if slide.get('type') not in render.SLIDE_TYPES or slide.get('type') == LIBRARY_TYPE:
+        raise ValueError(f"Cannot register a slide of type {slide.get('type')!r}")
+    slide = {k: v for k, v in slide.items() if k != 'slide_number'}
+    file_media.check({'slides': [slide]})
+    theme = themes.get_theme(theme_id)
+    blob = _render(slide, theme.id)
+
+    # Decks rendered for other themes are from the old spec; they re-render on use
+    shutil.rmtree(os.path.join(SLIDE_LIBRARY_DIR, slide_id), ignore_errors=True)
+    _write(_spec_path(slide_id), json.dumps(slide).encode('utf-8'))
+    _write(_deck_path(slide_id, theme.id), blob)
+    with _lock:
+        for key in [key for key in _cache if key[0] == slide_id]:
+            del _cache[key]
+    print(f"Library slide registered: {slide_id} ({slide['type']}, {theme.id})")
+    return {'id': slide_id, 'type': slide['type'], 'title': slide.get('title', '')}
+
+
+def list_slides():
+    if not os.path.isdir(SLIDE_LIBRARY_DIR):
+        return []
+    slides = []
+    for filename in sorted(os.listdir(SLIDE_LIBRARY_DIR)):
+        if filename.endswith('.json'):
+            slide_id = filename[:-len('.json')]
+            slide = _load_spec(slide_id)
+            slides.append({'id': slide_id, 'type': slide.get('type'), 'title': slide.get('title', '')})
+    return slides
+
+
+def get(slide_id, theme_id):
+    """The stored deck for slide_id in theme_id as a Package, rendering it on first use."""
+    path = _deck_path(slide_id, theme_id)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _write(path, _render(_load_spec(slide_id), theme_id))
+        mtime = os.stat(path).st_mtime_ns
+
+    with _lock:
+        cached = _cache.get((slide_id, theme_id))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'rb') as f:
+        pkg = pptx_zip.Package(f.read())
+    with _lock:
+        _cache[(slide_id, theme_id)] = (mtime, pkg)
+    return pkg
+
+
+def spec(slide_id):
+    """The registered spec of slide_id; UnknownSlide if there is none."""
+    return _load_spec(slide_id)
+
+
+def referenced(data):
+    return [s for s in data.get('slides', []) if s.get('type') == LIBRARY_TYPE]
+
+
+def versions(data):
+    """
+    {slide id: spec mtime} of the library slides data references, for cache
+    keys of rendered decks: it changes when a slide is registered again.
+    """
+    found = {}
+    for slide_data in referenced(data):
+        slide_id = slide_data.get('id')
+        if not _SLIDE_ID.match(str(slide_id)):
+            raise UnknownSlide(f"Invalid library slide id {slide_id!r}")
+        try:
+            found[slide_id] = os.stat(_spec_path(slide_id)).st_mtime_ns
+        except FileNotFoundError:
+            raise UnknownSlide(f"Unknown library slide {slide_id!r}") from None
+    return found
+
+
+def check(data):
+    """Fail fast with UnknownSlide if data references an unregistered slide."""
+    for slide_data in referenced(data):
+        _load_spec(slide_data.get('id'))
+
+
+def splice(data, blob):
+    """Replace the stand-in slides build_presentation made for library slides in blob."""
+    theme_id = themes.get_theme(data.get('theme')).id
+    pkg = pptx_zip.Package(blob)
+    names = pkg.slide_names()
+    position = 1 + bool(data.get('sections'))
+    counter = position + 1
+    for slide_data in data.get('slides', []):
+        if slide_data.get('type') == LIBRARY_TYPE:
+            pkg.replace_slide(position, get(slide_data['id'], theme_id), 1)
+            number = slide_data.get('slide_number', counter)
+            pkg.parts[names[position]] = pptx_zip.set_slide_number(pkg.parts[names[position]], number, number == position + 1)
+        if slide_data.get('type') in render.SLIDE_TYPES:
+            position += 1
+        counter += 1
+    return pkg.save()
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import admission
+import asgi
+from render import SLIDE_TYPES
+
+
+def test_estimate_cost_grows_with_the_deck():
+    quote = {'type': 'quote', 'quote': 'q', 'author': 'a', 'role': 'r'}
+    icons = {'type': 'content_with_icons', 'title': 't', 'items': [{'icon': 'x', 'text': 'a'}] * 4}
+    assert all(slide['type'] in SLIDE_TYPES for slide in (quote, icons))
+
+    one = admission.estimate_cost({'slides': [quote]})
+    assert one == admission.COST_BASE + 2 * admission.COST_SLIDE  # title slide + quote
+    assert admission.estimate_cost({'slides': [quote] * 5}) == one + 4 * admission.COST_SLIDE
+    assert (admission.estimate_cost({'slides': [quote, icons]})
+            == one + admission.COST_SLIDE + 4 * admission.COST_ITEM)
+
+
+def test_sheds_when_the_queue_is_full():
+    controller = admission.AdmissionController(budget=10, queue_budget=0, timeout=1)
+    with controller.admit(10):
+        with pytest.raises(admission.Overloaded) as shed:
+            with controller.admit(5):
+                pass
+    assert shed.value.retry_after >= 1
+    assert controller.in_use == 0
+
+
+def test_sheds_after_waiting_too_long():
+    controller = admission.AdmissionController(budget=10, queue_budget=100, timeout=0.05)
+    with controller.admit(10):
+        with pytest.raises(admission.Overloaded):
+            with controller.admit(5):
+                pass
+    assert controller.waiting == []
+
+
+def test_cheap_request_overtakes_a_waiting_expensive_one():
+    controller = admission.AdmissionController(budget=10, queue_budget=100, timeout=2, starvation_age=10)
+    order = []
+
+    def run(cost, name):
+        with controller.admit(cost):
+            order.append(name)
+
+    with controller.admit(6):
+        expensive = threading.Thread(target=run, args=(8, 'expensive'))
+        expensive.start()
+        while not controller.waiting:
+            time.sleep(0.001)
+        run(4, 'cheap')
+    expensive.join()
+    assert order == ['cheap', 'expensive']
+
+
+def test_cancelled_wait_releases_its_budget(monkeypatch):
+    controller = admission.AdmissionController(budget=10, queue_budget=100, timeout=2)
+    monkeypatch.setattr(admission, 'controller', controller)
+    holder = controller.admit(10)
+    holder.__enter__()
+
+    async def main():
+        async def render():
+            async with asgi._admitted(5):
+                await asyncio.sleep(10)
+
+        task = asyncio.ensure_future(render())
+        while not controller.waiting:
+            await asyncio.sleep(0.001)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        holder.__exit__(None, None, None)  # the abandoned wait is admitted now...
+        for _ in range(1000):
+            await asyncio.sleep(0.001)
+            if not controller.waiting and controller.in_use == 0:
+                break
+
+    asyncio.run(main())
+    assert controller.waiting == []
+    assert controller.in_use == 0  # ...and gives the budget straight back
@@ -0,0 +1,22 @@
+import pytest
+
+import api
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setitem(api.app.config, 'MAX_CONTENT_LENGTH', 1024)
+    return api.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/create-presentation', '/layout', '/preview',
+                                  '/merge-presentations', '/append-slides', '/merge-decks'])
+def test_oversized_bodies_are_413(client, path):
+    response = client.post(path, json={'title': 'x' * 4096})
+    assert response.status_code == 413
+    assert 'payload limit' in response.get_json()['error']
+
+
+def test_malformed_json_is_not_a_server_error(client):
+    response = client.post('/layout', data='{', content_type='application/json')
+    assert response.status_code == 400
@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import zipfile
+
+import pytest
+from starlette.testclient import TestClient
+
+import asgi
+import cache
+import deck_store
+import metrics
+import shared_assets
+import singleflight
+from render import render_presentation
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR4nGNgYGD4DwABBAEAwS2OUAAAAABJRU5ErkJggg=='
+)
+
+
+@pytest.fixture
+def shm_backend(tmp_path, monkeypatch):
+    assets = shared_assets.SharedAssets(str(tmp_path / 'assets'), size=1024 * 1024, slots=256)
+    monkeypatch.setattr(shared_assets, 'assets', lambda: assets)
+    backend = cache.SharedMemoryCache()
+    monkeypatch.setattr(cache, '_backend', backend)
+    monkeypatch.setattr(singleflight, 'SINGLEFLIGHT_ENABLED', False)
+    monkeypatch.setattr(deck_store, 'DECK_STORE_DIR', str(tmp_path / 'decks'))
+    return backend
+
+
+def test_cached_images_reach_the_process_pool(shm_backend, monkeypatch):
+    monkeypatch.setattr(asgi, 'RENDER_EXECUTOR', 'process')
+    monkeypatch.setattr(asgi, 'RENDER_WORKERS', 1)
+    ref = f'sha256:{hashlib.sha256(PNG).hexdigest()}'
+    shm_backend.set('image', ref, PNG)
+    payload = {'title': 'Cached image', 'slides': [
+        {'type': 'image_text_split', 'title': 'Picture', 'content': {'heading': 'x'}, 'image_url': ref},
+    ]}
+    with TestClient(asgi.app) as client:
+        response = client.post('/create-presentation', json=payload)
+    assert response.status_code == 200, response.text
+    deck = zipfile.ZipFile(io.BytesIO(response.content))
+    assert PNG in [deck.read(name) for name in deck.namelist() if name.startswith('ppt/media/')]
+
+
+@pytest.mark.parametrize('executor', ['process', 'thread'])
+def test_render_pool_metrics_reach_the_server(shm_backend, monkeypatch, executor):
+    monkeypatch.setattr(asgi, 'RENDER_EXECUTOR', executor)
+    monkeypatch.setattr(asgi, 'RENDER_WORKERS', 1)
+    before = metrics.get('image_placeholders_total', source='inline')
+    payload = {'title': 'Missing image', 'slides': [
+        {'type': 'image_text_split', 'title': 'Picture', 'content': {'heading': 'x'}, 'image_url': 'sha256:' + '0' * 64},
+    ]}
+    with TestClient(asgi.app) as client:
+        response = client.post('/create-presentation', json=payload)
+        assert response.status_code == 200, response.text
+        exposition = client.get('/metrics').text
+    assert metrics.get('image_placeholders_total', source='inline') == before + 1
+    assert 'image_placeholders_total{source="inline"}' in exposition
+
+
+def test_failed_render_metrics_reach_the_server(shm_backend, monkeypatch):
+    monkeypatch.setattr(asgi, 'RENDER_EXECUTOR', 'process')
+    monkeypatch.setattr(asgi, 'RENDER_WORKERS', 1)
+    monkeypatch.setenv('REQUEST_MEMORY_LIMIT_MB', '0.01')  # read by the spawned pool process
+    before = metrics.get('request_memory_limit_exceeded_total')
+    payload = {'title': 'Over the limit', 'slides': [
+        {'type': 'split', 'title': f'Slide {n}', 'paragraphs': ['text'] * 20} for n in range(20)
+    ]}
+    with TestClient(asgi.app) as client:
+        response = client.post('/create-presentation', json=payload)
+    assert response.status_code == 507, response.text
+    assert metrics.get('request_memory_limit_exceeded_total') == before + 1
+
+
+def test_asgi_and_the_pool_workers_do_not_import_flask():
+    code = ('import sys, asgi, mail_merge; asgi._warm_render_worker(); mail_merge._warm_worker(); '
+            'print(sorted({"api", "flask"} & set(sys.modules)))')
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    assert out.strip() == '[]'
+
+
+def test_merge_enforces_the_payload_limit_while_reading(shm_backend, monkeypatch):
+    monkeypatch.setattr(asgi, 'RENDER_EXECUTOR', 'thread')
+    deck = render_presentation({'title': 'Deck', 'slides': []}).getvalue()
+    deck_id = deck_store.save(deck)
+    monkeypatch.setattr(asgi, 'MAX_PAYLOAD_BYTES', len(deck) * 3 // 2)
+    with TestClient(asgi.app) as client:
+        ok = client.post('/merge-decks', json={'deck_ids': [deck_id]})
+        assert ok.status_code == 200, ok.text
+        uploads = [('decks', (f'{n}.pptx', deck)) for n in range(2)]
+        assert client.post('/merge-decks', files=uploads).status_code == 413
+        assert client.post('/merge-decks', json={'deck_ids': [deck_id, deck_id]}).status_code == 413
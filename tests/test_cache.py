@@ -0,0 +1,113 @@
+import threading
+import time
+
+import pytest
+
+import cache
+import shared_assets
+
+
+@pytest.fixture
+def stand_ins():
+    servers = [cache.StandInServer(('127.0.0.1', 0)) for _ in range(2)]
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield [f'redis://127.0.0.1:{server.server_address[1]}/0' for server in servers]
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def segment(tmp_path, monkeypatch):
+    assets = shared_assets.SharedAssets(str(tmp_path / 'assets'), size=1024 * 1024, slots=256)
+    monkeypatch.setattr(shared_assets, 'assets', lambda: assets)
+    return assets
+
+
+@pytest.fixture(params=['memory', 'file', 'shm', 'redis'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return cache.MemoryCache()
+    if request.param == 'file':
+        return cache.FileCache(str(tmp_path / 'cache'))
+    if request.param == 'shm':
+        request.getfixturevalue('segment')
+        return cache.SharedMemoryCache()
+    return cache.RedisCache(request.getfixturevalue('stand_ins'))
+
+
+def test_get_set_delete(backend):
+    assert backend.get('deck', 'a') is None
+    backend.set('deck', 'a', b'alpha')
+    backend.set('deck', 'b', b'beta')
+    assert backend.get('deck', 'a') == b'alpha'
+    assert backend.get('image', 'a') is None  # namespaces are separate
+    assert backend.get_many('deck', ['a', 'b', 'c']) == {'a': b'alpha', 'b': b'beta'}
+    backend.delete('deck', 'a')
+    assert backend.get('deck', 'a') is None
+
+
+def test_bytearray_values_round_trip(backend):
+    backend.set('image', 'decoded', bytearray(b'\x89PNG\r\n'))
+    assert backend.get('image', 'decoded') == b'\x89PNG\r\n'
+
+
+def test_entries_expire(backend):
+    backend.set('deck', 'short', b'x', ttl=0.05)
+    backend.set('deck', 'long', b'y', ttl=60)
+    time.sleep(0.1)
+    assert backend.get('deck', 'short') is None
+    assert backend.get('deck', 'long') == b'y'
+
+
+def test_memory_cache_evicts_least_recently_used():
+    lru = cache.MemoryCache(max_bytes=10)
+    lru.set('n', 'a', b'aaaa')
+    lru.set('n', 'b', b'bbbb')
+    lru.get('n', 'a')
+    lru.set('n', 'c', b'cccc')
+    assert lru.get_many('n', ['a', 'b', 'c']) == {'a': b'aaaa', 'c': b'cccc'}
+
+
+def test_file_cache_sweeps_down_to_its_size(tmp_path):
+    files = cache.FileCache(str(tmp_path), max_bytes=100)
+    for i in range(10):
+        files.set('n', str(i), bytes(40))
+    files.sweep()
+    assert len(files.get_many('n', [str(i) for i in range(10)])) <= 2
+
+
+def test_redis_server_down_reads_as_a_miss():
+    redis = cache.RedisCache(['redis://127.0.0.1:1/0'], timeout=0.2)
+    redis.set('n', 'a', b'x')
+    assert redis.get('n', 'a') is None
+
+
+def test_redis_keys_are_spread_over_the_servers(stand_ins):
+    redis = cache.RedisCache(stand_ins)
+    for i in range(200):
+        redis.set('n', str(i), b'x')
+    per_server = {url: 0 for url in stand_ins}
+    for i in range(200):
+        per_server[redis._ring.node(cache._name('n', str(i)))] += 1
+    assert all(count > 40 for count in per_server.values())
+    assert len(redis.get_many('n', [str(i) for i in range(200)])) == 200
+
+
+def test_hash_ring_spreads_keys_evenly():
+    nodes = ['a', 'b', 'c', 'd']
+    ring = cache.HashRing(nodes)
+    counts = {node: 0 for node in nodes}
+    for i in range(20000):
+        counts[ring.node(f'key{i}')] += 1
+    assert all(3500 < count < 6500 for count in counts.values()), counts
+
+
+def test_removing_a_node_only_moves_its_keys():
+    keys = [f'key{i}' for i in range(5000)]
+    before = cache.HashRing(['a', 'b', 'c', 'd'])
+    after = cache.HashRing(['a', 'b', 'c'])
+    moved = [key for key in keys if before.node(key) != after.node(key)]
+    assert moved and all(before.node(key) == 'd' for key in moved)
+    assert {after.node(key) for key in moved} == {'a', 'b', 'c'}
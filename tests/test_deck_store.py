@@ -0,0 +1,71 @@
+import os
+import time
+
+import pytest
+
+import deck_store
+import metrics
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(deck_store, 'DECK_STORE_DIR', str(tmp_path))
+    monkeypatch.setattr(deck_store, 'DECK_STORE_MAX_BYTES', 2500)
+    monkeypatch.setattr(deck_store, '_last_sweep', time.time())
+    monkeypatch.setattr(deck_store, '_written', 0)
+    return tmp_path
+
+
+@pytest.fixture
+def manual(store, monkeypatch):
+    monkeypatch.setattr(deck_store, '_sweep', lambda saved=0: None)
+    return store
+
+
+def _age(deck_id, seconds):
+    mtime = time.time() - seconds
+    os.utime(deck_store.deck_path(deck_id), (mtime, mtime))
+
+
+def test_size_cap_evicts_least_recently_saved(manual):
+    before = metrics.get('deck_store_evictions_total')
+    ids = []
+    for n in range(3):
+        ids.append(deck_store.save(bytes([n]) * 1000))
+        _age(ids[-1], 600 - n * 100)
+    deck_store.save(bytes([0]) * 1000)  # saved again: now the most recent
+    deck_store.sweep()
+
+    assert not os.path.exists(deck_store.deck_path(ids[1]))
+    assert deck_store.load(ids[0]) == bytes([0]) * 1000
+    assert deck_store.load(ids[2]) == bytes([2]) * 1000
+    assert metrics.get('deck_store_evictions_total') == before + 1
+
+
+def test_recent_decks_are_kept_over_the_cap(manual):
+    ids = [deck_store.save(bytes([n]) * 2000) for n in range(2)]
+    deck_store.sweep()
+    assert all(os.path.exists(deck_store.deck_path(deck_id)) for deck_id in ids)
+
+
+def test_saving_a_tenth_of_the_cap_triggers_a_sweep(store):
+    old = deck_store.save(b'a' * 2000)
+    _age(old, 600)
+    deck_store.save_file(_written(store, b'b' * 1000))
+    assert not os.path.exists(deck_store.deck_path(old))
+
+
+def test_age_limit_removes_stale_decks(manual):
+    old = deck_store.save(b'old')
+    _age(old, deck_store.DECK_STORE_MAX_AGE + 1)
+    fresh = deck_store.save(b'fresh')
+    deck_store.sweep()
+    assert not os.path.exists(deck_store.deck_path(old))
+    assert deck_store.load(fresh) == b'fresh'
+
+
+def _written(store, blob):
+    path = deck_store.temp_path()
+    with open(path, 'wb') as f:
+        f.write(blob)
+    return path
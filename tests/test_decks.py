@@ -0,0 +1,108 @@
+import io
+import re
+import zipfile
+
+import pytest
+from pptx import Presentation
+
+import deck_append
+import deck_merge
+from render import render_presentation
+
+SLIDES = [
+    {'type': 'split', 'title': 'Points', 'paragraphs': ['One', 'Two']},
+    {'type': 'stats', 'title': 'Numbers', 'stats': [{'number': '42', 'label': 'Answer'}]},
+]
+
+
+@pytest.fixture(scope='module')
+def deck():
+    return render_presentation({'title': 'Deck', 'slides': SLIDES}).getvalue()
+
+
+def _titles(blob):
+    prs = Presentation(io.BytesIO(blob))
+    return [slide.shapes.title.text if slide.shapes.title is not None else None for slide in prs.slides]
+
+
+def _rewritten(blob, changes):
+    """blob with entries replaced (bytes), edited (a function of the old bytes) or removed (None)."""
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(blob)) as src, zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            change = changes.get(info.filename, ...)
+            if change is None:
+                continue
+            data = src.read(info)
+            if change is not ...:
+                data = change(data) if callable(change) else change
+            dst.writestr(info.filename, data)
+    return out.getvalue()
+
+
+def test_merged_deck_opens_with_every_slide(deck):
+    merged = deck_merge.merge_decks(deck_merge.open_decks([deck, deck, deck]))
+    assert zipfile.ZipFile(io.BytesIO(merged)).testzip() is None
+    assert len(_titles(merged)) == 3 * len(_titles(deck))
+
+
+def test_appended_deck_opens_with_the_new_slides(deck):
+    appended = deck_append.append_slides(deck, {'slides': [{'type': 'split', 'title': 'Extra', 'paragraphs': ['x']}]})
+    assert zipfile.ZipFile(io.BytesIO(appended)).testzip() is None
+    titles = _titles(appended)
+    assert titles[:-1] == _titles(deck)
+    assert titles[-1] == 'Extra'
+
+
+def _malformed(deck):
+    slide = 'ppt/slides/slide2.xml'
+    return {
+        'not a zip': b'PK\x03\x04 definitely not a deck',
+        'truncated': deck[:len(deck) // 2],
+        'no presentation part': _rewritten(deck, {'ppt/presentation.xml': None}),
+        'slide id without a relationship': _rewritten(deck, {
+            'ppt/_rels/presentation.xml.rels': lambda xml: re.sub(rb'Id="rId\d+"([^>]*slides/slide2)', rb'Id="rId999"\1', xml),
+        }),
+        'slide without a layout': _rewritten(deck, {
+            f'ppt/slides/_rels/slide2.xml.rels': lambda xml: re.sub(rb'<Relationship [^>]*slideLayout[^>]*/>', b'', xml),
+        }),
+        'broken slide xml': _rewritten(deck, {slide: b'<p:sld'}),
+        'missing slide part': _rewritten(deck, {slide: None}),
+        'broken content types': _rewritten(deck, {'[Content_Types].xml': b'<Types/>'}),
+    }
+
+
+def test_malformed_decks_are_invalid_not_errors(deck):
+    for case, blob in _malformed(deck).items():
+        for attempt in (
+            lambda: deck_merge.merge_decks(deck_merge.open_decks([deck, blob])),
+            lambda: deck_merge.merge_decks(deck_merge.open_decks([blob, deck])),
+            lambda: deck_append.append_slides(blob, {'slides': SLIDES[:1]}),
+        ):
+            try:
+                attempt()
+            except deck_append.InvalidDeck:
+                pass
+            except Exception as e:  # pragma: no cover - the failure report
+                pytest.fail(f"{case}: {type(e).__name__}: {e}")
+
+
+@pytest.mark.parametrize('error', [AttributeError, TypeError, KeyError])
+def test_bugs_in_our_code_are_not_invalid_decks(deck, monkeypatch, error):
+    def broken(*args, **kwargs):
+        raise error('bug')
+
+    monkeypatch.setattr(deck_append.pptx_zip, 'set_slide_number', broken)
+    with pytest.raises(error):
+        deck_append.append_slides(deck, {'slides': SLIDES[:1]})
+    with pytest.raises(error):
+        deck_merge.merge_decks(deck_merge.open_decks([deck, deck]))
+
+
+def test_saves_are_byte_reproducible(deck):
+    again = render_presentation({'title': 'Deck', 'slides': SLIDES}).getvalue()
+    assert again == deck
+    other = render_presentation({'title': 'Other deck', 'slides': SLIDES}).getvalue()
+    assert other != deck
+    merged = [deck_merge.merge_decks(deck_merge.open_decks([deck, deck])) for _ in range(2)]
+    assert merged[0] == merged[1]
@@ -0,0 +1,69 @@
+import io
+import os
+import zipfile
+
+import pytest
+from PIL import Image
+
+import api
+import cache
+import deck_store
+import file_media
+import singleflight
+
+
+@pytest.fixture
+def media(tmp_path, monkeypatch):
+    root = tmp_path / 'media'
+    root.mkdir()
+    monkeypatch.setattr(file_media, 'LARGE_MEDIA_ROOT', str(root))
+    monkeypatch.setattr(file_media, 'LARGE_MEDIA_BYTES', 1024)
+    monkeypatch.setattr(cache, '_backend', cache.MemoryCache())
+    monkeypatch.setattr(singleflight, 'SINGLEFLIGHT_ENABLED', False)
+    monkeypatch.setattr(deck_store, 'DECK_STORE_DIR', str(tmp_path / 'decks'))
+    return root
+
+
+def _payload(path):
+    return {'title': 'Media', 'slides': [
+        {'type': 'image_text_split', 'title': 'Picture', 'content': {'heading': 'x'}, 'image_url': str(path)},
+    ]}
+
+
+def test_media_under_the_root_is_linked(media):
+    path = media / 'photo.png'
+    Image.new('RGB', (300, 300), 'red').save(path, optimize=False, compress_level=0)
+    assert file_media.is_large(str(path))
+    response = api.app.test_client().post('/create-presentation', json=_payload(path))
+    assert response.status_code == 200, response.get_data(as_text=True)
+    deck = zipfile.ZipFile(io.BytesIO(response.data))
+    assert path.read_bytes() in [deck.read(name) for name in deck.namelist() if name.startswith('ppt/media/')]
+
+
+@pytest.mark.parametrize('ref', ['/etc/passwd', 'requirements.txt', '{root}/../secret.png', '{root}/link.png'])
+def test_paths_outside_the_root_are_400(media, ref):
+    secret = media.parent / 'secret.png'
+    Image.new('RGB', (300, 300), 'red').save(secret)
+    os.symlink(secret, media / 'link.png')
+    ref = ref.format(root=media)
+    with pytest.raises(file_media.MediaRefused):
+        file_media.check(_payload(ref))
+    assert not file_media.is_large(ref)
+    response = api.app.test_client().post('/create-presentation', json=_payload(ref))
+    assert response.status_code == 400
+    assert 'media volume' in response.get_json()['error']
+
+
+def test_no_local_paths_without_a_root(media, monkeypatch):
+    monkeypatch.setattr(file_media, 'LARGE_MEDIA_ROOT', '')
+    path = media / 'photo.png'
+    Image.new('RGB', (10, 10)).save(path)
+    with pytest.raises(file_media.MediaRefused):
+        file_media.check(_payload(path))
+
+
+def test_mail_merge_rows_cannot_fill_in_outside_paths(media):
+    spec = _payload('{{photo}}')
+    response = api.app.test_client().post('/merge-presentations', json={'deck': spec, 'rows': [{'photo': '/etc/passwd'}]})
+    assert response.status_code == 400
+    assert 'media volume' in response.get_json()['error']
@@ -0,0 +1,32 @@
+from PIL import Image
+
+import icons
+
+
+def _overrides_in(monkeypatch, path):
+    monkeypatch.setattr(icons, 'ICONS_DIR', str(path))
+    monkeypatch.setattr(icons, '_overrides', None)
+
+
+def test_bundled_names_and_emoji():
+    assert icons.icon_name('rocket') == 'rocket'
+    assert icons.icon_name('🚀') == 'rocket'
+    assert icons.icon_name('✔️') == 'check'
+    assert icons.icon_name('no-such-icon') is None
+
+
+def test_override_png_is_found_by_name(tmp_path, monkeypatch):
+    Image.new('RGBA', (8, 8)).save(tmp_path / 'custom.png')
+    _overrides_in(monkeypatch, tmp_path)
+    assert icons.icon_name('custom') == 'custom'
+    assert icons.overrides() == {'custom': str(tmp_path / 'custom.png')}
+
+
+def test_paths_never_reach_the_filesystem(tmp_path, monkeypatch):
+    outside = tmp_path / 'secret.png'
+    Image.new('RGBA', (8, 8)).save(outside)
+    (tmp_path / 'icons').mkdir()
+    _overrides_in(monkeypatch, tmp_path / 'icons')
+    for name in (str(tmp_path / 'secret'), '../secret', 'icons/../secret'):
+        assert icons.icon_name(name) is None
+        assert icons.icon_png(name, 'FFFFFF', '000000') is None
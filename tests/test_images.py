@@ -0,0 +1,83 @@
+import asyncio
+import base64
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import images
+
+PNG = base64.b64decode(
+    'iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR4nGNgYGD4DwABBAEAwS2OUAAAAABJRU5ErkJggg=='
+)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.startswith('/redirect'):
+            self.send_response(302)
+            self.send_header('Location', self.path.split('?to=', 1)[1])
+            self.end_headers()
+            return
+        body = self.headers['Host'].encode() if self.path == '/host' else PNG
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def port():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+
+
+def test_private_and_reserved_addresses_are_blocked(port):
+    for url in (f'http://127.0.0.1:{port}/img', 'http://169.254.169.254/latest/meta-data/',
+                'http://[::1]/img', 'http://10.0.0.1/img', 'file:///etc/passwd'):
+        with pytest.raises(images.ImageBlocked):
+            images.fetch_image(url)
+
+
+def test_allowed_private_host(port, monkeypatch):
+    monkeypatch.setattr(images, 'IMAGE_PRIVATE_HOSTS', frozenset({'127.0.0.1'}))
+    assert images.fetch_image(f'http://127.0.0.1:{port}/img') == PNG
+
+
+def test_redirect_to_a_private_address_is_blocked(port, monkeypatch):
+    monkeypatch.setattr(images, 'IMAGE_PRIVATE_HOSTS', frozenset({'localhost'}))
+    target = f'http://127.0.0.1:{port}/img'
+    with pytest.raises(images.ImageBlocked):
+        images.fetch_image(f'http://localhost:{port}/redirect?to={target}')
+    with pytest.raises(images.ImageBlocked):
+        asyncio.run(_fetch_async(f'http://localhost:{port}/redirect?to={target}'))
+
+
+def test_connection_is_pinned_to_the_checked_address(port, monkeypatch):
+    # Treat loopback as public to see what a public fetch sends
+    monkeypatch.setattr(images, '_is_public', lambda address: True)
+    assert images.fetch_image(f'http://localhost:{port}/host') == f'localhost:{port}'.encode()
+    assert images.fetch_image(f'http://localhost:{port}/redirect?to=/img') == PNG
+    assert asyncio.run(_fetch_async(f'http://localhost:{port}/host')) == f'localhost:{port}'.encode()
+
+
+async def _fetch_async(url):
+    async with images.async_client() as client:
+        return await images.fetch_image_async(url, client)
+
+
+def test_inline_images_are_decoded_once():
+    uri = 'data:image/png;base64,' + base64.b64encode(PNG).decode()
+    data = {'slides': [{'image_url': uri}, {'members': [{'image_url': uri}]},
+                       {'image_base64': base64.b64encode(PNG).decode()}]}
+    found = images.decode_inline_images(data)
+    assert list(found.values()) == [PNG]
+    ref = next(iter(found))
+    assert images.is_content_ref(ref)
+    assert list(images.image_refs(data)) == [ref, ref, ref]
+    assert isinstance(found[ref], bytearray)  # the decode buffer itself, not a copy of it
@@ -0,0 +1,40 @@
+import pytest
+
+import api
+import layout_dry_run
+import slide_library
+
+STATS = {'type': 'stats', 'title': 'Our numbers', 'stats': [{'number': '42', 'label': 'Answer'}]}
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    monkeypatch.setattr(slide_library, 'SLIDE_LIBRARY_DIR', str(tmp_path))
+    slide_library.register('numbers', STATS)
+    return tmp_path
+
+
+def test_geometry_and_warnings_per_slide():
+    timeline = {'type': 'timeline', 'title': 'Plan', 'milestones': [{'date': str(i), 'event': 'x'} for i in range(8)]}
+    result = layout_dry_run.dry_run({'title': 'Deck', 'slides': [timeline]})
+    assert [slide['type'] for slide in result['slides']] == ['title', 'timeline']
+    assert any(w['type'] == 'truncated' for w in result['slides'][1]['warnings'])
+    assert result['cost']['slides'] == 2
+
+
+def test_library_slide_is_recorded_as_registered(library):
+    result = layout_dry_run.dry_run({'title': 'Deck', 'slides': [{'type': 'library', 'id': 'numbers'}]})
+    slide = result['slides'][1]
+    assert slide['type'] == 'stats'
+    assert slide['library_id'] == 'numbers'
+    texts = [shape.get('text') for shape in slide['shapes']]
+    assert 'Our numbers' in texts and '42' in texts
+
+
+def test_unknown_library_slide_is_400_like_a_render(library):
+    client = api.app.test_client()
+    payload = {'title': 'Deck', 'slides': [{'type': 'library', 'id': 'nope'}]}
+    for path in ('/layout', '/preview', '/create-presentation'):
+        response = client.post(path, json=payload)
+        assert response.status_code == 400, path
+        assert 'Unknown library slide' in response.get_json()['error']
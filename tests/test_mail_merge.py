@@ -0,0 +1,34 @@
+import pytest
+
+import mail_merge
+
+
+def test_rows_from_json_jsonl_and_csv():
+    expected = [{'name': 'Ada'}, {'name': 'Grace'}]
+    assert mail_merge.load_rows('[{"name": "Ada"}, {"name": "Grace"}]') == expected
+    assert mail_merge.load_rows('{"name": "Ada"}\n{"name": "Grace"}\n') == expected
+    assert mail_merge.load_rows(b'\xef\xbb\xbfname\nAda\nGrace\n', 'csv') == expected
+
+
+@pytest.mark.parametrize('rows', [{'name': 'Ada'}, 42, '[1, 2]', '[{"name": ', b'\xff\xfe\x00'])
+def test_unreadable_rows_are_merge_errors(rows):
+    with pytest.raises(mail_merge.MergeError):
+        mail_merge.load_rows(rows, 'json' if isinstance(rows, str) else None)
+
+
+def test_fill_keeps_whole_placeholder_values():
+    spec = {'title': 'Hi {{name}}', 'stats': '{{stats}}', 'nested': ['{{a.b}}']}
+    row = {'name': 'Ada', 'stats': [1, 2], 'a': {'b': 3}}
+    assert mail_merge.fill(spec, row) == {'title': 'Hi Ada', 'stats': [1, 2], 'nested': [3]}
+    with pytest.raises(mail_merge.MergeError):
+        mail_merge.fill('{{missing}}', row)
+
+
+def test_chart_values_from_rows_must_be_numbers():
+    spec = {'slides': [{'type': 'chart', 'chart_data': {'series': [{'name': 'Sales', 'values': ['{{q1}}', 2]}]}}]}
+    data = mail_merge.fill(spec, {'q1': '1.5'})
+    mail_merge._numeric_chart_values(data)
+    assert data['slides'][0]['chart_data']['series'][0]['values'] == [1.5, 2]
+    data = mail_merge.fill(spec, {'q1': 'n/a'})
+    with pytest.raises(mail_merge.MergeError, match='Sales'):
+        mail_merge._numeric_chart_values(data)
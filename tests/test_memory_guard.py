@@ -0,0 +1,41 @@
+import tracemalloc
+
+import pytest
+
+import memory_guard
+
+MB = memory_guard.MB
+
+
+@pytest.fixture(autouse=True)
+def _stop_tracing():
+    yield
+    tracemalloc.stop()
+
+
+def test_peak_of_one_request():
+    with memory_guard.RequestMemory(enabled=True) as usage:
+        block = bytearray(8 * MB)
+        del block
+    assert usage.peak >= 8 * MB
+
+
+def test_overlapping_request_does_not_hide_a_peak():
+    # A peaks and frees, then B starts (which resets the process peak) while A is still open
+    a = memory_guard.RequestMemory(enabled=True).__enter__()
+    block = bytearray(16 * MB)
+    del block
+    with memory_guard.RequestMemory(enabled=True) as b:
+        small = bytearray(MB)
+        del small
+    a.__exit__(None, None, None)
+    assert a.peak >= 16 * MB
+    assert MB // 2 < b.peak < 16 * MB
+
+
+def test_ceiling():
+    with pytest.raises(memory_guard.MemoryLimitExceeded):
+        with memory_guard.RequestMemory(limit=4 * MB, enabled=True):
+            block = bytearray(8 * MB)
+            memory_guard.checkpoint()
+            del block
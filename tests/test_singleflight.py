@@ -0,0 +1,58 @@
+import os
+import threading
+
+import pytest
+
+import cache
+import singleflight
+import slide_library
+
+
+@pytest.fixture(autouse=True)
+def _isolated(tmp_path, monkeypatch):
+    monkeypatch.setattr(singleflight, 'SINGLEFLIGHT_DIR', str(tmp_path / 'flights'))
+    monkeypatch.setattr(singleflight, 'SINGLEFLIGHT_ENABLED', True)
+    monkeypatch.setattr(cache, '_backend', cache.MemoryCache())
+    monkeypatch.setattr(slide_library, 'SLIDE_LIBRARY_DIR', str(tmp_path / 'library'))
+
+
+def test_key_ignores_key_order():
+    assert singleflight.key({'a': 1, 'b': [1, 2]}) == singleflight.key({'b': [1, 2], 'a': 1})
+    assert singleflight.key({'a': 1}) != singleflight.key({'a': 2})
+
+
+def test_concurrent_identical_requests_render_once():
+    renders = []
+    started = threading.Event()
+
+    def render():
+        renders.append(1)
+        started.wait(1)
+        return b'deck'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(singleflight.do({'title': 'x'}, render)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    assert len(renders) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert {blob for blob, _ in results} == {b'deck'}
+
+
+def test_registering_a_library_slide_again_changes_the_key():
+    os.makedirs(slide_library.SLIDE_LIBRARY_DIR)
+    spec_path = os.path.join(slide_library.SLIDE_LIBRARY_DIR, 'about.json')
+    with open(spec_path, 'w') as f:
+        f.write('{"type": "quote", "quote": "v1"}')
+    data = {'title': 'x', 'slides': [{'type': 'library', 'id': 'about'}]}
+    before = singleflight.key(data)
+    assert singleflight.do(data, lambda: b'v1') == (b'v1', False)
+
+    stat = os.stat(spec_path)
+    os.utime(spec_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert singleflight.key(data) != before
+    assert singleflight.do(data, lambda: b'v2') == (b'v2', False)
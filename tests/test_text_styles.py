@@ -0,0 +1,64 @@
+import io
+
+import pytest
+from pptx import Presentation
+from pptx.oxml.ns import qn
+
+from render import render_presentation
+
+SLIDES = [
+    {'type': 'split', 'title': 'Points', 'paragraphs': ['Body text']},
+    {'type': 'quote', 'quote': 'Quoted', 'author': 'Ada', 'role': 'Engineer'},
+    {'type': 'stats', 'title': 'Numbers', 'stats': [{'number': '42', 'label': 'Answer'}]},
+]
+
+
+@pytest.fixture(scope='module')
+def prs():
+    return Presentation(render_presentation({'title': 'Styles', 'slides': SLIDES}))
+
+
+def _effective(prs, shape, paragraph):
+    """(color, size, alignment, font) of paragraph's first run, resolved the way PowerPoint inherits them."""
+    level = int(paragraph._p.pPr.get('lvl', '0')) if paragraph._p.pPr is not None else 0
+    tag = qn(f'a:lvl{level + 1}pPr')
+    levels = [
+        shape.text_frame._txBody.find(qn('a:lstStyle')).find(tag),
+        prs.slide_master._element.find(f"{qn('p:txStyles')}/{qn('p:otherStyle')}").find(tag),
+        prs._element.find(qn('p:defaultTextStyle')).find(tag),
+    ]
+    run = paragraph.runs[0]._r.find(qn('a:rPr'))
+    chars = [run] + [lvl.find(qn('a:defRPr')) for lvl in levels if lvl is not None]
+    paras = [paragraph._p.pPr] + levels
+
+    def first(elements, read):
+        return next((value for value in map(read, [e for e in elements if e is not None]) if value), None)
+
+    color = first(chars, lambda e: e.find(f"{qn('a:solidFill')}/{qn('a:srgbClr')}") is not None
+                  and e.find(f"{qn('a:solidFill')}/{qn('a:srgbClr')}").get('val'))
+    font = first(chars, lambda e: e.find(qn('a:latin')) is not None and e.find(qn('a:latin')).get('typeface'))
+    return color, first(chars, lambda e: e.get('sz')), first(paras, lambda e: e.get('algn')), font
+
+
+def test_indenting_a_line_keeps_its_style(prs):
+    checked = 0
+    for slide in prs.slides:
+        for shape in slide.shapes:
+            if not shape.has_text_frame or not shape.text_frame._txBody.find(qn('a:p')).findall(qn('a:r')):
+                continue
+            if shape.is_placeholder:
+                continue
+            paragraph = shape.text_frame.paragraphs[0]
+            before = _effective(prs, shape, paragraph)
+            assert None not in before, shape.text_frame.text
+            paragraph.level = 1  # what Tab does in PowerPoint
+            assert _effective(prs, shape, paragraph) == before, shape.text_frame.text
+            paragraph.level = 0
+            checked += 1
+    assert checked >= 5
+
+
+def test_nested_levels_keep_their_indent(prs):
+    default = prs._element.find(qn('p:defaultTextStyle'))
+    margins = [int(default.find(qn(f'a:lvl{n}pPr')).get('marL', '0')) for n in range(1, 4)]
+    assert margins == sorted(margins) and margins[0] < margins[2]
@@ -0,0 +1,38 @@
+import pytest
+
+import themes
+
+
+def test_theme_inherits_missing_colors_from_its_base():
+    base = themes.Theme.from_dict(themes.WALDOM)
+    theme = themes.Theme.from_dict({'id': 'acme', 'colors': {'TEAL': '#112233'}, 'tagline': 'ignored'}, base=base)
+    assert theme.hex['TEAL'] == '112233'
+    assert theme.hex['RED'] == base.hex['RED']
+    assert theme.font_name == base.font_name
+    assert str(theme.colors['TEAL']) == '112233'
+
+
+def test_unknown_theme():
+    with pytest.raises(themes.UnknownTheme):
+        themes.get_theme('no-such-theme')
+
+
+def test_master_images_accept_a_path(tmp_path):
+    from PIL import Image
+
+    Image.new('RGB', (20, 10)).save(tmp_path / 'mark.png')
+    theme = themes.Theme.from_dict(
+        {'id': 'marked', 'master_images': ['mark.png', {'path': 'mark.png', 'left': 1, 'width': 2}]},
+        base=themes.Theme.from_dict(themes.WALDOM), base_dir=str(tmp_path),
+    )
+    assert [placed.width for placed in theme.master_images][1] == 2 * 914400
+    assert theme.master_images[1].height == 914400
+
+
+def test_malformed_master_images_are_config_errors(tmp_path):
+    for entry in (42, {'path': 'mark.png', 'left': 'one'}):
+        with pytest.raises(themes.BrandConfigError):
+            themes.Theme.from_dict({'id': 'bad', 'colors': {}, 'master_images': [entry]}, base_dir=str(tmp_path))
+    (tmp_path / 'bad.json').write_text('{"id": "bad", "master_images": [7]}')
+    with pytest.raises(themes.BrandConfigError, match='bad.json'):
+        themes.load_themes(str(tmp_path))
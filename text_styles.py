@@ -0,0 +1,102 @@
+from xml.sax.saxutils import escape
+
+from pptx.enum.text import MSO_ANCHOR
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls, qn
+
+# Named text styles: (name, brand color, alignment, default size in pt).
+# Body is the deck's default text style at every list level
+# (add_text_styles), so body text carries no formatting of its own; any
+# other style is applied to its paragraph and runs directly. Styles are
+# not picked by list level: the level is what Tab and Shift+Tab change in
+# PowerPoint, so a user indenting a line would silently restyle it, and
+# real bullet nesting would have no levels left. Titles and slide numbers
+# are styled by the layouts instead.
+STYLES = (
+    ('body', 'DARK_GRAY', 'l', 18),
+    ('heading', 'DARK_TEAL', 'l', 20),
+    ('caption', 'DARK_GRAY', 'ctr', 14),
+    ('figure', 'DARK_TEAL', 'ctr', 18),
+    ('inverse', 'WHITE', 'ctr', 16),
+    ('date-chip', 'WHITE', 'ctr', 10),
+    ('alert', 'RED', 'ctr', 12),
+)
+
+_BY_NAME = {name: (color, align, size * 100) for name, color, align, size in STYLES}
+BODY = STYLES[0][0]
+SIZES = {name: size for name, (_, _, size) in _BY_NAME.items()}
+
+_NS = nsdecls('a', 'p')
+_LIST_LEVELS = 9
+
+
+def _fill_xml(hex_color):
+    return f'<a:solidFill><a:srgbClr val="{hex_color}"/></a:solidFill>'
+
+
+def _apply(list_style, theme):
+    """Body style at every level of list_style, keeping each level's indent and bullet."""
+    color, align, size = _BY_NAME[BODY]
+    for level in range(1, _LIST_LEVELS + 1):
+        ppr = list_style.find(qn(f'a:lvl{level}pPr'))
+        if ppr is None:
+            ppr = parse_xml(f'<a:lvl{level}pPr {nsdecls("a")}/>')
+            list_style.append(ppr)
+        ppr.set('algn', align)
+        old = ppr.find(qn('a:defRPr'))
+        if old is not None:
+            ppr.remove(old)
+        rpr = parse_xml(
+            f'<a:defRPr {nsdecls("a")} sz="{size}">{_fill_xml(theme.hex[color])}'
+            f'<a:latin typeface="{theme.font_name}"/></a:defRPr>'
+        )
+        ext = ppr.find(qn('a:extLst'))  # the only child that follows defRPr
+        if ext is not None:
+            ext.addprevious(rpr)
+        else:
+            ppr.append(rpr)
+
+
+def add_text_styles(prs, theme):
+    """
+    Write the body style in theme's colors and font into the presentation's
+    default text style and the master's otherStyle, the two places text
+    boxes inherit from.
+    """
+    _apply(prs._element.find(qn('p:defaultTextStyle')), theme)
+    _apply(prs.slide_master._element.find(f"{qn('p:txStyles')}/{qn('p:otherStyle')}"), theme)
+
+
+def _runs(text, rpr):
+    lines = str(text).replace('\v', '\n').split('\n')
+    return '<a:br/>'.join(f'<a:r>{rpr}<a:t>{escape(line)}</a:t></a:r>' for line in lines)
+
+
+def add_text(slide, theme, text, left, top, width, height, style='body', size=None, bold=False, anchor=None, wrap=False):
+    """
+    Append a one-paragraph text box in a named style to slide, built as a
+    single element. Only what differs from body is written, on the
+    paragraph and its runs. size (a Length) and bold override the style.
+    """
+    color, align, style_size = _BY_NAME[style]
+    body_color, body_align, body_size = _BY_NAME[BODY]
+    size = int(size.pt * 100) if size is not None else style_size
+    attrs = f' sz="{size}"' if size != body_size else ''
+    if bold:
+        attrs += ' b="1"'
+    fill = _fill_xml(theme.hex[color]) if color != body_color else ''
+    rpr = f'<a:rPr lang="en-US"{attrs}>{fill}</a:rPr>' if fill else f'<a:rPr lang="en-US"{attrs}/>'
+    ppr = f'<a:pPr algn="{align}"/>' if align != body_align else ''
+    anchor = f' anchor="{MSO_ANCHOR.to_xml(anchor)}"' if anchor is not None else ''
+
+    shape_id = slide.shapes._next_shape_id
+    sp = parse_xml(
+        f'<p:sp {_NS}><p:nvSpPr><p:cNvPr id="{shape_id}" name="TextBox {shape_id - 1}"/>'
+        f'<p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr>'
+        f'<p:spPr><a:xfrm><a:off x="{int(left)}" y="{int(top)}"/><a:ext cx="{int(width)}" cy="{int(height)}"/></a:xfrm>'
+        f'<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+        f'<p:txBody><a:bodyPr wrap="{"square" if wrap else "none"}"{anchor}><a:spAutoFit/></a:bodyPr>'
+        f'<a:lstStyle/><a:p>{ppr}{_runs(text, rpr)}</a:p></p:txBody></p:sp>'
+    )
+    slide.shapes._spTree.append(sp)
+    return sp
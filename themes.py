@@ -0,0 +1,152 @@
+import io
+import json
+import os
+import zipfile
+
+from lxml import etree
+from pptx.dml.color import RGBColor
+
+from brand_assets import BrandConfigError, BrandImage, MasterImage, load_brand_image
+
+THEMES_DIR = os.environ.get('THEMES_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'themes'))
+DEFAULT_THEME = os.environ.get('DEFAULT_THEME', 'waldom')
+
+_A = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+# Built-in brand: Deep Teal (#2C5F7C), Bright Red (#E31E24), Light Blue (#7BA7BC)
+WALDOM = {
+    'id': 'waldom',
+    'name': 'Waldom',
+    'font': 'Calibri',
+    'logo': os.environ.get('BRAND_LOGO_PATH'),
+    'colors': {
+        'TEAL': '2C5F7C',
+        'RED': 'E31E24',
+        'LIGHT_BLUE': '7BA7BC',
+        'WHITE': 'FFFFFF',
+        'LIGHT_GRAY': 'F2F2F2',
+        'DARK_GRAY': '333333',
+        'DARK_TEAL': '1E465F',
+    },
+}
+
+# Brand color -> slot in the .pptx theme color scheme, so charts, tables and
+# anything else that uses theme colors picks up the brand too
+_SCHEME_SLOTS = (
+    ('dk1', 'DARK_GRAY'), ('lt1', 'WHITE'), ('dk2', 'DARK_TEAL'), ('lt2', 'LIGHT_GRAY'),
+    ('accent1', 'TEAL'), ('accent2', 'LIGHT_BLUE'), ('accent3', 'RED'),
+)
+
+
+class UnknownTheme(ValueError):
+    """A request named a theme id that is not registered."""
+
+
+class Theme:
+    """
+    One brand's colors, font and images. Everything derived from them (RGBColor
+    objects, loaded brand images, the themed base template) is built once here
+    and shared read-only by every deck that uses the theme.
+    """
+
+    def __init__(self, theme_id, colors, font_name, name=None, logo=None, master_images=(),
+                 base_dir=None):
+        self.id = theme_id
+        self.name = name or theme_id
+        self.font_name = font_name
+        # Brand images are read and validated here, once, not per deck
+        self.logo = logo if isinstance(logo, BrandImage) else load_brand_image(logo, base_dir)
+        if isinstance(master_images, (str, dict)):
+            master_images = [master_images]
+        self.master_images = [
+            placed if isinstance(placed, MasterImage) else MasterImage.from_config(placed, base_dir)
+            for placed in master_images
+        ]
+        self.master_images = [placed for placed in self.master_images if placed is not None]
+        self.hex = {key: value.lstrip('#').upper() for key, value in colors.items()}
+        self.colors = {key: RGBColor.from_string(value) for key, value in self.hex.items()}
+
+    @classmethod
+    def from_dict(cls, data, base=None, base_dir=None):
+        """
+        Build a theme from its JSON definition; missing colors come from base.
+        "logo" and "master_images" entries are paths (relative to base_dir) or
+        {"base64": ...} objects, master images also taking left/top/width/height in inches.
+        """
+        colors = dict(base.hex) if base else {}
+        colors.update(data.get('colors', {}))
+        return cls(
+            data['id'], colors,
+            font_name=data.get('font', base.font_name if base else 'Calibri'),
+            name=data.get('name'),
+            logo=data.get('logo'),
+            master_images=data.get('master_images') or (),
+            base_dir=base_dir,
+        )
+
+    def bake_template(self, template_blob):
+        """Return template_blob with this theme's colors and fonts in its theme part."""
+        src = zipfile.ZipFile(io.BytesIO(template_blob))
+        out = io.BytesIO()
+        with zipfile.ZipFile(out, 'w', zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                blob = src.read(info)
+                if info.filename.startswith('ppt/theme/theme'):
+                    blob = self._apply_to_theme_xml(blob)
+                dst.writestr(info, blob)
+        return out.getvalue()
+
+    def _apply_to_theme_xml(self, blob):
+        root = etree.fromstring(blob)
+        scheme = root.find(f'.//{{{_A}}}clrScheme')
+        scheme.set('name', self.name)
+        for slot, key in _SCHEME_SLOTS:
+            if key not in self.hex:
+                continue
+            element = scheme.find(f'{{{_A}}}{slot}')
+            for child in list(element):
+                element.remove(child)
+            etree.SubElement(element, f'{{{_A}}}srgbClr', val=self.hex[key])
+        for latin in root.iterfind(f'.//{{{_A}}}fontScheme/*/{{{_A}}}latin'):
+            latin.set('typeface', self.font_name)
+        return etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+_registry = {}
+
+
+def register(theme):
+    _registry[theme.id] = theme
+    return theme
+
+
+def load_themes(directory=THEMES_DIR):
+    """Register the built-in theme plus every *.json definition in directory."""
+    default = register(Theme.from_dict(WALDOM))
+    if os.path.isdir(directory):
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith('.json'):
+                with open(os.path.join(directory, filename)) as f:
+                    data = json.load(f)
+                try:
+                    register(Theme.from_dict(data, base=default, base_dir=directory))
+                except BrandConfigError as e:
+                    raise BrandConfigError(f"Theme {filename}: {e}") from None
+    return list(_registry.values())
+
+
+def get_theme(theme_id=None):
+    """Look up a registered theme; None means DEFAULT_THEME."""
+    if not _registry:
+        load_themes()
+    theme_id = theme_id or DEFAULT_THEME
+    try:
+        return _registry[theme_id]
+    except KeyError:
+        raise UnknownTheme(f"Unknown theme {theme_id!r}, available: {', '.join(sorted(_registry))}") from None
+
+
+def all_themes():
+    if not _registry:
+        load_themes()
+    return list(_registry.values())
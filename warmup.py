@@ -0,0 +1,90 @@
+import gc
+import os
+import time
+
+import metrics
+
+# Exercises every slide type once so lazily imported modules (charts,
+# XlsxWriter, image handling) are loaded before the workers fork
+WARMUP_DECK = {
+    'title': 'Warmup',
+    'subtitle': 'Warmup',
+    'sections': ['One', 'Two'],
+    'slides': [
+        {'type': 'content_with_icons', 'title': 'Icons', 'items': [{'icon': '📈', 'text': 'Item'}]},
+        {'type': 'split', 'title': 'Split', 'paragraphs': ['Paragraph']},
+        {'type': 'market_opportunities', 'title': 'Market', 'items': [{'icon': '🌍', 'title': 'Item', 'text': 'Text'}]},
+        {'type': 'timeline', 'title': 'Timeline', 'milestones': [{'date': 'Q1', 'event': 'Event'}]},
+        {'type': 'comparison', 'title': 'Comparison', 'left_side': {'title': 'A', 'items': ['a']},
+         'right_side': {'title': 'B', 'items': ['b']}},
+        {'type': 'process_steps', 'title': 'Process', 'steps': [{'label': '1', 'description': 'Step'}]},
+        {'type': 'team', 'title': 'Team', 'members': [{'name': 'Warm Up', 'role': 'Role', 'image_url': ''}]},
+        {'type': 'quote', 'quote': 'Quote', 'author': 'Author', 'role': 'Role'},
+        {'type': 'stats', 'title': 'Stats', 'stats': [{'number': '1', 'label': 'Stat'}]},
+        {'type': 'contact_info', 'title': 'Contact', 'contact_details': [{'icon': '📧', 'label': 'Email', 'value': 'x'}]},
+        {'type': 'image_text_split', 'title': 'Image', 'content': {'heading': 'Heading', 'paragraphs': ['Text']}},
+        {'type': 'chart', 'title': 'Chart', 'chart_type': 'bar',
+         'chart_data': {'categories': ['A', 'B'], 'series': [{'name': 'S', 'values': [1, 2]}]}},
+    ]
+}
+
+
+def process_uptime():
+    """Seconds since this process was started, from /proc (None where unavailable)."""
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return uptime - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def warm():
+    """
+    Import everything, load the themes, bake their templates and icon tiles
+    and render WARMUP_DECK once.
+    Meant for the gunicorn master with preload_app, so workers inherit the
+    warmed state copy-on-write and serve their first request at full speed.
+    Returns the phase timings in seconds.
+    """
+    timings = {}
+
+    started = time.perf_counter()
+    import api
+    import corporate_template
+    import icons
+    import render
+    import themes
+    timings['import'] = time.perf_counter() - started
+
+    phase = time.perf_counter()
+    for theme in themes.load_themes():
+        corporate_template.theme_template(theme)
+        icons.warm(theme.hex['RED'], theme.hex['WHITE'])
+    timings['template'] = time.perf_counter() - phase
+
+    phase = time.perf_counter()
+    render.render_presentation(WARMUP_DECK)
+    api.app.test_client().get('/health')
+    timings['render'] = time.perf_counter() - phase
+
+    # Move everything allocated so far out of the collector's reach: a GC pass
+    # in a worker would otherwise write to these pages and un-share them
+    gc.collect()
+    gc.freeze()
+
+    timings['warmup'] = time.perf_counter() - started
+    for phase_name, seconds in timings.items():
+        metrics.set_gauge('warmup_seconds', round(seconds, 4), phase=phase_name)
+    startup = process_uptime()
+    if startup is not None:
+        metrics.set_gauge('startup_seconds', round(startup, 3))
+
+    print(
+        "Warmup done in {warmup:.3f}s (import {import:.3f}s, template {template:.3f}s, render {render:.3f}s)"
+        .format(**timings)
+        + (f", {startup:.2f}s since process start" if startup is not None else "")
+    )
+    return timings